@@ -1,8 +1,22 @@
 import streamlit as st
 import cv2
-import numpy as np
-from PIL import Image
 import io
+import contextlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from deteksi_daun import (PATH_PENYIMPANAN, PILIHAN_WARNA_DASAR, AnalisisCache,
+                         PenyimpananHasil, hash_konten, proses_citra)
+from deteksi_daun.cache import decode_citra
+from deteksi_daun.profil import rekam_profil
+from deteksi_daun.riwayat import (PATH_RIWAYAT, URUTAN_TINGKAT, RiwayatTanaman,
+                                  ringkasan_hasil, waktu_foto)
+
+# Sisi terpanjang citra yang dikirim ke browser (analisis tetap di resolusi penuh)
+UKURAN_TAMPILAN = 1024
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -76,278 +90,251 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def buat_citra_dummy(kondisi="sehat"):
-    """Membuat gambar simulasi daun dengan/tanpa bercak penyakit"""
-    h, w = 400, 400
-    img = np.zeros((h, w, 3), dtype=np.uint8)
-    
-    # Buat bentuk daun (elips)
-    center_y, center_x = 200, 200
-    axes_major, axes_minor = 150, 100
-    
-    # Buat mask daun
-    y, x = np.ogrid[:h, :w]
-    mask = ((x - center_x) ** 2 / axes_major ** 2 + 
-            (y - center_y) ** 2 / axes_minor ** 2) <= 1
-    
-    if kondisi == "sehat":
-        # Daun sehat: hijau cerah
-        img[mask] = [34, 139, 34]  # RGB untuk hijau
-        
-    elif kondisi == "ringan":
-        # Daun dengan bercak ringan
-        img[mask] = [34, 139, 34]
-        
-        # Tambahkan beberapa bercak kuning kecil
-        for _ in range(5):
-            bx, by = np.random.randint(100, 300, 2)
-            br = np.random.randint(8, 15)
-            bmask = (x - bx) ** 2 + (y - by) ** 2 <= br ** 2
-            img[bmask & mask] = [139, 139, 0]  # Kuning gelap
-            
-    elif kondisi == "sedang":
-        # Daun dengan bercak sedang
-        img[mask] = [34, 139, 34]
-        
-        # Tambahkan bercak coklat dan kuning
-        for _ in range(10):
-            bx, by = np.random.randint(80, 320, 2)
-            br = np.random.randint(10, 20)
-            bmask = (x - bx) ** 2 + (y - by) ** 2 <= br ** 2
-            if np.random.random() > 0.5:
-                img[bmask & mask] = [139, 90, 0]  # Coklat
-            else:
-                img[bmask & mask] = [139, 139, 0]  # Kuning gelap
-                
-    else:  # parah
-        # Daun dengan bercak parah
-        img[mask] = [34, 100, 34]  # Hijau lebih gelap
-        
-        # Tambahkan banyak bercak coklat dan kuning
-        for _ in range(20):
-            bx, by = np.random.randint(70, 330, 2)
-            br = np.random.randint(12, 30)
-            bmask = (x - bx) ** 2 + (y - by) ** 2 <= br ** 2
-            if np.random.random() > 0.3:
-                img[bmask & mask] = [90, 60, 20]  # Coklat gelap
-            else:
-                img[bmask & mask] = [139, 120, 0]  # Kuning coklat
-    
-    # Tambahkan noise untuk realisme
-    noise = np.random.randint(-15, 15, (h, w, 3))
-    final_img = np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
-    
-    return final_img
+@st.cache_resource
+def ambil_cache_analisis():
+    """Cache analisis bersama antar rerun dan sesi (LRU, dibatasi memori)
 
-def deteksi_bercak_penyakit(img_rgb, warna_dasar="Hijau (Default)", sensitivitas=5):
-    """Deteksi bercak penyakit pada daun berdasarkan analisis warna dan tekstur"""
-    # Konversi ke HSV dan LAB
-    hsv = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2HSV)
-    lab = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2LAB)
-    
-    # Sesuaikan threshold berdasarkan warna dasar
-    if warna_dasar == "Hijau (Default)":
-        # Deteksi area hijau sehat
-        lower_healthy = np.array([35, 40, 20])
-        upper_healthy = np.array([85, 255, 255])
-        mask_healthy = cv2.inRange(hsv, lower_healthy, upper_healthy)
-        
-        # Bercak = coklat + kuning gelap
-        lower_brown = np.array([10, 50, 20])
-        upper_brown = np.array([30, 255, 150])
-        mask_brown = cv2.inRange(hsv, lower_brown, upper_brown)
-        
-        lower_yellow = np.array([20, 50, 50])
-        upper_yellow = np.array([35, 255, 255])
-        mask_yellow = cv2.inRange(hsv, lower_yellow, upper_yellow)
-        
-        mask_disease = cv2.bitwise_or(mask_brown, mask_yellow)
-        
-    elif warna_dasar == "Kuning/Keemasan":
-        # Untuk daun kuning, fokus ke area yang LEBIH GELAP atau COKLAT
-        lower_healthy = np.array([20, 30, 80])  # Kuning cerah
-        upper_healthy = np.array([40, 255, 255])
-        mask_healthy = cv2.inRange(hsv, lower_healthy, upper_healthy)
-        
-        # Hanya deteksi coklat gelap dan area yang sangat berbeda
-        lower_brown = np.array([10, 40, 20])
-        upper_brown = np.array([25, 255, 120])  # Lebih ketat
-        mask_disease = cv2.inRange(hsv, lower_brown, upper_brown)
-        
-        # Tambahan: deteksi area gelap dengan LAB
-        l_channel = lab[:, :, 0]
-        _, dark_spots = cv2.threshold(l_channel, 80, 255, cv2.THRESH_BINARY_INV)
-        mask_disease = cv2.bitwise_or(mask_disease, dark_spots)
-        
-    elif warna_dasar == "Kemerahan/Ungu":
-        # Untuk daun merah/ungu
-        lower_healthy1 = np.array([0, 30, 30])
-        upper_healthy1 = np.array([10, 255, 255])
-        lower_healthy2 = np.array([140, 30, 30])
-        upper_healthy2 = np.array([180, 255, 255])
-        mask_healthy = cv2.bitwise_or(
-            cv2.inRange(hsv, lower_healthy1, upper_healthy1),
-            cv2.inRange(hsv, lower_healthy2, upper_healthy2)
-        )
-        
-        # Deteksi coklat dan hitam
-        lower_brown = np.array([10, 30, 20])
-        upper_brown = np.array([30, 255, 100])
-        mask_disease = cv2.inRange(hsv, lower_brown, upper_brown)
-        
-    else:  # Custom - gunakan analisis tekstur
-        # Deteksi semua area non-background
-        gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
-        _, mask_healthy = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
-        
-        # Gunakan variance untuk deteksi bercak (area tidak seragam)
-        blur = cv2.GaussianBlur(gray, (21, 21), 0)
-        variance = cv2.absdiff(gray, blur)
-        _, mask_disease = cv2.threshold(variance, 20, 255, cv2.THRESH_BINARY)
-        
-        # Morfologi untuk hapus noise kecil
-        kernel = np.ones((5, 5), np.uint8)
-        mask_disease = cv2.morphologyEx(mask_disease, cv2.MORPH_OPEN, kernel)
-    
-    # Sesuaikan sensitivitas dengan morfologi
-    sens_factor = sensitivitas / 5.0  # Normalisasi ke 0.2 - 2.0
-    kernel_size = max(3, int(7 - sens_factor * 2))  # Kernel lebih kecil = lebih sensitif
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
-    
-    if sensitivitas > 5:
-        # Lebih sensitif: kurangi noise removal
-        mask_disease = cv2.morphologyEx(mask_disease, cv2.MORPH_CLOSE, kernel, iterations=1)
-    else:
-        # Kurang sensitif: lebih banyak noise removal
-        mask_disease = cv2.morphologyEx(mask_disease, cv2.MORPH_OPEN, kernel, iterations=2)
-        mask_disease = cv2.morphologyEx(mask_disease, cv2.MORPH_CLOSE, kernel, iterations=1)
-    
-    # Deteksi pola: bercak penyakit = spot tidak merata
-    # Hitung connected components untuk analisis pola
-    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask_disease, connectivity=8)
-    
-    # Filter komponen yang terlalu kecil (noise) atau terlalu besar (false positive)
-    mask_filtered = np.zeros_like(mask_disease)
-    total_area = img_rgb.shape[0] * img_rgb.shape[1]
-    min_area = total_area * 0.0005  # 0.05% dari total
-    max_area = total_area * 0.3     # 30% dari total
-    
-    for i in range(1, num_labels):  # Skip background (label 0)
-        area = stats[i, cv2.CC_STAT_AREA]
-        if min_area < area < max_area:
-            mask_filtered[labels == i] = 255
-    
-    mask_disease = mask_filtered
-    mask_green = mask_healthy
-    
-    # Hitung persentase
-    total_leaf_pixels = np.sum(mask_green > 0)
-    disease_pixels = np.sum(mask_disease > 0)
-    
-    if total_leaf_pixels > 0:
-        persentase_penyakit = (disease_pixels / total_leaf_pixels) * 100
-    else:
-        persentase_penyakit = 0
-    
-    # Tentukan tingkat kesehatan
-    if persentase_penyakit < 5:
-        tingkat = "SEHAT"
-        status_class = "status-sehat"
-        keterangan = "Daun dalam kondisi baik"
-    elif persentase_penyakit < 15:
-        tingkat = "TERINFEKSI RINGAN"
-        status_class = "status-ringan"
-        keterangan = "Bercak penyakit mulai muncul"
-    elif persentase_penyakit < 30:
-        tingkat = "TERINFEKSI SEDANG"
-        status_class = "status-sedang"
-        keterangan = "Perlu penanganan segera"
-    else:
-        tingkat = "TERINFEKSI PARAH"
-        status_class = "status-parah"
-        keterangan = "Kondisi kritis, butuh treatment intensif"
-    
-    return {
-        'tingkat': tingkat,
-        'status_class': status_class,
-        'persentase_penyakit': persentase_penyakit,
-        'keterangan': keterangan,
-        'mask_green': mask_green,
-        'mask_disease': mask_disease,
-        'luas_daun': total_leaf_pixels,
-        'luas_bercak': disease_pixels
-    }
+    Hasil juga disimpan di disk (bersama perintah batch), jadi foto yang
+    sama tidak dianalisis ulang setelah app di-restart.
+    """
+    return AnalisisCache(maks_entri=32, maks_byte=512 * 1024 * 1024,
+                         penyimpanan=PenyimpananHasil(PATH_PENYIMPANAN))
 
-def proses_citra(img_array, warna_dasar="Hijau (Default)", sensitivitas=5):
-    """Fungsi utama untuk memproses citra daun"""
-    # Simpan gambar RGB original
-    if len(img_array.shape) == 3:
-        img_rgb = img_array.copy()
-        gray_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+@st.cache_resource
+def ambil_executor():
+    """Thread pool analisis, agar script Streamlit tidak terblokir selama analisis"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="analisis")
+
+def _analisis(cache, data_citra, warna_dasar, sensitivitas, resolusi_analisis,
+              per_daun, dengan_profil):
+    # Berjalan di thread worker bersama analisis lain (termasuk riwayat).
+    # tracemalloc global per proses: rekam_profil menjalankan analisis yang
+    # diprofil bergiliran agar angka memorinya tidak saling mengacaukan
+    if dengan_profil:
+        konteks_profil = rekam_profil(warna_dasar=warna_dasar, sensitivitas=sensitivitas,
+                                      resolusi_analisis=resolusi_analisis)
     else:
-        gray_img = img_array
-        img_rgb = cv2.cvtColor(gray_img, cv2.COLOR_GRAY2RGB)
-    
-    # Deteksi bercak penyakit dengan parameter kalibrasi
-    hasil_penyakit = deteksi_bercak_penyakit(img_rgb, warna_dasar, sensitivitas)
+        konteks_profil = contextlib.nullcontext()
+    with konteks_profil as profil:
+        hasil = cache.proses(data_citra, warna_dasar, sensitivitas, resolusi_analisis,
+                             per_daun=per_daun)
+    return hasil, profil
+
+def mulai_analisis(kunci, *args):
+    """Future analisis untuk kunci ini; dikirim ke thread pool jika belum ada"""
+    berjalan = st.session_state.get('analisis')
+    if berjalan is None or berjalan[0] != kunci:
+        future = ambil_executor().submit(_analisis, ambil_cache_analisis(), *args)
+        berjalan = (kunci, future)
+        st.session_state['analisis'] = berjalan
+    return berjalan[1]
+
+@st.fragment(run_every=0.25)
+def tunggu_analisis(future):
+    """Tampilkan status menunggu; rerun halaman begitu analisis selesai"""
+    if future.done():
+        st.rerun()
+    st.info("⏳ Menganalisis kondisi daun...")
+
+def untuk_tampilan(img, maks=UKURAN_TAMPILAN):
+    """Perkecil citra hanya untuk ditampilkan agar payload ke browser kecil"""
+    if max(img.shape[:2]) <= maks:
+        return img
+    skala = maks / max(img.shape[:2])
+    ukuran = (max(1, round(img.shape[1] * skala)), max(1, round(img.shape[0] * skala)))
+    return cv2.resize(img, ukuran, interpolation=cv2.INTER_AREA)
+
+@st.fragment
+def tampilkan_tahapan(hasil):
+    """Citra tahapan hanya di-encode untuk tahap yang dipilih (rerun fragment saja)"""
+    pilihan = st.radio(
+        "Tahap:",
+        ["1️⃣ Original", "2️⃣ Filtered", "3️⃣ Segmentasi", "4️⃣ Edges", "5️⃣ Hasil Akhir"],
+        index=None, horizontal=True, label_visibility="collapsed"
+    )
     
-    # 1. Enhancement: Median Filtering
-    median_filtered = cv2.medianBlur(gray_img, 5)
+    if pilihan is None:
+        st.caption("Pilih tahap di atas untuk menampilkan citra hasil tiap tahap")
     
-    # 2. Segmentasi: Otsu's Thresholding
-    _, binary_img = cv2.threshold(median_filtered, 0, 255, 
-                                   cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    elif pilihan == "1️⃣ Original":
+        col_t1a, col_t1b = st.columns(2)
+        with col_t1a:
+            st.image(untuk_tampilan(hasil['original']), caption="Gambar Original (RGB)", 
+                    use_container_width=True, clamp=True)
+        with col_t1b:
+            st.image(untuk_tampilan(hasil['gray']), caption="Grayscale", 
+                    use_container_width=True, clamp=True)
+        st.markdown("**Deskripsi**: Gambar input asli dan konversi ke grayscale untuk processing")
     
-    # 3. Morfologi: Closing untuk mengisi lubang
-    kernel = np.ones((7, 7), np.uint8)
-    morph_img = cv2.morphologyEx(binary_img, cv2.MORPH_CLOSE, kernel)
+    elif pilihan == "2️⃣ Filtered":
+        st.image(untuk_tampilan(hasil['filtered']), caption="Setelah Median Filter", 
+                use_container_width=True, clamp=True)
+        st.markdown("**Deskripsi**: Noise reduction dengan mempertahankan detail tepi daun")
     
-    # 4. Edge Detection
-    edges = cv2.Canny(morph_img, 50, 150)
+    elif pilihan == "3️⃣ Segmentasi":
+        col_t3a, col_t3b = st.columns(2)
+        with col_t3a:
+            st.image(untuk_tampilan(hasil['binary']), caption="Binary Thresholding", 
+                    use_container_width=True, clamp=True)
+        with col_t3b:
+            st.image(untuk_tampilan(hasil['segmented']), caption="Daun Tersegmentasi", 
+                    use_container_width=True, clamp=True)
+        st.markdown("**Deskripsi**: Pemisahan objek daun dari background")
     
-    # 5. Ekstraksi Kontur
-    contours, _ = cv2.findContours(morph_img, cv2.RETR_EXTERNAL, 
-                                     cv2.CHAIN_APPROX_SIMPLE)
+    elif pilihan == "4️⃣ Edges":
+        st.image(untuk_tampilan(hasil['edges']), caption="Deteksi Tepi (Canny)", 
+                use_container_width=True, clamp=True)
+        st.markdown("**Deskripsi**: Tepi daun terdeteksi untuk analisis bentuk dan boundary")
     
-    # 6. Visualisasi hasil
-    output_img = img_rgb.copy()
-    segmented_img = img_rgb.copy()
+    else:
+        col_t5a, col_t5b = st.columns(2)
+        with col_t5a:
+            # Visualisasi mask penyakit
+            disease_viz = cv2.cvtColor(untuk_tampilan(hasil['penyakit_info']['mask_disease']), 
+                                       cv2.COLOR_GRAY2RGB)
+            st.image(disease_viz, caption="Mask Bercak Penyakit", 
+                    use_container_width=True, clamp=True)
+        with col_t5b:
+            st.image(untuk_tampilan(hasil['result']), caption="Overlay Hasil Akhir", 
+                    use_container_width=True, clamp=True)
+        st.markdown("**Deskripsi**: Visualisasi akhir dengan marking kontur daun (hijau) dan area bercak (merah)")
+
+@st.cache_resource
+def ambil_riwayat():
+    """Riwayat per tanaman di disk (ringkasan per foto, tidak pernah di-evict)"""
+    return RiwayatTanaman(PATH_RIWAYAT)
+
+def _analisis_riwayat(riwayat, tanaman, nama, data_citra, hash_citra, waktu,
+                      warna_dasar, sensitivitas, resolusi_analisis):
+    # Berjalan di thread worker: analisis lalu simpan ringkasannya ke riwayat.
+    # Riwayat hanya butuh angka dan thumbnail overlay, jadi citra antara tidak
+    # dibuat dan hasilnya tidak masuk cache bersama (tidak menggusur entri
+    # analisis utama saat banyak foto diupload sekaligus)
+    hasil = proses_citra(decode_citra(data_citra), warna_dasar, sensitivitas,
+                         keluaran=('result',), resolusi_analisis=resolusi_analisis)
+    riwayat.simpan(tanaman, hash_citra, ringkasan_hasil(hasil), nama, waktu,
+                   warna_dasar, sensitivitas, resolusi_analisis)
+    return nama
+
+@st.fragment(run_every=0.5)
+def tunggu_riwayat(futures):
+    """Progres analisis gambar baru; rerun halaman begitu semuanya selesai"""
+    selesai = sum(future.done() for future in futures)
+    if selesai == len(futures):
+        st.rerun()
+    st.progress(selesai / len(futures),
+                text=f"⏳ Menganalisis gambar baru ({selesai}/{len(futures)})...")
+
+def halaman_riwayat(warna_dasar, sensitivitas, resolusi_analisis):
+    """Upload banyak foto satu tanaman dan tampilkan tren infeksinya"""
+    riwayat = ambil_riwayat()
+    st.subheader("📈 Riwayat Tanaman")
+    
+    col_r1, col_r2 = st.columns([1, 1])
+    with col_r1:
+        tanaman_lama = riwayat.daftar_tanaman()
+        pilihan = st.selectbox("Tanaman:", tanaman_lama + ["➕ Tanaman baru"])
+    with col_r2:
+        if pilihan == "➕ Tanaman baru":
+            tanaman = st.text_input("ID tanaman baru:", placeholder="mis. cabai-bedeng-3").strip()
+        else:
+            tanaman = pilihan
+    if not tanaman:
+        st.info("👆 Pilih tanaman atau isi ID tanaman baru terlebih dahulu")
+        return
+    
+    uploaded_files = st.file_uploader(
+        "Upload foto harian tanaman ini (bisa banyak sekaligus)",
+        type=['png', 'jpg', 'jpeg'],
+        accept_multiple_files=True,
+        help="Waktu foto diambil dari EXIF; tanpa EXIF dipakai waktu upload. "
+             "Foto yang sudah ada di riwayat tidak dianalisis ulang"
+    )
     
-    luas_daun = 0
-    if len(contours) > 0:
-        # Ambil kontur terbesar (daun)
-        cnt = max(contours, key=cv2.contourArea)
-        luas_daun = cv2.contourArea(cnt)
-        
-        # Gambar kontur daun (hijau)
-        cv2.drawContours(output_img, [cnt], -1, (0, 255, 0), 3)
-        
-        # Buat mask untuk segmentasi daun
-        mask = np.zeros(gray_img.shape, dtype=np.uint8)
-        cv2.drawContours(mask, [cnt], -1, 255, -1)
-        
-        # Terapkan mask ke gambar original
-        segmented_img = cv2.bitwise_and(img_rgb, img_rgb, mask=mask)
-        
-        # Overlay bercak penyakit dengan warna merah
-        disease_mask_3ch = cv2.cvtColor(hasil_penyakit['mask_disease'], 
-                                        cv2.COLOR_GRAY2RGB)
-        red_overlay = np.zeros_like(img_rgb)
-        red_overlay[:, :, 0] = hasil_penyakit['mask_disease']  # Channel merah
-        output_img = cv2.addWeighted(output_img, 1, red_overlay, 0.5, 0)
-    
-    return {
-        'original': img_rgb,
-        'gray': gray_img,
-        'filtered': median_filtered,
-        'binary': binary_img,
-        'morph': morph_img,
-        'edges': edges,
-        'segmented': segmented_img,
-        'result': output_img,
-        'luas_daun': luas_daun,
-        'penyakit_info': hasil_penyakit
-    }
+    # Hash per file upload dihitung sekali per sesi
+    hash_unggahan = st.session_state.setdefault('hash_unggahan', {})
+    berjalan = st.session_state.setdefault('riwayat_berjalan', {})
+    parameter = (warna_dasar, sensitivitas, resolusi_analisis)
+    tersimpan = riwayat.parameter_tersimpan(tanaman)
+    for uploaded_file in uploaded_files or []:
+        if uploaded_file.file_id not in hash_unggahan:
+            hash_unggahan[uploaded_file.file_id] = hash_konten(uploaded_file.getvalue())
+        hash_citra = hash_unggahan[uploaded_file.file_id]
+        kunci = (tanaman, hash_citra) + parameter
+        if tersimpan.get(hash_citra) == parameter or kunci in berjalan:
+            continue
+        data_citra = uploaded_file.getvalue()
+        berjalan[kunci] = ambil_executor().submit(
+            _analisis_riwayat, riwayat, tanaman,
+            uploaded_file.name, data_citra, hash_citra,
+            waktu_foto(data_citra) or time.time(), *parameter)
+    
+    futures = [f for k, f in berjalan.items() if k[0] == tanaman]
+    if any(not f.done() for f in futures):
+        tunggu_riwayat(futures)
+        return
+    for kunci, future in list(berjalan.items()):
+        if kunci[0] == tanaman and future.done():
+            if future.exception() is not None:
+                st.error(f"❌ Gagal menganalisis gambar: {future.exception()}")
+            del berjalan[kunci]
+    
+    baris = riwayat.ringkasan(tanaman, dengan_thumbnail=True)
+    if not baris:
+        st.info("Belum ada foto untuk tanaman ini")
+        return
+    
+    tabel = pd.DataFrame({
+        'Waktu': pd.to_datetime([b['waktu'] for b in baris], unit='s'),
+        'Bercak (%)': [b['persentase_penyakit'] for b in baris],
+        'Tingkat (0-3)': [URUTAN_TINGKAT.get(b['tingkat'], 0) for b in baris],
+    }).set_index('Waktu')
+    
+    terakhir = baris[-1]
+    col_m1, col_m2, col_m3 = st.columns(3)
+    with col_m1:
+        st.metric("📷 Jumlah Foto", len(baris))
+    with col_m2:
+        perubahan = (terakhir['persentase_penyakit'] - baris[-2]['persentase_penyakit']
+                     if len(baris) > 1 else None)
+        st.metric("🔬 Bercak Terakhir", f"{terakhir['persentase_penyakit']:.1f}%",
+                  delta=None if perubahan is None else f"{perubahan:+.1f}%",
+                  delta_color="inverse")
+    with col_m3:
+        st.metric("🍃 Tingkat Terakhir", terakhir['tingkat'])
+    
+    st.markdown("**Tren Persentase Bercak**")
+    st.line_chart(tabel[['Bercak (%)']])
+    st.markdown("**Tren Tingkat Infeksi**")
+    st.line_chart(tabel[['Tingkat (0-3)']])
+    st.caption("Tingkat: 0 = Sehat, 1 = Ringan, 2 = Sedang, 3 = Parah")
+    
+    with st.expander(f"📋 Tabel Riwayat ({len(baris)} foto)"):
+        st.dataframe([
+            {
+                'Waktu': datetime.fromtimestamp(b['waktu']).strftime("%Y-%m-%d %H:%M"),
+                'Berkas': b['nama'],
+                'Tingkat': b['tingkat'],
+                'Bercak (%)': round(b['persentase_penyakit'], 1),
+                'Luas Bercak (px²)': b['luas_bercak'],
+                'Kalibrasi': f"{b['warna_dasar']} / {b['sensitivitas']}",
+            }
+            for b in baris
+        ], use_container_width=True, hide_index=True)
+    
+    # Perbandingan visual beberapa foto (thumbnail overlay dari riwayat)
+    label = [f"{datetime.fromtimestamp(b['waktu']):%Y-%m-%d %H:%M} · {b['nama']}" for b in baris]
+    dipilih = st.multiselect("🔍 Bandingkan foto:", range(len(baris)),
+                             default=list(range(len(baris)))[-4:],
+                             format_func=lambda i: label[i])
+    if dipilih:
+        kolom = st.columns(min(len(dipilih), 4))
+        for n, i in enumerate(dipilih):
+            with kolom[n % len(kolom)]:
+                if baris[i]['thumbnail'] is not None:
+                    st.image(baris[i]['thumbnail'], use_container_width=True)
+                st.caption(f"{label[i]}\n\n{baris[i]['tingkat']} · "
+                           f"{baris[i]['persentase_penyakit']:.1f}%")
 
 # Header
 col_header1, col_header2, col_header3 = st.columns([1, 2, 1])
@@ -365,18 +352,29 @@ with st.sidebar:
     st.header("⚙️ Pengaturan")
     
     st.markdown("### Mode Input")
-    st.markdown("📷 Upload Gambar")
+    mode_input = st.radio(
+        "Mode Input:",
+        ["📷 Upload Gambar", "📈 Riwayat Tanaman"],
+        label_visibility="collapsed",
+        help="Riwayat Tanaman: upload banyak foto tanaman yang sama dan pantau tren infeksinya"
+    )
     
     st.markdown("---")
     st.markdown("### 🎨 Kalibrasi Warna Dasar")
     warna_dasar = st.selectbox(
         "Warna Dasar Daun:",
-        ["Hijau (Default)", "Kuning/Keemasan", "Kemerahan/Ungu", "Custom"],
+        PILIHAN_WARNA_DASAR,
         help="Pilih warna dasar alami tanaman untuk menghindari false positive"
     )
     
     if warna_dasar == "Custom":
         st.info("💡 Mode Custom: Sistem akan menganalisis distribusi warna untuk deteksi bercak")
+    elif warna_dasar == "Custom (Varians Lokal)":
+        st.info("💡 Mode Varians Lokal: Bercak = area dengan tekstur jauh lebih kasar "
+                "dari tekstur khas daun ini (ambang menyesuaikan gambar)")
+    elif warna_dasar == "Otomatis":
+        st.info("💡 Mode Otomatis: Rentang warna sehat & bercak diatur dari histogram "
+                "warna daun pada tiap gambar, tanpa perlu memilih warna dasar")
     
     sensitivitas = st.slider(
         "Sensitivitas Deteksi:",
@@ -386,6 +384,27 @@ with st.sidebar:
         help="Tingkatkan untuk deteksi lebih sensitif, turunkan untuk mengurangi false positive"
     )
     
+    resolusi_label = st.selectbox(
+        "Resolusi Analisis:",
+        ["Asli", "2048 px", "1024 px", "512 px"],
+        help="Perkecil gambar besar sebelum dianalisis agar lebih cepat. "
+             "Persentase bercak hampir tidak berubah, luas tetap dalam piksel asli"
+    )
+    resolusi_analisis = None if resolusi_label == "Asli" else int(resolusi_label.split()[0])
+    
+    analisis_per_daun = st.checkbox(
+        "🍂 Statistik per daun",
+        value=False,
+        help="Analisis setiap daun pada gambar (mis. satu nampan berisi banyak daun), "
+             "bukan hanya daun terbesar"
+    )
+    
+    tampilkan_profil = st.checkbox(
+        "⏱️ Tampilkan profil waktu per tahap",
+        value=False,
+        help="Catat waktu dan memori tiap tahap pipeline (sedikit memperlambat analisis)"
+    )
+    
     st.markdown("---")
     st.markdown("### 🏥 Kriteria Kesehatan")
     st.markdown("""
@@ -415,6 +434,11 @@ with st.sidebar:
     **Mode Custom:**
     - Menggunakan analisis tekstur
     - Cocok untuk warna tidak standar
+    - "Varians Lokal": ambang tekstur otomatis per gambar
+    
+    **Mode Otomatis:**
+    - Warna dasar dikenali dari histogram warna daun
+    - Cocok untuk banyak gambar dengan warna daun berbeda
     
     **Sensitivitas:**
     - Rendah (1-3): Lebih konservatif
@@ -433,6 +457,11 @@ with st.sidebar:
     6. **Klasifikasi**: Multi-criteria
     """)
 
+# Halaman riwayat tanaman (banyak foto); halaman analisis satu gambar di bawah
+if mode_input == "📈 Riwayat Tanaman":
+    halaman_riwayat(warna_dasar, sensitivitas, resolusi_analisis)
+    st.stop()
+
 # Main content
 col1, col2 = st.columns([1, 1])
 
@@ -446,120 +475,124 @@ with col1:
     )
     
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        img_array = np.array(image)
-        st.image(image, caption="Gambar yang diupload", 
+        data_citra = uploaded_file.getvalue()
+        st.image(data_citra, caption="Gambar yang diupload", 
                 use_container_width=True)
     else:
         st.info("👆 Silakan upload gambar daun terlebih dahulu")
-        img_array = None
+        data_citra = None
+
+hasil = None
+profil = None
 
 with col2:
     st.subheader("🎯 Hasil Analisis")
     
-    if img_array is not None:
-        with st.spinner("⏳ Menganalisis kondisi daun..."):
-            hasil = proses_citra(img_array, warna_dasar, sensitivitas)
-            
-            # Tampilkan status kesehatan
-            info = hasil['penyakit_info']
+    if data_citra is not None:
+        # Analisis berjalan di thread pool; halaman dirender tanpa menunggu
+        kunci_analisis = (uploaded_file.file_id, warna_dasar, sensitivitas,
+                          resolusi_analisis, analisis_per_daun, tampilkan_profil)
+        future = mulai_analisis(kunci_analisis, data_citra, warna_dasar, sensitivitas,
+                                resolusi_analisis, analisis_per_daun, tampilkan_profil)
+        if not future.done():
+            tunggu_analisis(future)
+        elif future.exception() is not None:
+            st.error(f"❌ Gagal menganalisis gambar: {future.exception()}")
+        else:
+            hasil, profil = future.result()
+    else:
+        st.info("⬅️ Silakan input gambar daun terlebih dahulu")
+    
+    if hasil is not None:
+        # Status dan metrik dulu (hanya angka), citra menyusul
+        info = hasil['penyakit_info']
+        st.markdown(f"""
+        <div class='status-box {info['status_class']}'>
+            🍃 {info['tingkat']}
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Info kalibrasi
+        if warna_dasar != "Hijau (Default)":
+            st.info(f"🎨 **Mode Kalibrasi**: {warna_dasar} | Sensitivitas: {sensitivitas}/10")
+        
+        st.info(f"💡 **Keterangan**: {info['keterangan']}")
+        
+        # Metrik
+        col_a, col_b = st.columns(2)
+        with col_a:
             st.markdown(f"""
-            <div class='status-box {info['status_class']}'>
-                🍃 {info['tingkat']}
+            <div class='metric-box'>
+                <div>🔬 Persentase Bercak</div>
+                <div class='metric-value'>{info['persentase_penyakit']:.1f}%</div>
             </div>
             """, unsafe_allow_html=True)
-            
-            # Info kalibrasi
-            if warna_dasar != "Hijau (Default)":
-                st.info(f"🎨 **Mode Kalibrasi**: {warna_dasar} | Sensitivitas: {sensitivitas}/10")
-            
-            st.info(f"💡 **Keterangan**: {info['keterangan']}")
-            
-            # Metrik
-            col_a, col_b = st.columns(2)
-            with col_a:
-                st.markdown(f"""
-                <div class='metric-box'>
-                    <div>🔬 Persentase Bercak</div>
-                    <div class='metric-value'>{info['persentase_penyakit']:.1f}%</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col_b:
-                st.markdown(f"""
-                <div class='metric-box'>
-                    <div>📐 Luas Daun</div>
-                    <div class='metric-value'>{hasil['luas_daun']:,} px²</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Metrik tambahan
-            col_c, col_d = st.columns(2)
-            with col_c:
-                st.metric("🟤 Luas Bercak", f"{info['luas_bercak']:,} px²")
-            with col_d:
-                kesehatan = 100 - info['persentase_penyakit']
-                st.metric("💚 Tingkat Kesehatan", f"{kesehatan:.1f}%")
-            
-            # Gambar hasil
-            st.image(hasil['result'], 
-                    caption="Hasil Segmentasi (Hijau: Kontur Daun, Merah: Area Bercak)", 
-                    use_container_width=True, clamp=True)
-    else:
-        st.info("⬅️ Silakan input gambar daun terlebih dahulu")
+        
+        with col_b:
+            st.markdown(f"""
+            <div class='metric-box'>
+                <div>📐 Luas Daun</div>
+                <div class='metric-value'>{hasil['luas_daun']:,.0f} px²</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        # Metrik tambahan
+        col_c, col_d = st.columns(2)
+        with col_c:
+            st.metric("🟤 Luas Bercak", f"{info['luas_bercak']:,} px²")
+        with col_d:
+            kesehatan = 100 - info['persentase_penyakit']
+            st.metric("💚 Tingkat Kesehatan", f"{kesehatan:.1f}%")
+        
+        # Gambar hasil
+        st.image(untuk_tampilan(hasil['result']), 
+                caption="Hasil Segmentasi (Hijau: Kontur Daun, Merah: Area Bercak)", 
+                use_container_width=True, clamp=True)
+
+# Tabel statistik per daun
+if hasil is not None and analisis_per_daun:
+    with st.expander(f"🍂 Statistik per Daun ({len(hasil['per_daun'])} daun)", expanded=True):
+        if hasil['per_daun']:
+            st.dataframe([
+                {
+                    'Daun': d['daun'],
+                    'Tingkat': d['tingkat'],
+                    'Bercak (%)': round(d['persentase_penyakit'], 1),
+                    'Luas Daun (px²)': round(d['luas_kontur']),
+                    'Luas Bercak (px²)': d['luas_bercak'],
+                    'Posisi (x, y)': f"{d['pusat'][0]:.0f}, {d['pusat'][1]:.0f}",
+                }
+                for d in hasil['per_daun']
+            ], use_container_width=True, hide_index=True)
+        else:
+            st.caption("Tidak ada kontur daun yang ditemukan")
+
+# Panel profil waktu
+if hasil is not None and profil is not None:
+    with st.expander("⏱️ Profil Waktu per Tahap", expanded=True):
+        if profil.catatan:
+            st.dataframe([
+                {
+                    'Tahap': "\u2003" * e['kedalaman'] + e['tahap'],
+                    'Waktu (ms)': round(e['detik'] * 1000, 2),
+                    'Memori (MB)': round(e['memori_byte'] / 1e6, 2),
+                    'Puncak Memori (MB)': round(e['memori_puncak_byte'] / 1e6, 2),
+                }
+                for e in profil.catatan
+            ], use_container_width=True, hide_index=True)
+        else:
+            st.caption("Semua tahap diambil dari cache, tidak ada yang dihitung ulang")
+        st.caption(f"Total: {profil.total_detik * 1000:.1f} ms, "
+                   f"salinan data citra {profil.total_salinan_byte / 1e6:.1f} MB")
+        st.download_button("📥 Unduh Profil (JSON)", profil.ke_json(indent=2),
+                           file_name="profil_deteksi_daun.json",
+                           mime="application/json")
 
 # Tampilkan tahapan proses
-if img_array is not None:
+if hasil is not None:
     st.markdown("---")
     st.subheader("🔍 Tahapan Pemrosesan Detail")
-    
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "1️⃣ Original", "2️⃣ Filtered", "3️⃣ Segmentasi", 
-        "4️⃣ Edges", "5️⃣ Hasil Akhir"
-    ])
-    
-    with tab1:
-        col_t1a, col_t1b = st.columns(2)
-        with col_t1a:
-            st.image(hasil['original'], caption="Gambar Original (RGB)", 
-                    use_container_width=True, clamp=True)
-        with col_t1b:
-            st.image(hasil['gray'], caption="Grayscale", 
-                    use_container_width=True, clamp=True)
-        st.markdown("**Deskripsi**: Gambar input asli dan konversi ke grayscale untuk processing")
-    
-    with tab2:
-        st.image(hasil['filtered'], caption="Setelah Median Filter", 
-                use_container_width=True, clamp=True)
-        st.markdown("**Deskripsi**: Noise reduction dengan mempertahankan detail tepi daun")
-    
-    with tab3:
-        col_t3a, col_t3b = st.columns(2)
-        with col_t3a:
-            st.image(hasil['binary'], caption="Binary Thresholding", 
-                    use_container_width=True, clamp=True)
-        with col_t3b:
-            st.image(hasil['segmented'], caption="Daun Tersegmentasi", 
-                    use_container_width=True, clamp=True)
-        st.markdown("**Deskripsi**: Pemisahan objek daun dari background")
-    
-    with tab4:
-        st.image(hasil['edges'], caption="Deteksi Tepi (Canny)", 
-                use_container_width=True, clamp=True)
-        st.markdown("**Deskripsi**: Tepi daun terdeteksi untuk analisis bentuk dan boundary")
-    
-    with tab5:
-        col_t5a, col_t5b = st.columns(2)
-        with col_t5a:
-            # Visualisasi mask penyakit
-            disease_viz = cv2.cvtColor(hasil['penyakit_info']['mask_disease'], 
-                                       cv2.COLOR_GRAY2RGB)
-            st.image(disease_viz, caption="Mask Bercak Penyakit", 
-                    use_container_width=True, clamp=True)
-        with col_t5b:
-            st.image(hasil['result'], caption="Overlay Hasil Akhir", 
-                    use_container_width=True, clamp=True)
-        st.markdown("**Deskripsi**: Visualisasi akhir dengan marking kontur daun (hijau) dan area bercak (merah)")
+    tampilkan_tahapan(hasil)
 
 # Footer
 st.markdown("---")
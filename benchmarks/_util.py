@@ -0,0 +1,25 @@
+"""Helper pengukuran bersama untuk skrip benchmark"""
+import time
+import tracemalloc
+
+
+def ukur(fungsi, *args, ulang=3, **kwargs):
+    """(detik terbaik dari ``ulang`` kali ``fungsi(*args, **kwargs)``, hasil terakhir)"""
+    terbaik = float("inf")
+    hasil = None
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        hasil = fungsi(*args, **kwargs)
+        terbaik = min(terbaik, time.perf_counter() - mulai)
+    return terbaik, hasil
+
+
+def ukur_memori(fungsi, *args, **kwargs):
+    """(detik, puncak alokasi Python/NumPy dalam MB, hasil) dari satu pemanggilan"""
+    tracemalloc.start()
+    mulai = time.perf_counter()
+    hasil = fungsi(*args, **kwargs)
+    detik = time.perf_counter() - mulai
+    _, puncak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return detik, puncak / 2**20, hasil
@@ -0,0 +1,88 @@
+"""Benchmark backend eksekusi tahap per piksel: numpy vs umat vs thread
+
+Mengukur tahap yang lewat ``per_piksel`` (threshold warna HSV/LAB, median,
+closing, morfologi bercak) dan ``proses_citra(..., keluaran=())`` lengkap
+untuk setiap backend pada beberapa resolusi. Hasil setiap backend dicek
+identik dengan backend numpy.
+
+Percepatan backend thread bergantung pada jumlah core; jalankan di host
+multi-core. Tanpa OpenCL, backend umat memakai jalur CPU OpenCV biasa
+ditambah overhead UMat. Opsi ``--satu-thread-opencv`` mematikan thread
+internal OpenCV (seperti worker batch) agar paralelisme pita terlihat
+terpisah dari paralelisme bawaan OpenCV.
+
+Jalankan dari root repo: python -m benchmarks.bench_backend
+"""
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from benchmarks._util import ukur
+from deteksi_daun import buat_citra_dummy, proses_citra
+from deteksi_daun.eksekusi import BACKEND_EKSEKUSI, pakai_backend
+from deteksi_daun.pipeline import (closing_daun, filter_median, mask_warna,
+                                   morfologi_sensitivitas, threshold_otsu)
+
+RESOLUSI = [(768, 1024), (1536, 2048), (3000, 4000)]
+
+
+def tahap_per_piksel(citra):
+    """Fungsi tanpa argumen untuk setiap tahap yang lewat per_piksel"""
+    gray = cv2.cvtColor(citra, cv2.COLOR_RGB2GRAY)
+    median = filter_median(gray)
+    biner = threshold_otsu(median)
+    _, bercak = mask_warna(citra, "Kuning/Keemasan")
+    return {
+        'warna': lambda: mask_warna(citra, "Kuning/Keemasan"),
+        'median': lambda: filter_median(gray),
+        'closing': lambda: closing_daun(biner),
+        'morfologi': lambda: morfologi_sensitivitas(bercak, 5),
+        'proses_citra': lambda: proses_citra(citra, "Kuning/Keemasan", 5, keluaran=()),
+    }
+
+
+def sama(a, b):
+    if isinstance(a, dict):
+        return all(sama(a[k], b[k]) for k in a)
+    if isinstance(a, (tuple, list)):
+        return all(sama(x, y) for x, y in zip(a, b))
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--satu-thread-opencv", action="store_true",
+                        help="cv2.setNumThreads(1) selama benchmark")
+    args = parser.parse_args()
+    if args.satu_thread_opencv:
+        cv2.setNumThreads(1)
+
+    print(f"{os.cpu_count()} core, thread OpenCV {cv2.getNumThreads()}, "
+          f"OpenCL {'tersedia' if cv2.ocl.haveOpenCL() else 'tidak tersedia'}")
+    for ukuran in RESOLUSI:
+        citra = buat_citra_dummy("parah", seed=0, ukuran=ukuran)
+        tahap = tahap_per_piksel(citra)
+        acuan = {nama: fungsi() for nama, fungsi in tahap.items()}
+        waktu = {}
+        for backend in BACKEND_EKSEKUSI:
+            with pakai_backend(backend):
+                for nama, fungsi in tahap.items():
+                    if not sama(acuan[nama], fungsi()):
+                        raise SystemExit(f"BEDA: backend {backend}, tahap {nama}")
+                    waktu[backend, nama] = ukur(fungsi, ulang=5)[0]
+
+        print(f"\nCitra {ukuran[1]}x{ukuran[0]} (ms, percepatan terhadap numpy)")
+        print(f"{'tahap':<13}" + "".join(f"{b:>18}" for b in BACKEND_EKSEKUSI))
+        for nama in tahap:
+            dasar = waktu["numpy", nama]
+            kolom = "".join(f"{waktu[b, nama] * 1000:>10.1f} ({dasar / waktu[b, nama]:4.2f}x)"
+                            for b in BACKEND_EKSEKUSI)
+            print(f"{nama:<13}{kolom}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark regresi filter connected components pada deteksi_bercak_penyakit
+
+Membandingkan loop lama (scan ``labels == i`` per komponen) dengan tabel keep
+tervektorisasi, untuk beberapa jumlah komponen. Hasil mask harus identik.
+
+Jalankan dari root repo: python -m benchmarks.bench_filter_komponen
+"""
+import cv2
+import numpy as np
+
+from benchmarks._util import ukur
+from deteksi_daun import filter_komponen
+
+
+def filter_loop(labels, stats, min_area, max_area):
+    """Implementasi lama: satu scan penuh labels untuk setiap komponen"""
+    mask_filtered = np.zeros(labels.shape, dtype=np.uint8)
+    for i in range(1, stats.shape[0]):
+        area = stats[i, cv2.CC_STAT_AREA]
+        if min_area < area < max_area:
+            mask_filtered[labels == i] = 255
+    return mask_filtered
+
+
+def buat_mask_bercak(h, w, jumlah, rng):
+    """Mask biner berisi sejumlah bercak lingkaran acak dengan ukuran bervariasi"""
+    mask = np.zeros((h, w), dtype=np.uint8)
+    for _ in range(jumlah):
+        cx, cy = int(rng.integers(0, w)), int(rng.integers(0, h))
+        r = int(rng.integers(2, 25))
+        cv2.circle(mask, (cx, cy), r, 255, -1)
+    return mask
+
+
+def main():
+    rng = np.random.default_rng(0)
+    h, w = 1500, 2000
+    total_area = h * w
+    min_area = total_area * 0.0005
+    max_area = total_area * 0.3
+
+    print(f"Citra {w}x{h}")
+    print(f"{'bercak':>8} {'komponen':>9} {'loop (ms)':>10} {'vektor (ms)':>12} {'speedup':>8}")
+    for jumlah in (10, 50, 200, 1000):
+        mask = buat_mask_bercak(h, w, jumlah, rng)
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        t_loop, m_loop = ukur(filter_loop, labels, stats, min_area, max_area)
+        t_vek, m_vek = ukur(filter_komponen, labels, stats, min_area, max_area)
+
+        if not np.array_equal(m_loop, m_vek) or m_loop.dtype != m_vek.dtype:
+            raise SystemExit(f"Mask berbeda untuk {jumlah} bercak")
+
+        print(f"{jumlah:>8} {stats.shape[0] - 1:>9} {t_loop * 1000:>10.1f} "
+              f"{t_vek * 1000:>12.1f} {t_loop / t_vek:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
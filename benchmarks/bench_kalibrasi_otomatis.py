@@ -0,0 +1,58 @@
+"""Benchmark kalibrasi otomatis (mode Otomatis) vs memilih warna dasar manual
+
+Citra uji adalah citra dummy yang warna daunnya diganti (hijau, hijau
+kekuningan, kuning, kemerahan) dengan bercak yang sama. Untuk tiap citra
+dicatat preset yang dipilih mode Otomatis, persentase bercaknya dibanding
+preset yang benar dan preset default, serta waktu satu analisis Otomatis
+dibanding preset yang benar dan dibanding mencoba ketiga preset warna satu
+per satu (coba-coba manual). Preset terpilih yang salah menghentikan
+benchmark; pengujian yang sama ada di tests/test_kalibrasi_otomatis.py.
+
+Jalankan dari root repo: python -m benchmarks.bench_kalibrasi_otomatis
+"""
+import cv2
+
+from benchmarks._util import ukur
+from deteksi_daun import buat_citra_dummy, proses_citra
+from deteksi_daun.dummy import VARIAN_DAUN, warnai_daun
+from deteksi_daun.pipeline import (AMBANG_WARNA, MODE_OTOMATIS, closing_daun,
+                                   filter_median, kalibrasi_warna, threshold_otsu)
+
+UKURAN = (1536, 2048)
+
+
+def persentase(citra, warna_dasar):
+    return proses_citra(citra, warna_dasar, 5, keluaran=())['penyakit_info']['persentase_penyakit']
+
+
+def main():
+    print(f"Citra {UKURAN[1]}x{UKURAN[0]}, sensitivitas 5 (persentase bercak)")
+    print(f"{'daun':<17} {'kondisi':<8} {'terpilih':<16} {'otomatis':>9} "
+          f"{'benar':>8} {'default':>8}")
+    for kondisi in ('ringan', 'parah'):
+        dasar = buat_citra_dummy(kondisi, seed=3, ukuran=UKURAN)
+        for nama, (warna, benar) in VARIAN_DAUN.items():
+            citra = dasar if warna is None else warnai_daun(dasar, warna)
+            gray = cv2.cvtColor(citra, cv2.COLOR_RGB2GRAY)
+            ambang = kalibrasi_warna(citra, closing_daun(threshold_otsu(filter_median(gray))))
+            if ambang['preset'] != benar:
+                raise SystemExit(f"SALAH PRESET: {nama} {kondisi} -> {ambang['preset']} "
+                                 f"(seharusnya {benar})")
+            print(f"{nama:<17} {kondisi:<8} {ambang['preset']:<16} "
+                  f"{persentase(citra, MODE_OTOMATIS):>8.2f}% "
+                  f"{persentase(citra, benar):>7.2f}% "
+                  f"{persentase(citra, 'Hijau (Default)'):>7.2f}%")
+
+    citra = warnai_daun(buat_citra_dummy('parah', seed=3, ukuran=UKURAN), (200, 170, 30))
+    t_satu, _ = ukur(persentase, citra, "Kuning/Keemasan")
+    t_otomatis, _ = ukur(persentase, citra, MODE_OTOMATIS)
+    t_semua, _ = ukur(lambda: [persentase(citra, w) for w in AMBANG_WARNA])
+    print(f"\nPreset benar     {t_satu * 1000:>7.1f} ms (daun kuning, parah)")
+    print(f"Otomatis         {t_otomatis * 1000:>7.1f} ms "
+          f"(+{(t_otomatis / t_satu - 1) * 100:.0f}% untuk histogram & pemilihan ambang)")
+    print(f"Coba {len(AMBANG_WARNA)} preset   {t_semua * 1000:>7.1f} ms "
+          f"({t_semua / t_otomatis:.1f}x Otomatis)")
+
+
+if __name__ == "__main__":
+    main()
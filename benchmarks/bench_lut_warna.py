@@ -0,0 +1,58 @@
+"""Benchmark & cek kesesuaian lookup table warna terhadap jalur OpenCV
+
+Untuk setiap mode kalibrasi berbasis warna, mask sehat/bercak dari
+mask_warna(metode="lut") harus identik dengan jalur HSV/LAB + inRange pada
+citra sintetis dan pada citra noise acak (mencakup seluruh ruang RGB).
+Untuk LUT terkuantisasi (bit < 8) dilaporkan fraksi piksel yang berbeda.
+
+Jalankan dari root repo: python -m benchmarks.bench_lut_warna
+"""
+import time
+
+import numpy as np
+
+from benchmarks._util import ukur
+from deteksi_daun import buat_citra_dummy
+from deteksi_daun.lut import _lut_tersimpan, ambil_lut, mask_warna_lut
+from deteksi_daun.pipeline import AMBANG_WARNA, mask_warna
+
+
+def main():
+    citra_uji = {
+        "dummy": buat_citra_dummy("parah", seed=0, ukuran=(3000, 4000)),
+        "acak": np.random.RandomState(0).randint(0, 256, (2048, 2048, 3)).astype(np.uint8),
+    }
+
+    print("Kesesuaian LUT 8-bit dengan jalur OpenCV")
+    for warna_dasar in AMBANG_WARNA:
+        for nama, citra in citra_uji.items():
+            acuan = mask_warna(citra, warna_dasar)
+            hasil = mask_warna(citra, warna_dasar, metode="lut")
+            for label, a, b in zip(("sehat", "bercak"), acuan, hasil):
+                if not np.array_equal(a, b):
+                    raise SystemExit(f"BEDA: {warna_dasar} / {nama} / mask {label}")
+        print(f"  {warna_dasar:<18} identik")
+
+    citra = citra_uji["dummy"]
+    print(f"\nWaktu klasifikasi warna, citra {citra.shape[1]}x{citra.shape[0]}")
+    print(f"{'mode':<18} {'bangun':>9} {'opencv':>9} {'lut8':>9} {'lut6':>9} {'beda6':>8}")
+    _lut_tersimpan.cache_clear()  # Ukur waktu bangun tabel dari nol
+    for warna_dasar in AMBANG_WARNA:
+        mulai = time.perf_counter()
+        ambil_lut(warna_dasar)
+        t_bangun = time.perf_counter() - mulai
+        ambil_lut(warna_dasar, bit=6)
+
+        t_cv, _ = ukur(mask_warna, citra, warna_dasar, ulang=5)
+        t_lut, _ = ukur(mask_warna_lut, citra, warna_dasar, ulang=5)
+        t_lut6, _ = ukur(mask_warna_lut, citra, warna_dasar, ulang=5, bit=6)
+
+        acuan = mask_warna(citra, warna_dasar)
+        kasar = mask_warna_lut(citra, warna_dasar, bit=6)
+        beda = max(float(np.mean(a != b)) for a, b in zip(acuan, kasar))
+        print(f"{warna_dasar:<18} {t_bangun * 1000:>7.0f}ms {t_cv * 1000:>7.1f}ms "
+              f"{t_lut * 1000:>7.1f}ms {t_lut6 * 1000:>7.1f}ms {beda:>7.3%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark & cek penyimpanan hasil di disk (PenyimpananHasil)
+
+1. Analisis ulang setelah "restart" (AnalisisCache baru, penyimpanan sama)
+   harus identik dengan analisis tanpa penyimpanan, dan jauh lebih cepat.
+2. Beberapa proses menulis dan membaca penyimpanan yang sama bersamaan:
+   tidak boleh ada galat "database is locked" dan semua entri harus ada.
+3. Dengan batas ukuran kecil, total ukuran entri tetap di bawah batas.
+
+Jalankan dari root repo: python -m benchmarks.bench_penyimpanan
+"""
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from deteksi_daun import (AnalisisCache, PenyimpananHasil, buat_batch_dummy,
+                         hash_konten)
+from deteksi_daun.penyimpanan import kunci_hasil
+
+
+def ke_png(citra):
+    buffer = io.BytesIO()
+    Image.fromarray(citra).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def sama(a, b):
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b)
+    if isinstance(a, dict):
+        return all(sama(a[k], b[k]) for k in a if k != 'waktu_tahap')
+    return a == b
+
+
+def _penulis(path, id_proses, jumlah):
+    penyimpanan = PenyimpananHasil(path)
+    mask = np.zeros((256, 256), dtype=np.uint8)
+    for i in range(jumlah):
+        kunci = kunci_hasil(f"{id_proses}-{i}", "Hijau (Default)", 5)
+        mask[i % 256] = 255
+        penyimpanan.simpan(kunci, {'persentase': i}, mask, mask)
+        if penyimpanan.ambil(kunci, dengan_mask=True) is None:
+            raise RuntimeError(f"Entri {kunci} hilang")
+    return jumlah
+
+
+def main():
+    data = [ke_png(citra) for citra in buat_batch_dummy(6, ukuran=(1200, 1600))]
+
+    with tempfile.TemporaryDirectory() as direktori:
+        path = os.path.join(direktori, "hasil.sqlite")
+
+        print("Analisis ulang setelah restart (6 citra 1600x1200)")
+        for nama, penyimpanan in (("tanpa penyimpanan", None),
+                                  ("penyimpanan kosong", PenyimpananHasil(path)),
+                                  ("penyimpanan terisi", PenyimpananHasil(path))):
+            cache = AnalisisCache(penyimpanan=penyimpanan)
+            mulai = time.perf_counter()
+            hasil = [cache.proses(d, "Hijau (Default)", 5) for d in data]
+            durasi = time.perf_counter() - mulai
+            if penyimpanan is None:
+                acuan = hasil
+            elif not all(sama(a, b) for a, b in zip(acuan, hasil)):
+                raise SystemExit(f"BEDA: {nama}")
+            print(f"  {nama:<20} {durasi * 1000 / len(data):>7.1f} ms/citra")
+        penyimpanan = PenyimpananHasil(path)
+        kunci = [kunci_hasil(hash_konten(d), "Hijau (Default)", 5) for d in data]
+        mulai = time.perf_counter()
+        if any(penyimpanan.ambil(k) is None for k in kunci):
+            raise SystemExit("Entri metrik tidak ditemukan")
+        durasi = time.perf_counter() - mulai
+        print(f"  {'metrik saja (batch)':<20} {durasi * 1000 / len(data):>7.1f} ms/citra")
+        statistik = penyimpanan.statistik()
+        print(f"  {statistik['jumlah_entri']} entri, "
+              f"{statistik['total_byte'] / len(data) / 1024:.1f} KB/entri (mask ringkas)")
+
+        print("\nPenulisan bersamaan: 4 proses x 50 entri")
+        path_konkuren = os.path.join(direktori, "konkuren.sqlite")
+        PenyimpananHasil(path_konkuren)
+        mulai = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            total = sum(executor.map(_penulis, [path_konkuren] * 4, range(4), [50] * 4))
+        durasi = time.perf_counter() - mulai
+        jumlah = PenyimpananHasil(path_konkuren).statistik()['jumlah_entri']
+        if jumlah != total:
+            raise SystemExit(f"Entri hilang: {jumlah} dari {total}")
+        print(f"  {total} entri tersimpan dalam {durasi:.2f} detik, tanpa galat")
+
+        print("\nEviction berdasarkan ukuran")
+        batas = 64 * 1024
+        kecil = PenyimpananHasil(path_konkuren, maks_byte=batas)
+        kecil.simpan(kunci_hasil("pemicu", "Hijau (Default)", 5), {'persentase': 0})
+        statistik = kecil.statistik()
+        if statistik['total_byte'] > batas:
+            raise SystemExit(f"Batas terlampaui: {statistik}")
+        print(f"  tersisa {statistik['jumlah_entri']} entri, "
+              f"{statistik['total_byte'] / 1024:.1f} KB <= {batas / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
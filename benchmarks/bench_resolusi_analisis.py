@@ -0,0 +1,34 @@
+"""Benchmark mode resolusi analisis: percepatan dan drift persentase bercak
+
+Citra sintetis dari buat_citra_dummy diperbesar ke ukuran foto kamera
+(4000x3000), lalu dianalisis pada resolusi penuh dan beberapa resolusi
+analisis. Drift adalah selisih persentase_penyakit (poin persen).
+
+Jalankan dari root repo: python -m benchmarks.bench_resolusi_analisis
+"""
+import cv2
+import numpy as np
+
+from deteksi_daun import PILIHAN_WARNA_DASAR, buat_citra_dummy
+from deteksi_daun.pipeline import laporan_drift
+
+
+def main():
+    np.random.seed(0)
+    print(f"{'kondisi':>8} {'warna':>16} {'res':>5} {'penuh %':>8} {'analisis %':>10} "
+          f"{'drift':>7} {'tingkat':>7} {'speedup':>8}")
+    for kondisi in ("sehat", "ringan", "sedang", "parah"):
+        citra = cv2.resize(buat_citra_dummy(kondisi), (4000, 3000),
+                           interpolation=cv2.INTER_LINEAR)
+        for warna_dasar in PILIHAN_WARNA_DASAR:
+            for resolusi in (2048, 1024, 512):
+                d = laporan_drift(citra, warna_dasar, 5, resolusi)
+                print(f"{kondisi:>8} {warna_dasar[:16]:>16} {resolusi:>5} "
+                      f"{d['persentase_penuh']:>8.2f} {d['persentase_analisis']:>10.2f} "
+                      f"{d['drift_persentase']:>+7.2f} "
+                      f"{'sama' if d['tingkat_sama'] else 'beda':>7} "
+                      f"{d['percepatan']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark mask ringkas: memori per hasil, ukuran simpan per citra, dan tabel bercak
+
+Untuk beberapa resolusi dan kondisi daun dicatat:
+
+- memori kelima mask hasil (``binary``, ``morph``, ``edges``,
+  ``mask_green``, ``mask_disease``) sebagai array uint8 vs ``ringkas_hasil``,
+- ukuran simpan ``mask_green`` + ``mask_disease`` per citra: mentah, PNG
+  1-bit (format penyimpanan sebelumnya), dan ``MaskRingkas.ke_bytes``,
+- waktu meringkas/memulihkan dan waktu ``tabel_bercak`` (dengan poligon).
+
+Setiap mask dicek identik setelah dipulihkan, baik dari memori maupun dari
+bytes simpanan.
+
+Jalankan dari root repo: python -m benchmarks.bench_ringkas
+"""
+import cv2
+import numpy as np
+
+from benchmarks._util import ukur
+from deteksi_daun import buat_citra_dummy, proses_citra
+from deteksi_daun.cache import ukuran_objek
+from deteksi_daun.ringkas import (MASK_HASIL, MASK_PENYAKIT, MaskRingkas,
+                                  pulihkan_hasil, ringkas_hasil, tabel_bercak)
+
+RESOLUSI = [(1536, 2048), (3000, 4000)]
+KONDISI = ['sehat', 'ringan', 'parah']
+
+
+def semua_mask(hasil):
+    return ([hasil[k] for k in MASK_HASIL]
+            + [hasil['penyakit_info'][k] for k in MASK_PENYAKIT])
+
+
+def png_1bit(mask):
+    return cv2.imencode('.png', mask, [cv2.IMWRITE_PNG_BILEVEL, 1,
+                                       cv2.IMWRITE_PNG_COMPRESSION, 1])[1].tobytes()
+
+
+def main():
+    print("Memori 5 mask per hasil (uint8 -> ringkas) dan simpan mask_green + "
+          "mask_disease per citra (mentah / PNG 1-bit -> ringkas)")
+    print(f"{'citra':<10} {'kondisi':<7} {'memori':>19} {'simpan KB':>24} "
+          f"{'ringkas':>8} {'pulih':>6} {'bercak':>11}")
+    for ukuran in RESOLUSI:
+        for kondisi in KONDISI:
+            hasil = proses_citra(buat_citra_dummy(kondisi, seed=0, ukuran=ukuran),
+                                 "Hijau (Default)", 5)
+            t_ringkas, ringkas = ukur(ringkas_hasil, hasil)
+            t_pulih, pulih = ukur(pulihkan_hasil, ringkas)
+            if not all(np.array_equal(a, b) for a, b in zip(semua_mask(hasil), semua_mask(pulih))):
+                raise SystemExit(f"BEDA: {ukuran} {kondisi} (memori)")
+
+            disimpan = [hasil['penyakit_info'][k] for k in MASK_PENYAKIT]
+            blob = [MaskRingkas.dari_array(m).ke_bytes() for m in disimpan]
+            if not all(np.array_equal(MaskRingkas.dari_bytes(b).ke_array(), m)
+                       for b, m in zip(blob, disimpan)):
+                raise SystemExit(f"BEDA: {ukuran} {kondisi} (bytes)")
+
+            t_bercak, bercak = ukur(tabel_bercak, hasil['penyakit_info']['mask_disease'])
+            memori = ukuran_objek(semua_mask(hasil))
+            memori_ringkas = ukuran_objek(semua_mask(ringkas))
+            mentah = sum(m.nbytes for m in disimpan)
+            png = sum(len(png_1bit(m)) for m in disimpan)
+            baru = sum(len(b) for b in blob)
+            print(f"{ukuran[1]}x{ukuran[0]:<5} {kondisi:<7} "
+                  f"{memori / 2**20:5.1f}MB {memori_ringkas / 1024:5.1f}KB "
+                  f"({memori / memori_ringkas:4.0f}x) "
+                  f"{mentah / 1024:6.0f} / {png / 1024:4.1f} -> {baru / 1024:4.1f} "
+                  f"{t_ringkas * 1000:6.1f}ms {t_pulih * 1000:4.1f}ms "
+                  f"{len(bercak):>2} {t_bercak * 1000:5.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark mode tekstur: Gaussian (mode Custom) vs varians lokal (MODE_VARIANS)
+
+Bagian pertama membandingkan tahap tekstur lengkap kedua mode (mask daun +
+mask bercak, termasuk ambang adaptif MODE_VARIANS) pada beberapa resolusi.
+Bagian kedua membandingkan mesin teksturnya saja untuk beberapa ukuran
+jendela: absdiff terhadap GaussianBlur (biaya naik dengan ukuran kernel),
+varians lewat integral image eksplisit (cv2.integral2 + empat sudut), dan
+varians lewat jumlah berjalan boxFilter/sqrBoxFilter yang dipakai
+``simpangan_lokal``. Kedua varians dicek sama.
+
+Jalankan dari root repo: python -m benchmarks.bench_tekstur_varians
+"""
+import cv2
+import numpy as np
+
+from benchmarks._util import ukur
+from deteksi_daun import buat_citra_dummy
+from deteksi_daun.pipeline import _mask_tekstur, mask_varians_lokal
+
+RESOLUSI = [(768, 1024), (1536, 2048), (3000, 4000)]
+JENDELA = [7, 21, 51, 101]
+
+
+def tekstur_gaussian(gray, jendela):
+    return cv2.absdiff(gray, cv2.GaussianBlur(gray, (jendela, jendela), 0))
+
+
+def varians_integral(gray, jendela):
+    r, n = jendela // 2, jendela * jendela
+    pad = cv2.copyMakeBorder(gray, r, r, r, r, cv2.BORDER_REFLECT_101)
+    jumlah, kuadrat = cv2.integral2(pad, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    k = jendela
+    s = jumlah[k:, k:] - jumlah[:-k, k:] - jumlah[k:, :-k] + jumlah[:-k, :-k]
+    q = kuadrat[k:, k:] - kuadrat[:-k, k:] - kuadrat[k:, :-k] + kuadrat[:-k, :-k]
+    return q / n - (s / n) ** 2
+
+
+def varians_box(gray, jendela):
+    rata = cv2.boxFilter(gray, cv2.CV_32F, (jendela, jendela))
+    varians = cv2.sqrBoxFilter(gray, cv2.CV_32F, (jendela, jendela))
+    cv2.multiply(rata, rata, dst=rata)
+    return cv2.subtract(varians, rata, dst=varians)
+
+
+def main():
+    print("Tahap tekstur lengkap (ms)")
+    print(f"{'resolusi':<11} {'gaussian':>9} {'varians':>9} {'rasio':>7} {'bercak g/v':>14}")
+    for ukuran in RESOLUSI:
+        citra = buat_citra_dummy("parah", seed=0, ukuran=ukuran)
+        t_g, _ = ukur(_mask_tekstur, citra)
+        t_v, _ = ukur(mask_varians_lokal, citra)
+        p_g = [np.mean(m > 0) for m in _mask_tekstur(citra)]
+        p_v = [np.mean(m > 0) for m in mask_varians_lokal(citra)]
+        print(f"{ukuran[1]}x{ukuran[0]:<6} {t_g * 1000:>9.1f} {t_v * 1000:>9.1f} "
+              f"{t_g / t_v:>6.2f}x {p_g[1] / p_g[0]:>6.1%} / {p_v[1] / p_v[0]:.1%}")
+
+    citra = buat_citra_dummy("parah", seed=0, ukuran=RESOLUSI[-1])
+    gray = cv2.cvtColor(citra, cv2.COLOR_RGB2GRAY)
+    print(f"\nMesin tekstur per ukuran jendela, citra {gray.shape[1]}x{gray.shape[0]} (ms)")
+    print(f"{'jendela':<8} {'gaussian':>9} {'integral2':>10} {'box':>8} {'beda maks':>10}")
+    for jendela in JENDELA:
+        t_g, _ = ukur(tekstur_gaussian, gray, jendela)
+        t_i, _ = ukur(varians_integral, gray, jendela)
+        t_b, _ = ukur(varians_box, gray, jendela)
+        beda = float(np.abs(varians_integral(gray, jendela) - varians_box(gray, jendela)).max())
+        if beda > 0.05:
+            raise SystemExit(f"BEDA: varians integral vs box, jendela {jendela}: {beda}")
+        print(f"{jendela:<8} {t_g * 1000:>9.1f} {t_i * 1000:>10.1f} {t_b * 1000:>8.1f} "
+              f"{beda:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark & cek kesesuaian analisis per ubin terhadap citra penuh
+
+Citra sintetis dengan banyak bercak (sebagian terpotong sambungan ubin)
+dianalisis utuh dengan deteksi_bercak_penyakit dan per ubin dengan
+analisis_ubin pada beberapa ukuran ubin. Luas daun, luas bercak, dan mask
+bercak (pratinjau resolusi penuh) harus identik untuk setiap warna dasar.
+Dilaporkan juga waktu dan puncak memori Python (tracemalloc) keduanya.
+
+Jalankan dari root repo: python -m benchmarks.bench_ubin
+"""
+import numpy as np
+
+from benchmarks._util import ukur_memori
+from deteksi_daun import PILIHAN_WARNA_DASAR, buat_citra_dummy
+from deteksi_daun.pipeline import MODE_OTOMATIS, deteksi_bercak_penyakit
+from deteksi_daun.ubin import analisis_ubin
+
+
+def main():
+    kecil = buat_citra_dummy("parah", seed=0, ukuran=(900, 1200), jumlah_bercak=150,
+                             ukuran_bercak=(3, 60))
+    print("Kesesuaian per ubin dengan citra penuh")
+    # Mode Otomatis butuh histogram seluruh daun, tidak didukung per ubin
+    for warna_dasar in [w for w in PILIHAN_WARNA_DASAR if w != MODE_OTOMATIS]:
+        for sensitivitas in (1, 5, 10):
+            acuan = deteksi_bercak_penyakit(kecil, warna_dasar, sensitivitas)
+            for ukuran_ubin in (128, 500):
+                hasil = analisis_ubin(kecil, warna_dasar, sensitivitas, ukuran_ubin,
+                                      resolusi_pratinjau=max(kecil.shape))
+                if (hasil['luas_daun'] != acuan['luas_daun']
+                        or hasil['luas_bercak'] != acuan['luas_bercak']
+                        or not np.array_equal(hasil['mask_disease'], acuan['mask_disease'])):
+                    raise SystemExit(f"BEDA: {warna_dasar} / sensitivitas {sensitivitas} "
+                                     f"/ ubin {ukuran_ubin}")
+        print(f"  {warna_dasar:<18} identik")
+
+    besar = buat_citra_dummy("parah", seed=0, ukuran=(8000, 8000))
+    t_penuh, m_penuh, _ = ukur_memori(deteksi_bercak_penyakit, besar)
+    print(f"\nCitra {besar.shape[1]}x{besar.shape[0]}")
+    print(f"{'mode':<14} {'detik':>7} {'puncak MB':>10}")
+    print(f"{'penuh':<14} {t_penuh:>7.2f} {m_penuh:>10.0f}")
+    for ukuran_ubin in (1024, 2048):
+        t_ubin, m_ubin, _ = ukur_memori(analisis_ubin, besar, ukuran_ubin=ukuran_ubin)
+        print(f"{f'ubin {ukuran_ubin}':<14} {t_ubin:>7.2f} {m_ubin:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
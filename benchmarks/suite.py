@@ -0,0 +1,161 @@
+"""Suite benchmark reproducible untuk pipeline deteksi penyakit daun
+
+Workload dibuat dari buat_citra_dummy dengan seed tetap (semua kondisi
+sehat/ringan/sedang/parah), lalu proses_citra dijalankan untuk setiap
+warna_dasar dan setiap tingkat sensitivitas 1-10. Dilaporkan persentil
+latensi (p50/p90/p99), citra per detik, dan waktu per tahap.
+
+Simpan baseline, lalu bandingkan run berikutnya:
+
+    python -m benchmarks.suite --simpan-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --toleransi 0.25
+
+Run gagal (exit code 1) jika p50 suatu grup atau tahap melambat lebih dari
+toleransi dibanding baseline. Baseline bergantung pada mesin, jadi buat
+ulang saat berpindah host.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from deteksi_daun import PILIHAN_WARNA_DASAR, buat_batch_dummy, proses_citra
+from deteksi_daun.profil import rekam_profil
+
+KONDISI = ("sehat", "ringan", "sedang", "parah")
+SENSITIVITAS = range(1, 11)
+
+# Tahap di bawah batas ini terlalu bising untuk dijadikan gerbang regresi
+MIN_DETIK_GERBANG = 0.001
+
+
+def persentil(nilai):
+    arr = np.asarray(nilai, dtype=np.float64)
+    return {
+        'p50': float(np.percentile(arr, 50)),
+        'p90': float(np.percentile(arr, 90)),
+        'p99': float(np.percentile(arr, 99)),
+        'rata2': float(arr.mean()),
+        'n': int(arr.size),
+    }
+
+
+def buat_workload(seed, ukuran):
+    """Satu citra per kondisi, deterministik untuk seed dan ukuran yang sama"""
+    batch = buat_batch_dummy(len(KONDISI), list(KONDISI), seed=seed, ukuran=ukuran)
+    return dict(zip(KONDISI, batch))
+
+
+def jalankan_suite(seed=0, ukuran=(768, 1024), ulang=3, pemanasan=1):
+    """Jalankan seluruh matriks workload dan kembalikan laporan dictionary"""
+    workload = buat_workload(seed, ukuran)
+    latensi_grup = {}
+    latensi_tahap = {}
+    semua = []
+
+    for citra in list(workload.values())[:pemanasan]:
+        proses_citra(citra)
+
+    mulai_total = time.perf_counter()
+    for warna_dasar in PILIHAN_WARNA_DASAR:
+        for sensitivitas in SENSITIVITAS:
+            grup = f"{warna_dasar}|{sensitivitas}"
+            for _ in range(ulang):
+                for citra in workload.values():
+                    with rekam_profil(ukur_memori=False) as profil:
+                        proses_citra(citra, warna_dasar, sensitivitas)
+                    latensi_grup.setdefault(grup, []).append(profil.total_detik)
+                    semua.append(profil.total_detik)
+                    for nama, detik in profil.ringkasan().items():
+                        latensi_tahap.setdefault(nama, []).append(detik)
+    durasi_total = time.perf_counter() - mulai_total
+
+    return {
+        'konfigurasi': {
+            'seed': seed, 'ukuran': list(ukuran), 'ulang': ulang,
+            'opencv': cv2.__version__, 'numpy': np.__version__,
+            'python': platform.python_version(), 'platform': platform.platform(),
+        },
+        'total': dict(persentil(semua),
+                      citra_per_detik=len(semua) / durasi_total),
+        'grup': {grup: persentil(nilai) for grup, nilai in latensi_grup.items()},
+        'tahap': {nama: persentil(nilai) for nama, nilai in latensi_tahap.items()},
+    }
+
+
+def bandingkan(laporan, baseline, toleransi):
+    """Daftar regresi: (nama, p50 baseline, p50 sekarang) yang melewati toleransi"""
+    regresi = []
+    for bagian in ('grup', 'tahap'):
+        for nama, acuan in baseline.get(bagian, {}).items():
+            sekarang = laporan[bagian].get(nama)
+            if sekarang is None or acuan['p50'] < MIN_DETIK_GERBANG:
+                continue
+            if sekarang['p50'] > acuan['p50'] * (1 + toleransi):
+                regresi.append((f"{bagian}:{nama}", acuan['p50'], sekarang['p50']))
+    acuan = baseline['total']['citra_per_detik']
+    if laporan['total']['citra_per_detik'] < acuan / (1 + toleransi):
+        regresi.append(("total:citra_per_detik", acuan,
+                        laporan['total']['citra_per_detik']))
+    return regresi
+
+
+def cetak_laporan(laporan):
+    total = laporan['total']
+    print(f"Total: {total['n']} run, {total['citra_per_detik']:.1f} citra/detik, "
+          f"p50 {total['p50'] * 1000:.1f} ms, p90 {total['p90'] * 1000:.1f} ms, "
+          f"p99 {total['p99'] * 1000:.1f} ms")
+    print(f"\n{'grup':<22} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'citra/s':>8}")
+    for grup, p in laporan['grup'].items():
+        print(f"{grup:<22} {p['p50'] * 1000:>8.1f} {p['p90'] * 1000:>8.1f} "
+              f"{p['p99'] * 1000:>8.1f} {1 / p['rata2']:>8.1f}")
+    print(f"\n{'tahap':<22} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'n':>6}")
+    for nama, p in sorted(laporan['tahap'].items(), key=lambda x: -x[1]['p50']):
+        print(f"{nama:<22} {p['p50'] * 1000:>8.2f} {p['p90'] * 1000:>8.2f} "
+              f"{p['p99'] * 1000:>8.2f} {p['n']:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ukuran", default="768x1024", help="TINGGIxLEBAR citra")
+    parser.add_argument("--ulang", type=int, default=3,
+                        help="Pengulangan per kombinasi parameter")
+    parser.add_argument("--json", metavar="PATH", help="Simpan laporan lengkap (JSON)")
+    parser.add_argument("--simpan-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--toleransi", type=float, default=0.25,
+                        help="Perlambatan maksimum relatif terhadap baseline "
+                             "(default: %(default)s = 25%%)")
+    args = parser.parse_args(argv)
+
+    h, w = (int(v) for v in args.ukuran.lower().split("x"))
+    laporan = jalankan_suite(args.seed, (h, w), args.ulang)
+    cetak_laporan(laporan)
+
+    for path in (args.json, args.simpan_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(laporan, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regresi = bandingkan(laporan, baseline, args.toleransi)
+        if regresi:
+            print(f"\nREGRESI (toleransi {args.toleransi:.0%}):")
+            for nama, lama, baru in regresi:
+                print(f"  {nama}: {lama * 1000:.2f} -> {baru * 1000:.2f}"
+                      if not nama.startswith("total") else
+                      f"  {nama}: {lama:.1f} -> {baru:.1f}")
+            return 1
+        print(f"\nTidak ada regresi terhadap baseline (toleransi {args.toleransi:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
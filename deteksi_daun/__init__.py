@@ -0,0 +1,42 @@
+"""Paket pipeline deteksi penyakit daun tanpa ketergantungan UI.
+
+Modul ini aman diimpor dari worker, skrip batch, maupun benchmark: tidak ada
+efek samping saat import dan tidak membutuhkan Streamlit.
+"""
+from .cache import AnalisisCache, CacheLRU, hash_konten
+from .dummy import buat_batch_dummy, buat_citra_dummy
+from .eksekusi import BACKEND_EKSEKUSI, atur_backend, pakai_backend
+from .penyimpanan import PATH_PENYIMPANAN, PenyimpananHasil
+from .pipeline import (KELUARAN_CITRA, PILIHAN_WARNA_DASAR, VERSI_PIPELINE,
+                       deteksi_bercak_penyakit, filter_komponen, laporan_drift,
+                       proses_citra, segmentasi_daun)
+from .ringkas import MaskRingkas, pulihkan_hasil, ringkas_hasil, tabel_bercak
+from .tahapan import TAHAPAN_PIPELINE, PipelineBertahap, Tahap
+
+__all__ = [
+    "AnalisisCache",
+    "BACKEND_EKSEKUSI",
+    "CacheLRU",
+    "KELUARAN_CITRA",
+    "MaskRingkas",
+    "PATH_PENYIMPANAN",
+    "PILIHAN_WARNA_DASAR",
+    "PenyimpananHasil",
+    "PipelineBertahap",
+    "TAHAPAN_PIPELINE",
+    "Tahap",
+    "VERSI_PIPELINE",
+    "atur_backend",
+    "buat_batch_dummy",
+    "buat_citra_dummy",
+    "deteksi_bercak_penyakit",
+    "filter_komponen",
+    "hash_konten",
+    "laporan_drift",
+    "pakai_backend",
+    "proses_citra",
+    "pulihkan_hasil",
+    "ringkas_hasil",
+    "segmentasi_daun",
+    "tabel_bercak",
+]
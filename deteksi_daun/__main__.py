@@ -0,0 +1,207 @@
+"""Entry point command-line: python -m deteksi_daun <perintah> ..."""
+import argparse
+import json
+import sys
+
+from .eksekusi import BACKEND_EKSEKUSI, atur_backend
+from .penyimpanan import PATH_PENYIMPANAN
+from .pipeline import MODE_OTOMATIS, PILIHAN_WARNA_DASAR
+
+
+def _bilangan_positif(teks):
+    try:
+        nilai = int(teks)
+    except ValueError:
+        nilai = None
+    if nilai is None or nilai <= 0:
+        raise argparse.ArgumentTypeError(f"harus bilangan bulat > 0, bukan {teks!r}")
+    return nilai
+
+
+def _tambah_argumen_kalibrasi(parser, dengan_resolusi=True, pilihan_warna=PILIHAN_WARNA_DASAR):
+    parser.add_argument("--warna-dasar", default=pilihan_warna[0],
+                        choices=pilihan_warna,
+                        help="Kalibrasi warna dasar daun (default: %(default)s)")
+    parser.add_argument("--sensitivitas", type=int, default=5,
+                        choices=range(1, 11), metavar="1-10",
+                        help="Sensitivitas deteksi 1-10 (default: %(default)s)")
+    if not dengan_resolusi:
+        return
+    parser.add_argument("--resolusi-analisis", type=_bilangan_positif, default=None, metavar="PX",
+                        help="Analisis pada sisi terpanjang PX piksel "
+                             "(default: resolusi asli)")
+
+
+def _perintah_batch(args):
+    from .batch import jalankan_batch, kumpulkan_berkas
+
+    bentuk_mentah = (tuple(int(v) for v in args.bentuk_mentah.lower().split("x"))
+                     if args.bentuk_mentah else None)
+    berkas = kumpulkan_berkas(args.sumber, bentuk_mentah)
+    if not berkas:
+        print("Tidak ada berkas citra yang ditemukan", file=sys.stderr)
+        return 1
+    baris = jalankan_batch(berkas, args.keluaran, args.warna_dasar,
+                           args.sensitivitas, args.proses, args.overlay,
+                           args.resolusi_analisis, args.profil, args.metode_warna,
+                           bentuk_mentah, args.per_daun, args.penyimpanan,
+                           args.simpan_mask, args.bercak)
+    return 1 if any(b['galat'] for b in baris) else 0
+
+
+def _perintah_stream(args):
+    from .stream import jalankan_stream
+
+    sumber = args.sumber[0] if len(args.sumber) == 1 else args.sumber
+    jalankan_stream(sumber, args.keluaran, args.warna_dasar, args.sensitivitas,
+                    args.resolusi_analisis, args.metode_warna, fps=args.fps,
+                    waktu_nyata=not args.semua_frame,
+                    ambang_perubahan=args.ambang_perubahan, maks_frame=args.maks_frame)
+    return 0
+
+
+def _perintah_ubin(args):
+    import cv2
+
+    from .ubin import analisis_ubin
+
+    hasil = analisis_ubin(args.sumber, args.warna_dasar, args.sensitivitas,
+                          ukuran_ubin=args.ukuran_ubin, jumlah_worker=args.proses,
+                          metode_warna=args.metode_warna,
+                          resolusi_pratinjau=args.resolusi_pratinjau if args.pratinjau else None)
+    pratinjau = hasil.pop('mask_disease')
+    if args.pratinjau:
+        cv2.imwrite(args.pratinjau, pratinjau)
+    print(json.dumps(hasil, indent=2))
+    return 0
+
+
+def _perintah_server(args):
+    from .server import jalankan_server
+
+    jalankan_server(args.host, args.port, jumlah_worker=args.proses,
+                    antrian_maks=args.antrian_maks, batch_maks=args.batch_maks,
+                    batch_tunggu=args.batch_tunggu_ms / 1000.0)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m deteksi_daun",
+        description="Deteksi penyakit daun tanpa UI Streamlit")
+    parser.add_argument("--backend", choices=BACKEND_EKSEKUSI, default=None,
+                        help="Backend tahap per piksel: numpy, umat (OpenCV "
+                             "transparent API/OpenCL), atau thread (pita baris "
+                             "paralel); default dari DETEKSI_DAUN_BACKEND atau numpy")
+    parser.add_argument("--thread-backend", type=int, default=None, metavar="N",
+                        help="Jumlah pita paralel backend thread, sekaligus memilih "
+                             "backend thread (default: jumlah core)")
+    subparsers = parser.add_subparsers(dest="perintah", required=True)
+
+    batch = subparsers.add_parser(
+        "batch", help="Proses direktori/glob citra daun secara paralel")
+    batch.add_argument("sumber", nargs="+",
+                       help="Direktori, pola glob, atau berkas citra")
+    batch.add_argument("-o", "--keluaran", default="hasil_deteksi.csv",
+                       help="Berkas hasil .csv atau .parquet (default: %(default)s)")
+    batch.add_argument("-j", "--proses", type=int, default=None,
+                       help="Jumlah proses worker (default: jumlah core)")
+    batch.add_argument("--overlay", metavar="DIR", default=None,
+                       help="Simpan citra overlay hasil ke direktori ini")
+    batch.add_argument("--profil", metavar="JSONL", default=None,
+                       help="Tulis profil waktu, memori & byte disalin per tahap "
+                            "tiap citra (JSON Lines)")
+    batch.add_argument("--per-daun", metavar="PATH", default=None,
+                       help="Tulis statistik bercak setiap daun (semua kontur, "
+                            "bukan hanya yang terbesar) ke .csv/.parquet")
+    batch.add_argument("--bentuk-mentah", metavar="TxLxC", default=None,
+                       help="Bentuk frame dump .raw (uint8), mis. 3000x4000x3; "
+                            "dump .npy dan .raw dibaca lewat memory map")
+    batch.add_argument("--metode-warna", choices=["opencv", "lut"], default="opencv",
+                       help="Klasifikasi warna lewat HSV/LAB OpenCV atau lookup "
+                            "table RGB (hasil identik; default: %(default)s)")
+    batch.add_argument("--penyimpanan", metavar="SQLITE", nargs="?", default=None,
+                       const=PATH_PENYIMPANAN,
+                       help="Ambil/simpan hasil di penyimpanan disk bersama app; citra "
+                            "yang sudah pernah dianalisis dilewati (tanpa PATH: "
+                            f"{PATH_PENYIMPANAN})")
+    batch.add_argument("--simpan-mask", action="store_true",
+                       help="Ikut simpan mask daun & bercak (run-length) di penyimpanan")
+    batch.add_argument("--bercak", metavar="PATH", default=None,
+                       help="Tulis setiap area bercak (bbox, luas, pusat, poligon "
+                            "JSON) ke .csv/.parquet, satu baris per bercak")
+    _tambah_argumen_kalibrasi(batch)
+    batch.set_defaults(fungsi=_perintah_batch)
+
+    stream = subparsers.add_parser(
+        "stream", help="Analisis frame dari video, kamera, atau urutan citra")
+    stream.add_argument("sumber", nargs="+",
+                        help="Berkas video, indeks kamera (mis. 0), atau "
+                             "direktori/glob citra berurutan")
+    stream.add_argument("-o", "--keluaran", default=None,
+                        help="Tulis hasil per frame ke .csv atau .parquet")
+    stream.add_argument("--fps", type=float, default=None,
+                        help="Laju sumber; default dari metadata video, urutan "
+                             "citra tanpa --fps diproses semua")
+    stream.add_argument("--semua-frame", action="store_true",
+                        help="Proses setiap frame meski analisis tertinggal")
+    stream.add_argument("--ambang-perubahan", type=float, default=0.5,
+                        help="Selisih rata-rata thumbnail grayscale di bawah nilai "
+                             "ini memakai ulang kontur daun frame sebelumnya; "
+                             "0 = selalu segmentasi ulang (default: %(default)s)")
+    stream.add_argument("--maks-frame", type=int, default=None,
+                        help="Berhenti setelah sejumlah frame diproses")
+    stream.add_argument("--metode-warna", choices=["opencv", "lut"], default="opencv",
+                        help="Klasifikasi warna lewat HSV/LAB OpenCV atau lookup "
+                             "table RGB (default: %(default)s)")
+    _tambah_argumen_kalibrasi(stream)
+    stream.set_defaults(fungsi=_perintah_stream)
+
+    ubin = subparsers.add_parser(
+        "ubin", help="Analisis citra sangat besar (mis. ortomosaik) per ubin")
+    ubin.add_argument("sumber", help="Berkas .npy, GeoTIFF/raster (perlu rasterio "
+                                     "untuk baca per jendela), atau citra biasa")
+    ubin.add_argument("--ukuran-ubin", type=int, default=2048,
+                      help="Sisi ubin dalam piksel (default: %(default)s)")
+    ubin.add_argument("-j", "--proses", type=int, default=None,
+                      help="Jumlah thread ubin paralel (default: jumlah core)")
+    ubin.add_argument("--pratinjau", metavar="PNG", default=None,
+                      help="Simpan mask bercak yang diperkecil ke berkas ini")
+    ubin.add_argument("--resolusi-pratinjau", type=int, default=2048, metavar="PX",
+                      help="Sisi terpanjang pratinjau (default: %(default)s)")
+    ubin.add_argument("--metode-warna", choices=["opencv", "lut"], default="opencv",
+                      help="Klasifikasi warna lewat HSV/LAB OpenCV atau lookup "
+                           "table RGB (default: %(default)s)")
+    # Kalibrasi otomatis butuh segmentasi daun seluruh citra, tidak tersedia per ubin
+    _tambah_argumen_kalibrasi(ubin, dengan_resolusi=False, pilihan_warna=[
+        w for w in PILIHAN_WARNA_DASAR if w != MODE_OTOMATIS])
+    ubin.set_defaults(fungsi=_perintah_ubin)
+
+    server = subparsers.add_parser(
+        "server", help="Jalankan layanan HTTP analisis daun lokal")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8080)
+    server.add_argument("-j", "--proses", type=int, default=2,
+                        help="Jumlah proses worker (default: %(default)s)")
+    server.add_argument("--antrian-maks", type=int, default=32,
+                        help="Request menunggu maksimum sebelum dibalas 503 "
+                             "(default: %(default)s)")
+    server.add_argument("--batch-maks", type=int, default=4,
+                        help="Request maksimum per batch ke worker (default: %(default)s)")
+    server.add_argument("--batch-tunggu-ms", type=float, default=5.0,
+                        help="Waktu tunggu pengumpulan batch (default: %(default)s ms)")
+    server.set_defaults(fungsi=_perintah_server)
+
+    args = parser.parse_args(argv)
+    if args.thread_backend is not None:
+        # --thread-backend saja berarti backend thread
+        if args.backend not in (None, "thread"):
+            parser.error("--thread-backend hanya berlaku untuk --backend thread")
+        atur_backend("thread", args.thread_backend)
+    elif args.backend is not None:
+        atur_backend(args.backend)
+    return args.fungsi(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Pemrosesan batch direktori citra daun tanpa UI, paralel di process pool."""
+import contextlib
+import csv
+import functools
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from .cache import decode_citra, hash_konten
+from .eksekusi import atur_backend, backend_aktif
+from .mentah import (EKSTENSI_MENTAH, PEMISAH_FRAME, adalah_frame_mentah,
+                     baca_frame_mentah, daftar_frame)
+from .penyimpanan import (PenyimpananHasil, hasil_dari_metrik, kunci_hasil,
+                          metrik_dari_hasil)
+from .pipeline import perkecil_citra, proses_citra, skalakan_hasil
+from .profil import catat_salinan, rekam_profil
+from .ringkas import tabel_bercak
+
+EKSTENSI_CITRA = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+KOLOM_HASIL = ['berkas', 'tingkat', 'persentase_penyakit', 'luas_daun',
+               'luas_bercak', 'galat']
+KOLOM_PER_DAUN = ['berkas', 'daun', 'x', 'y', 'lebar', 'tinggi', 'luas_kontur',
+                  'luas_sehat', 'luas_bercak', 'persentase_penyakit', 'tingkat']
+KOLOM_BERCAK = ['berkas', 'bercak', 'x', 'y', 'lebar', 'tinggi', 'luas', 'pusat_x',
+                'pusat_y', 'poligon']
+
+
+def kumpulkan_berkas(sumber, bentuk_mentah=None):
+    """Kumpulkan path citra dari daftar direktori, pola glob, atau berkas.
+
+    Dump frame .npy/.raw diuraikan menjadi satu entri "path#i" per frame
+    (berkas .raw hanya jika ``bentuk_mentah`` diberikan).
+    """
+    hasil = []
+    for item in sumber:
+        if os.path.isdir(item):
+            kandidat = sorted(os.path.join(item, nama) for nama in os.listdir(item))
+        elif glob.has_magic(item):
+            kandidat = sorted(glob.glob(item, recursive=True))
+        else:
+            kandidat = [item]
+        for path in kandidat:
+            if not os.path.isfile(path):
+                continue
+            if path.lower().endswith(EKSTENSI_CITRA):
+                hasil.append(path)
+            elif path.lower().endswith(EKSTENSI_MENTAH) and (
+                    bentuk_mentah is not None or path.lower().endswith('.npy')):
+                hasil.extend(daftar_frame(path, bentuk_mentah))
+    return hasil
+
+
+def baca_citra(path, bentuk_mentah=None):
+    """Baca citra dari disk dengan cara yang sama seperti upload di app.
+
+    Frame dump mentah ("path#i") dikembalikan sebagai view read-only ke
+    memory map, tanpa decode dan tanpa salinan.
+    """
+    if adalah_frame_mentah(path):
+        return baca_frame_mentah(path, bentuk_mentah)
+    from PIL import Image
+    with Image.open(path) as image:
+        citra = np.array(image)
+    catat_salinan('decode', citra.nbytes)
+    return citra
+
+
+def hash_berkas(path, bentuk_mentah=None):
+    """(hash konten, data) untuk berkas citra atau frame dump mentah.
+
+    Berkas citra di-hash dari bytes berkasnya, sama seperti upload di app,
+    dan ``data`` berisi bytes itu. Frame mentah di-hash langsung dari memory
+    map dan ``data`` adalah view frame tersebut.
+    """
+    if adalah_frame_mentah(path):
+        frame = baca_frame_mentah(path, bentuk_mentah)
+        h = hashlib.sha256(repr(frame.shape).encode())
+        h.update(frame)
+        return h.hexdigest(), frame
+    with open(path, 'rb') as f:
+        data = f.read()
+    return hash_konten(data), data
+
+
+@functools.lru_cache(maxsize=4)
+def _penyimpanan(path):
+    # Satu koneksi penyimpanan per proses worker
+    return PenyimpananHasil(path)
+
+
+def _proses_tersimpan(path, warna_dasar, sensitivitas, keluaran, resolusi_analisis,
+                      metode_warna, bentuk_mentah, per_daun, path_penyimpanan,
+                      simpan_mask, bercak):
+    # Cek penyimpanan dulu; jika tidak ada, analisis pada resolusi analisis,
+    # simpan metriknya, lalu skalakan seperti proses_citra
+    penyimpanan = _penyimpanan(path_penyimpanan)
+    hash_citra, data = hash_berkas(path, bentuk_mentah)
+    kunci = kunci_hasil(hash_citra, warna_dasar, sensitivitas, resolusi_analisis)
+    if not keluaran:
+        # Tabel bercak dibuat dari mask, jadi entri tanpa mask dianalisis ulang
+        tersimpan = penyimpanan.ambil(kunci, dengan_mask=bercak)
+        if tersimpan is not None and (not per_daun or 'per_daun' in tersimpan):
+            return hasil_dari_metrik(tersimpan)
+
+    # Bytes berkas sudah dibaca untuk hash; decode dari situ, bukan baca ulang
+    img_array = data if isinstance(data, np.ndarray) else decode_citra(data)
+    citra, skala = perkecil_citra(img_array, resolusi_analisis)
+    hasil = proses_citra(citra, warna_dasar, sensitivitas, keluaran=keluaran,
+                         metode_warna=metode_warna, per_daun=per_daun)
+    info = hasil['penyakit_info']
+    simpan_mask = simpan_mask or bercak
+    penyimpanan.simpan(kunci, metrik_dari_hasil(hasil, img_array.shape),
+                       info['mask_green'] if simpan_mask else None,
+                       info['mask_disease'] if simpan_mask else None)
+    if skala == 1.0:
+        return hasil
+    return skalakan_hasil(hasil, img_array.shape)
+
+
+def _init_worker(backend=("numpy", None)):
+    # Satu thread OpenCV per proses agar tidak oversubscribe core
+    cv2.setNumThreads(1)
+    # Backend eksekusi proses induk (juga untuk start method spawn)
+    atur_backend(*backend)
+
+
+def proses_berkas(path, warna_dasar="Hijau (Default)", sensitivitas=5,
+                  dir_overlay=None, resolusi_analisis=None, profil=False,
+                  metode_warna="opencv", bentuk_mentah=None, per_daun=False,
+                  path_penyimpanan=None, simpan_mask=False, bercak=False):
+    """Proses satu berkas citra dan kembalikan satu baris hasil.
+
+    Dengan ``profil=True`` baris juga berisi ``'_profil'``: rekaman waktu,
+    memori, dan byte yang disalin per tahap dalam bentuk dictionary. Dengan
+    ``per_daun=True`` baris berisi ``'_per_daun'``: satu baris per daun.
+    Dengan ``bercak=True`` baris berisi ``'_bercak'``: satu baris per area
+    bercak (lihat ``tabel_bercak``). Dengan ``path_penyimpanan`` hasil diambil dari/disimpan ke
+    ``PenyimpananHasil`` (berkas yang perlu overlay tetap dianalisis).
+    """
+    baris = {'berkas': path, 'tingkat': None, 'persentase_penyakit': None,
+             'luas_daun': None, 'luas_bercak': None, 'galat': None}
+    konteks = (rekam_profil(berkas=path, warna_dasar=warna_dasar,
+                            sensitivitas=sensitivitas,
+                            resolusi_analisis=resolusi_analisis)
+               if profil else contextlib.nullcontext())
+    try:
+        with konteks as rekaman:
+            # Hanya angka yang dibutuhkan, plus overlay jika akan disimpan
+            keluaran = () if dir_overlay is None else ('result',)
+            if path_penyimpanan is not None:
+                hasil = _proses_tersimpan(path, warna_dasar, sensitivitas, keluaran,
+                                          resolusi_analisis, metode_warna, bentuk_mentah,
+                                          per_daun, path_penyimpanan, simpan_mask,
+                                          bercak)
+            else:
+                hasil = proses_citra(baca_citra(path, bentuk_mentah), warna_dasar,
+                                     sensitivitas, keluaran=keluaran,
+                                     resolusi_analisis=resolusi_analisis,
+                                     metode_warna=metode_warna, per_daun=per_daun)
+    except Exception as e:  # Satu berkas rusak tidak boleh menghentikan batch
+        baris['galat'] = f"{type(e).__name__}: {e}"
+        return baris
+    if rekaman is not None:
+        baris['_profil'] = rekaman.ke_dict()
+
+    info = hasil['penyakit_info']
+    baris.update({
+        'tingkat': info['tingkat'],
+        'persentase_penyakit': float(info['persentase_penyakit']),
+        'luas_daun': float(hasil['luas_daun']),
+        'luas_bercak': int(info['luas_bercak']),
+    })
+    if per_daun:
+        baris['_per_daun'] = [{
+            'berkas': path, 'daun': d['daun'],
+            'x': d['bbox'][0], 'y': d['bbox'][1], 'lebar': d['bbox'][2], 'tinggi': d['bbox'][3],
+            'luas_kontur': float(d['luas_kontur']), 'luas_sehat': d['luas_sehat'],
+            'luas_bercak': d['luas_bercak'],
+            'persentase_penyakit': float(d['persentase_penyakit']), 'tingkat': d['tingkat'],
+        } for d in hasil['per_daun']]
+    if bercak:
+        baris['_bercak'] = [{
+            'berkas': path, 'bercak': b['bercak'],
+            'x': b['bbox'][0], 'y': b['bbox'][1], 'lebar': b['bbox'][2], 'tinggi': b['bbox'][3],
+            'luas': b['luas'], 'pusat_x': b['pusat'][0], 'pusat_y': b['pusat'][1],
+            'poligon': json.dumps(b['poligon'], separators=(',', ':')),
+        } for b in tabel_bercak(info['mask_disease'], skala=hasil.get('skala_analisis', 1.0))]
+    if dir_overlay is not None:
+        nama = os.path.splitext(os.path.basename(path))[0]
+        if adalah_frame_mentah(path):  # dump.npy#12 -> dump_12_overlay.png
+            dump, _, indeks = path.rpartition(PEMISAH_FRAME)
+            nama = f"{os.path.splitext(os.path.basename(dump))[0]}_{indeks}"
+        nama += "_overlay.png"
+        cv2.imwrite(os.path.join(dir_overlay, nama),
+                    cv2.cvtColor(hasil['result'], cv2.COLOR_RGB2BGR))
+    return baris
+
+
+def tulis_hasil(baris, path_keluaran, kolom=KOLOM_HASIL):
+    """Tulis hasil ke CSV, atau Parquet jika ekstensi keluaran .parquet"""
+    if path_keluaran.lower().endswith('.parquet'):
+        import pandas as pd
+        pd.DataFrame(baris, columns=kolom).to_parquet(path_keluaran, index=False)
+        return
+    with open(path_keluaran, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=kolom, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(baris)
+
+
+def jalankan_batch(berkas, path_keluaran, warna_dasar="Hijau (Default)",
+                   sensitivitas=5, jumlah_proses=None, dir_overlay=None,
+                   resolusi_analisis=None, path_profil=None,
+                   metode_warna="opencv", bentuk_mentah=None, path_per_daun=None,
+                   path_penyimpanan=None, simpan_mask=False, path_bercak=None):
+    """Proses semua berkas di process pool dan tulis hasilnya; kembalikan daftar baris.
+
+    Jika ``path_profil`` diberikan, profil per citra ditulis sebagai JSON Lines.
+    Jika ``path_per_daun`` diberikan, statistik setiap daun ditulis ke berkas
+    itu (CSV/Parquet, satu baris per daun). Jika ``path_penyimpanan``
+    diberikan, citra yang hasilnya sudah ada di penyimpanan tidak dianalisis
+    ulang; ``simpan_mask`` ikut menyimpan mask bercak dan daun. Jika
+    ``path_bercak`` diberikan, setiap area bercak (bbox, luas, pusat, dan
+    poligon JSON) ditulis ke berkas itu, satu baris per bercak.
+    """
+    if dir_overlay is not None:
+        os.makedirs(dir_overlay, exist_ok=True)
+    jumlah_proses = jumlah_proses or os.cpu_count() or 1
+    # Chunk kecil menjaga beban tetap rata, tapi cukup besar untuk menekan overhead IPC
+    chunksize = max(1, min(16, len(berkas) // (jumlah_proses * 4)))
+
+    mulai = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jumlah_proses,
+                             initializer=_init_worker,
+                             initargs=(backend_aktif(),)) as executor:
+        n = len(berkas)
+        baris = list(executor.map(proses_berkas, berkas, [warna_dasar] * n,
+                                  [sensitivitas] * n, [dir_overlay] * n,
+                                  [resolusi_analisis] * n,
+                                  [path_profil is not None] * n,
+                                  [metode_warna] * n, [bentuk_mentah] * n,
+                                  [path_per_daun is not None] * n,
+                                  [path_penyimpanan] * n, [simpan_mask] * n,
+                                  [path_bercak is not None] * n,
+                                  chunksize=chunksize))
+    durasi = time.perf_counter() - mulai
+
+    tulis_hasil(baris, path_keluaran)
+    if path_per_daun is not None:
+        tulis_hasil([d for b in baris for d in b.get('_per_daun', [])], path_per_daun,
+                     KOLOM_PER_DAUN)
+    if path_bercak is not None:
+        tulis_hasil([d for b in baris for d in b.get('_bercak', [])], path_bercak,
+                    KOLOM_BERCAK)
+    if path_profil is not None:
+        with open(path_profil, 'w', encoding='utf-8') as f:
+            for b in baris:
+                if '_profil' in b:
+                    f.write(json.dumps(b['_profil'], default=str) + '\n')
+        disalin = [b['_profil']['total_salinan_byte'] for b in baris if '_profil' in b]
+        if disalin:
+            print(f"Salinan data citra: rata-rata {np.mean(disalin) / 2**20:.1f} MB per "
+                  f"citra, total {sum(disalin) / 2**20:.1f} MB", file=sys.stderr)
+    gagal = sum(1 for b in baris if b['galat'])
+    print(f"{len(baris)} citra diproses dalam {durasi:.1f} detik "
+          f"({len(baris) / max(durasi, 1e-9):.1f} citra/detik, "
+          f"{jumlah_proses} proses, {gagal} gagal) -> {path_keluaran}",
+          file=sys.stderr)
+    return baris
@@ -0,0 +1,188 @@
+"""Cache hasil analisis berbasis hash konten citra dan parameter kalibrasi.
+
+Tahap segmentasi daun (grayscale, median filter, Otsu, morfologi, edge,
+kontur) tidak bergantung pada ``warna_dasar`` maupun ``sensitivitas``, jadi
+disimpan terpisah dari hasil deteksi bercak. Per citra disimpan satu
+``PipelineBertahap`` sehingga mengubah slider sensitivitas hanya menghitung
+ulang tahap hilir mask penyakit dan overlay.
+
+Dengan ``penyimpanan`` (lihat ``penyimpanan.PenyimpananHasil``) hasil deteksi
+bercak juga disimpan di disk, sehingga citra yang sama tidak dianalisis
+ulang setelah restart atau oleh proses lain.
+
+Mask hasil deteksi bercak disimpan di cache sebagai ``MaskRingkas``
+(``ringkas_hasil``) dan dipulihkan saat dibaca, sehingga batas byte cache
+menghitung ukuran ringkasnya.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .penyimpanan import kunci_hasil as kunci_penyimpanan
+from .penyimpanan import metrik_dari_hasil
+from .pipeline import (analisis_per_daun, buat_overlay, gabung_hasil,
+                       perkecil_citra, skalakan_hasil)
+from .profil import catat_salinan
+from .ringkas import MaskRingkas, pulihkan_hasil, ringkas_hasil
+from .tahapan import KELUARAN_SEGMENTASI, PipelineBertahap
+
+
+def hash_konten(data):
+    """Hash SHA-256 dari bytes citra yang diupload"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def ukuran_objek(obj):
+    """Perkiraan memori (byte) dari hasil pipeline, dominan dari array NumPy"""
+    if isinstance(obj, (np.ndarray, MaskRingkas)):
+        return obj.nbytes
+    if isinstance(obj, PipelineBertahap):
+        return ukuran_objek(obj.nilai)
+    if isinstance(obj, dict):
+        return sum(ukuran_objek(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(ukuran_objek(v) for v in obj)
+    return 0
+
+
+class CacheLRU:
+    """Cache LRU dengan batas jumlah entri dan batas total memori"""
+
+    def __init__(self, maks_entri=32, maks_byte=512 * 1024 * 1024):
+        self.maks_entri = maks_entri
+        self.maks_byte = maks_byte
+        self.total_byte = 0
+        self.hit = 0
+        self.miss = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, kunci):
+        return kunci in self._data
+
+    def get(self, kunci, default=None):
+        with self._lock:
+            if kunci not in self._data:
+                self.miss += 1
+                return default
+            self._data.move_to_end(kunci)
+            self.hit += 1
+            return self._data[kunci][0]
+
+    def put(self, kunci, nilai):
+        ukuran = ukuran_objek(nilai)
+        with self._lock:
+            if kunci in self._data:
+                self.total_byte -= self._data.pop(kunci)[1]
+            # Entri yang lebih besar dari batas memori tidak disimpan
+            if ukuran > self.maks_byte:
+                return
+            self._data[kunci] = (nilai, ukuran)
+            self.total_byte += ukuran
+            while (len(self._data) > self.maks_entri
+                   or self.total_byte > self.maks_byte):
+                _, (_, ukuran_lama) = self._data.popitem(last=False)
+                self.total_byte -= ukuran_lama
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_byte = 0
+
+
+def decode_citra(data):
+    """Decode bytes upload menjadi array seperti np.array(Image.open(...))"""
+    from PIL import Image
+    citra = np.array(Image.open(io.BytesIO(data)))
+    catat_salinan('decode', citra.nbytes)
+    return citra
+
+
+class AnalisisCache:
+    """Pipeline proses_citra dengan cache bertingkat per hash konten citra"""
+
+    def __init__(self, maks_entri=32, maks_byte=512 * 1024 * 1024, penyimpanan=None):
+        self.cache = CacheLRU(maks_entri, maks_byte)
+        self.penyimpanan = penyimpanan
+
+    def _pipeline(self, kunci, data, resolusi_analisis):
+        # Pipeline per konten citra dan resolusi, menyimpan keluaran tiap tahap
+        pipa = self.cache.get(('pipeline', kunci, resolusi_analisis))
+        if pipa is None:
+            img_array = decode_citra(data)
+            citra, _ = perkecil_citra(img_array, resolusi_analisis)
+            pipa = PipelineBertahap()
+            pipa.set(img_array=citra)
+            pipa.bentuk_asli = img_array.shape
+        return pipa
+
+    def _simpan_spesifik(self, kunci_hasil, info, output_img):
+        # Mask disimpan ringkas; proses() memulihkannya setiap kali dibaca
+        self.cache.put(kunci_hasil, ringkas_hasil({'penyakit_info': info, 'result': output_img}))
+
+    def _dari_penyimpanan(self, pipa, tersimpan):
+        # Mask dari disk; hanya cabang segmentasi (tanpa kalibrasi) dan overlay
+        # yang dihitung, hasilnya sama dengan menjalankan seluruh pipeline
+        segmentasi = pipa.jalankan(keluaran=KELUARAN_SEGMENTASI)
+        info = dict(tersimpan['penyakit'], mask_green=tersimpan['mask_green'],
+                    mask_disease=tersimpan['mask_disease'])
+        return info, buat_overlay(segmentasi['original'], segmentasi['kontur'],
+                                  info['mask_disease'])
+
+    def proses(self, data, warna_dasar="Hijau (Default)", sensitivitas=5,
+               resolusi_analisis=None, per_daun=False):
+        """Sama seperti proses_citra, tetapi menerima bytes citra dan memakai cache"""
+        kunci = hash_konten(data)
+        pipa = self._pipeline(kunci, data, resolusi_analisis)
+
+        # Hasil spesifik kalibrasi disimpan per parameter; keluaran segmentasi
+        # dipakai bersama dari pipeline citra yang sama
+        kunci_hasil = ('penyakit', kunci, resolusi_analisis, warna_dasar, sensitivitas)
+        spesifik = self.cache.get(kunci_hasil)
+        if spesifik is not None:
+            spesifik = pulihkan_hasil(spesifik)
+        tersimpan = None
+        if spesifik is None and self.penyimpanan is not None:
+            kunci_disk = kunci_penyimpanan(kunci, warna_dasar, sensitivitas, resolusi_analisis)
+            tersimpan = self.penyimpanan.ambil(kunci_disk, dengan_mask=True)
+            if tersimpan is not None:
+                info, output_img = self._dari_penyimpanan(pipa, tersimpan)
+                self._simpan_spesifik(kunci_hasil, info, output_img)
+                spesifik = {'penyakit_info': info, 'result': output_img}
+        dihitung = spesifik is None
+        if dihitung:
+            hasil = pipa.jalankan(warna_dasar=warna_dasar, sensitivitas=sensitivitas)
+            self._simpan_spesifik(kunci_hasil, hasil['penyakit_info'], hasil['result'])
+        else:
+            segmentasi = pipa.jalankan(keluaran=KELUARAN_SEGMENTASI)
+            hasil = gabung_hasil(segmentasi['original'], segmentasi['gray'], segmentasi,
+                                 spesifik['penyakit_info'], spesifik['result'])
+            hasil['waktu_tahap'] = segmentasi['waktu_tahap']
+        if per_daun and tersimpan is not None:
+            # Mask dari disk: cabang warna di pipeline belum pernah dijalankan
+            info = hasil['penyakit_info']
+            hasil['per_daun'] = (tersimpan['per_daun'] if 'per_daun' in tersimpan else
+                                 analisis_per_daun(hasil['morph'], info['mask_green'],
+                                                   info['mask_disease']))
+        elif per_daun:
+            # Tahap opsional di pipeline yang sama; mask hilir dipakai ulang jika
+            # parameternya tidak berubah sejak run terakhir
+            hasil['per_daun'] = pipa.jalankan(keluaran=('per_daun',),
+                                              warna_dasar=warna_dasar,
+                                              sensitivitas=sensitivitas)['per_daun']
+        if dihitung and self.penyimpanan is not None:
+            self.penyimpanan.simpan(kunci_disk, metrik_dari_hasil(hasil, pipa.bentuk_asli),
+                                    hasil['penyakit_info']['mask_green'],
+                                    hasil['penyakit_info']['mask_disease'])
+
+        # Put ulang agar ukuran pipeline yang baru dihitung ikut tercatat
+        self.cache.put(('pipeline', kunci, resolusi_analisis), pipa)
+        if hasil['original'].shape[:2] != pipa.bentuk_asli[:2]:
+            hasil = skalakan_hasil(hasil, pipa.bentuk_asli)
+        return hasil
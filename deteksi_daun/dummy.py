@@ -0,0 +1,162 @@
+"""Pembuatan citra daun sintetis untuk pengujian, demo, dan benchmark"""
+import cv2
+import numpy as np
+
+# Ukuran acuan: semua geometri preset didefinisikan pada citra 400x400
+UKURAN_ACUAN = 400
+
+# Preset per kondisi: warna daun, jumlah bercak, rentang posisi & radius
+# bercak (koordinat acuan), dan pilihan warna bercak. Jika ada dua warna,
+# warna pertama dipakai saat np.random.random() > ambang.
+PRESET_KONDISI = {
+    'sehat': {
+        'warna_daun': [34, 139, 34],  # RGB untuk hijau
+        'jumlah_bercak': 0,
+    },
+    'ringan': {
+        'warna_daun': [34, 139, 34],
+        'jumlah_bercak': 5,
+        'posisi': (100, 300),
+        'radius': (8, 15),
+        'warna_bercak': [[139, 139, 0]],  # Kuning gelap
+    },
+    'sedang': {
+        'warna_daun': [34, 139, 34],
+        'jumlah_bercak': 10,
+        'posisi': (80, 320),
+        'radius': (10, 20),
+        'warna_bercak': [[139, 90, 0], [139, 139, 0]],  # Coklat / kuning gelap
+        'ambang': 0.5,
+    },
+    'parah': {
+        'warna_daun': [34, 100, 34],  # Hijau lebih gelap
+        'jumlah_bercak': 20,
+        'posisi': (70, 330),
+        'radius': (12, 30),
+        'warna_bercak': [[90, 60, 20], [139, 120, 0]],  # Coklat gelap / kuning coklat
+        'ambang': 0.3,
+    },
+}
+
+# Varian warna daun untuk menguji kalibrasi: nama -> (warna daun RGB
+# pengganti untuk warnai_daun atau None = hijau asli, preset yang benar)
+VARIAN_DAUN = {
+    'hijau': (None, "Hijau (Default)"),
+    'hijau kekuningan': ((150, 180, 40), "Hijau (Default)"),
+    'kuning': ((200, 170, 30), "Kuning/Keemasan"),
+    'kemerahan': ((150, 30, 60), "Kemerahan/Ungu"),
+}
+
+# Jumlah baris per potongan saat mengisi daun dan noise, membatasi buffer sementara
+BARIS_PER_POTONGAN = 256
+
+
+def _mask_elips(y0, y1, x0, x1, center_y, center_x, axes_major, axes_minor):
+    # Mask daun hanya untuk jendela [y0:y1, x0:x1]
+    y, x = np.ogrid[y0:y1, x0:x1]
+    return ((x - center_x) ** 2 / axes_major ** 2 +
+            (y - center_y) ** 2 / axes_minor ** 2) <= 1
+
+
+def buat_citra_dummy(kondisi="sehat", seed=None, ukuran=(400, 400),
+                     jumlah_bercak=None, ukuran_bercak=None, out=None):
+    """Membuat gambar simulasi daun dengan/tanpa bercak penyakit.
+
+    ``seed`` membuat hasil deterministik (tanpa seed dipakai ``np.random``
+    global). ``ukuran`` adalah (tinggi, lebar); geometri daun dan bercak
+    diskalakan dari preset 400x400. ``jumlah_bercak`` dan ``ukuran_bercak``
+    (rentang radius (min, max) dalam piksel keluaran) menimpa preset.
+    ``out`` adalah array uint8 (tinggi, lebar, 3) tujuan yang ditimpa.
+
+    Bercak hanya digambar di dalam bounding box-nya dan daun serta noise
+    diisi per potongan baris, jadi tidak ada buffer sementara seukuran frame.
+    """
+    rng = np.random if seed is None else np.random.RandomState(seed)
+    preset = PRESET_KONDISI.get(kondisi, PRESET_KONDISI['parah'])
+    h, w = ukuran
+    sy, sx = h / UKURAN_ACUAN, w / UKURAN_ACUAN
+    if out is None:
+        img = np.zeros((h, w, 3), dtype=np.uint8)
+    else:
+        img = out
+        img[...] = 0
+
+    # Buat bentuk daun (elips)
+    center_y, center_x = h / 2, w / 2
+    axes_major, axes_minor = 150 * sx, 100 * sy
+    elips = (center_y, center_x, axes_major, axes_minor)
+
+    for y0 in range(0, h, BARIS_PER_POTONGAN):
+        y1 = min(y0 + BARIS_PER_POTONGAN, h)
+        img[y0:y1][_mask_elips(y0, y1, 0, w, *elips)] = preset['warna_daun']
+
+    n_bercak = preset['jumlah_bercak'] if jumlah_bercak is None else jumlah_bercak
+    if n_bercak > 0:
+        # Kondisi sehat tanpa preset bercak memakai geometri bercak ringan
+        acuan = preset if 'posisi' in preset else PRESET_KONDISI['ringan']
+        pos_min, pos_max = acuan['posisi']
+        if ukuran_bercak is None:
+            r_min = max(1, round(acuan['radius'][0] * min(sx, sy)))
+            r_max = max(r_min + 1, round(acuan['radius'][1] * min(sx, sy)))
+        else:
+            r_min, r_max = ukuran_bercak
+        batas_bawah = [round(pos_min * sx), round(pos_min * sy)]
+        batas_atas = [round(pos_max * sx), round(pos_max * sy)]
+
+        for _ in range(n_bercak):
+            bx, by = rng.randint(batas_bawah, batas_atas)
+            br = rng.randint(r_min, r_max)
+            warna = acuan['warna_bercak']
+            if len(warna) == 1 or rng.random() > acuan['ambang']:
+                warna_bercak = warna[0]
+            else:
+                warna_bercak = warna[1]
+
+            # Lingkaran bercak hanya dihitung di dalam bounding box-nya
+            y0, y1 = max(by - br, 0), min(by + br + 1, h)
+            x0, x1 = max(bx - br, 0), min(bx + br + 1, w)
+            if y0 >= y1 or x0 >= x1:
+                continue
+            y, x = np.ogrid[y0:y1, x0:x1]
+            bmask = (x - bx) ** 2 + (y - by) ** 2 <= br ** 2
+            bmask &= _mask_elips(y0, y1, x0, x1, *elips)
+            img[y0:y1, x0:x1][bmask] = warna_bercak
+
+    # Tambahkan noise untuk realisme. Noise int32 per potongan baris
+    # menghasilkan urutan bilangan acak yang sama dengan satu array penuh.
+    for y0 in range(0, h, BARIS_PER_POTONGAN):
+        y1 = min(y0 + BARIS_PER_POTONGAN, h)
+        potongan = rng.randint(-15, 15, (y1 - y0, w, 3), dtype=np.int32)
+        potongan += img[y0:y1]
+        np.clip(potongan, 0, 255, out=potongan)
+        img[y0:y1] = potongan
+
+    return img
+
+
+def buat_batch_dummy(jumlah, kondisi="sehat", seed=0, ukuran=(400, 400),
+                     jumlah_bercak=None, ukuran_bercak=None):
+    """Buat ``jumlah`` citra sekaligus sebagai array bertumpuk (N, tinggi, lebar, 3).
+
+    ``kondisi`` boleh berupa string atau daftar yang dipakai bergiliran.
+    Citra ke-i identik dengan ``buat_citra_dummy(kondisi_i, seed=seed + i)``.
+    """
+    if isinstance(kondisi, str):
+        kondisi = [kondisi]
+    h, w = ukuran
+    batch = np.empty((jumlah, h, w, 3), dtype=np.uint8)
+    for i in range(jumlah):
+        buat_citra_dummy(kondisi[i % len(kondisi)], seed=seed + i, ukuran=ukuran,
+                         jumlah_bercak=jumlah_bercak, ukuran_bercak=ukuran_bercak,
+                         out=batch[i])
+    return batch
+
+
+def warnai_daun(citra, warna):
+    """Ganti warna daun hijau citra dummy, noise dan bercak dipertahankan"""
+    hsv = cv2.cvtColor(citra, cv2.COLOR_RGB2HSV)
+    daun = (hsv[:, :, 0] >= 45) & (hsv[:, :, 0] <= 75) & (hsv[:, :, 1] > 100)
+    asal = np.median(citra[daun], axis=0).astype(np.int32)
+    hasil = citra.astype(np.int32)
+    hasil[daun] += np.array(warna) - asal
+    return np.clip(hasil, 0, 255).astype(np.uint8)
@@ -0,0 +1,118 @@
+"""Backend eksekusi tahap per piksel: NumPy, OpenCV UMat, atau pita baris berthread.
+
+- ``"numpy"``: fungsi OpenCV langsung pada array NumPy (perilaku awal).
+- ``"umat"``: masukan dibungkus ``cv2.UMat`` sehingga OpenCV memakai
+  transparent API (OpenCL, termasuk runtime OpenCL CPU); tanpa OpenCL
+  OpenCV kembali ke jalur CPU biasa.
+- ``"thread"``: citra dipotong menjadi pita baris yang diproses paralel di
+  thread pool. Tiap pita membawa ``halo`` baris tetangga sehingga operasi
+  bertetangga (median, morfologi) tetap identik dengan citra penuh.
+
+Backend default dibaca dari variabel lingkungan ``DETEKSI_DAUN_BACKEND``,
+diganti global lewat ``atur_backend`` (mis. opsi CLI ``--backend``), atau
+sementara untuk satu blok lewat ``pakai_backend``.
+"""
+import contextlib
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+BACKEND_EKSEKUSI = ("numpy", "umat", "thread")
+
+# Pita lebih tipis dari ini tidak sebanding dengan overhead thread dan halo
+BARIS_MIN_PITA = 64
+
+_backend_global = {'nama': os.environ.get('DETEKSI_DAUN_BACKEND', "numpy"),
+                   'jumlah_thread': None}
+_backend_aktif = contextvars.ContextVar('backend_eksekusi', default=None)
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def _cek_backend(nama):
+    if nama not in BACKEND_EKSEKUSI:
+        raise ValueError(f"Backend tidak dikenal: {nama!r} "
+                         f"(pilihan: {', '.join(BACKEND_EKSEKUSI)})")
+
+
+def atur_backend(nama, jumlah_thread=None):
+    """Ganti backend default proses ini; ``jumlah_thread`` untuk backend thread"""
+    _cek_backend(nama)
+    _backend_global['nama'] = nama
+    _backend_global['jumlah_thread'] = jumlah_thread
+
+
+@contextlib.contextmanager
+def pakai_backend(nama, jumlah_thread=None):
+    """Pakai backend tertentu hanya di dalam blok with (per thread/konteks)"""
+    _cek_backend(nama)
+    token = _backend_aktif.set((nama, jumlah_thread))
+    try:
+        yield
+    finally:
+        _backend_aktif.reset(token)
+
+
+def backend_aktif():
+    """(nama, jumlah_thread) backend yang berlaku di konteks ini"""
+    aktif = _backend_aktif.get()
+    if aktif is not None:
+        return aktif
+    return _backend_global['nama'], _backend_global['jumlah_thread']
+
+
+def _ambil_pool():
+    # Satu pool bersama; ukurannya jumlah core, pita dibatasi per pemanggilan
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                       thread_name_prefix="pita")
+        return _pool
+
+
+def _per_pita(fungsi, masukan, halo, jumlah_thread):
+    h = masukan[0].shape[0]
+    jumlah = min(jumlah_thread, h // BARIS_MIN_PITA)
+    if jumlah < 2:
+        return fungsi(*masukan)
+    batas = np.linspace(0, h, jumlah + 1).astype(int)
+
+    def kerja(i):
+        y0, y1 = batas[i], batas[i + 1]
+        a0, a1 = max(0, y0 - halo), min(h, y1 + halo)
+        keluaran = fungsi(*(m[a0:a1] for m in masukan))
+        tunggal = not isinstance(keluaran, tuple)
+        if tunggal:
+            keluaran = (keluaran,)
+        return tunggal, [k[y0 - a0:y1 - a0] for k in keluaran]
+
+    hasil = list(_ambil_pool().map(kerja, range(jumlah)))
+    gabungan = tuple(np.concatenate([pita[j] for _, pita in hasil])
+                     for j in range(len(hasil[0][1])))
+    return gabungan[0] if hasil[0][0] else gabungan
+
+
+def per_piksel(fungsi, *masukan, halo=0):
+    """Jalankan ``fungsi(*masukan)`` dengan backend aktif; hasil sama dengan NumPy.
+
+    ``fungsi`` hanya boleh memakai fungsi OpenCV (agar berjalan pada UMat)
+    dan mengembalikan satu array atau tuple array setinggi masukan.
+    ``halo`` adalah jangkauan baris terjauh yang memengaruhi satu piksel
+    keluaran (0 untuk operasi per piksel murni).
+    """
+    nama, jumlah_thread = backend_aktif()
+    if nama == "umat":
+        keluaran = fungsi(*(cv2.UMat(m) for m in masukan))
+        if isinstance(keluaran, tuple):
+            return tuple(k.get() for k in keluaran)
+        return keluaran.get()
+    if nama == "thread":
+        return _per_pita(fungsi, masukan, halo, jumlah_thread or os.cpu_count() or 1)
+    if nama != "numpy":
+        _cek_backend(nama)  # Nilai DETEKSI_DAUN_BACKEND yang salah ketik
+    return fungsi(*masukan)
@@ -0,0 +1,97 @@
+"""Lookup table warna: RGB langsung ke bit kelas sehat/bercak.
+
+Untuk mode kalibrasi berbasis warna, klasifikasi sehat/bercak hanya
+bergantung pada warna satu piksel. Semua kombinasi RGB bisa diklasifikasi
+sekali lewat jalur OpenCV (HSV + inRange, plus LAB untuk area gelap),
+lalu disimpan sebagai tabel. Setelah itu klasifikasi satu citra cukup satu
+lookup per piksel, tanpa buffer HSV/LAB.
+
+Dengan ``bit=8`` tabel berukuran 16 MB per mode dan hasilnya identik
+dengan jalur OpenCV. Dengan bit lebih kecil setiap kanal dikuantisasi
+(tabel 2**(3*bit) byte, muat di cache CPU) dan hasilnya aproksimasi.
+"""
+import functools
+import json
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+from .pipeline import AMBANG_WARNA, gabung_rentang
+
+BIT_SEHAT = 1
+BIT_BERCAK = 2
+
+# cv2.LUT: byte kelas -> mask 0/255 untuk masing-masing bit
+_TABEL_SEHAT = np.where(np.arange(256) & BIT_SEHAT, 255, 0).astype(np.uint8)
+_TABEL_BERCAK = np.where(np.arange(256) & BIT_BERCAK, 255, 0).astype(np.uint8)
+
+_lock_bangun = threading.Lock()
+
+
+def bangun_lut(ambang, bit=8):
+    """Klasifikasikan semua warna RGB terkuantisasi dengan threshold ``ambang``"""
+    n = 1 << bit
+    langkah = 256 // n
+    # Setiap sel kuantisasi diwakili nilai tengahnya (persis nilai itu untuk bit=8)
+    nilai = (np.arange(n) * langkah + langkah // 2).astype(np.uint8)
+
+    # Palet semua warna: baris = (r, g), kolom = b
+    palet = np.empty((n * n, n, 3), dtype=np.uint8)
+    palet[:, :, 0] = np.repeat(nilai, n)[:, None]
+    palet[:, :, 1] = np.tile(nilai, n)[:, None]
+    palet[:, :, 2] = nilai[None, :]
+
+    hsv = cv2.cvtColor(palet, cv2.COLOR_RGB2HSV)
+    sehat = gabung_rentang(hsv, ambang['sehat'])
+    bercak = gabung_rentang(hsv, ambang['bercak'])
+    del hsv
+    if ambang.get('gelap_lab') is not None:
+        l_channel = cv2.cvtColor(palet, cv2.COLOR_RGB2LAB)[:, :, 0]
+        _, gelap = cv2.threshold(l_channel, ambang['gelap_lab'], 255,
+                                 cv2.THRESH_BINARY_INV)
+        bercak = cv2.bitwise_or(bercak, gelap)
+
+    lut = np.zeros(sehat.shape, dtype=np.uint8)
+    lut[sehat > 0] |= BIT_SEHAT
+    lut[bercak > 0] |= BIT_BERCAK
+    return lut.reshape(-1)
+
+
+@functools.lru_cache(maxsize=16)
+def _lut_tersimpan(kunci_ambang, bit):
+    return bangun_lut(json.loads(kunci_ambang), bit)
+
+
+def ambil_lut(warna_dasar="Hijau (Default)", ambang=None, bit=8):
+    """LUT untuk mode kalibrasi (atau ambang kustom), dibangun sekali lalu di-cache"""
+    if ambang is None:
+        ambang = AMBANG_WARNA[warna_dasar]
+    kunci = json.dumps(ambang, sort_keys=True)
+    with _lock_bangun:  # Hindari beberapa thread membangun tabel 16 MB bersamaan
+        return _lut_tersimpan(kunci, bit)
+
+
+def indeks_warna(img_rgb, bit=8):
+    """Indeks LUT per piksel: (r << 2*bit) | (g << bit) | b setelah kuantisasi"""
+    if bit == 8 and sys.byteorder == 'little':
+        # RGB -> BGRA lalu dibaca sebagai uint32 little-endian = B | G<<8 | R<<16 | A<<24
+        bgra = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGRA)
+        idx = bgra.view(np.uint32).reshape(img_rgb.shape[:2])
+        np.bitwise_and(idx, 0x00FFFFFF, out=idx)
+        return idx
+    geser = 8 - bit
+    idx = (img_rgb[:, :, 0] >> geser).astype(np.uint32)
+    idx <<= bit
+    idx |= img_rgb[:, :, 1] >> geser
+    idx <<= bit
+    idx |= img_rgb[:, :, 2] >> geser
+    return idx
+
+
+def mask_warna_lut(img_rgb, warna_dasar="Hijau (Default)", ambang=None, bit=8):
+    """Padanan mask_warna untuk mode berbasis warna, lewat satu lookup per piksel"""
+    lut = ambil_lut(warna_dasar, ambang, bit)
+    kelas = lut.take(indeks_warna(img_rgb, bit))
+    return cv2.LUT(kelas, _TABEL_SEHAT), cv2.LUT(kelas, _TABEL_BERCAK)
@@ -0,0 +1,72 @@
+"""Ingesti dump frame mentah (.npy / .raw) lewat memory map tanpa salinan.
+
+Dump ``.npy`` dibuka dengan ``np.load(mmap_mode='r')``; berkas ``.raw``
+adalah piksel uint8 berurutan tanpa header dan butuh ``bentuk`` frame
+(tinggi, lebar, channel). Setiap frame diteruskan ke pipeline sebagai view
+read-only ke memory map: tidak ada decode dan tidak ada salinan ke heap,
+halaman berkas dibaca sesuai kebutuhan dan dibagi antar proses lewat page
+cache. Pipeline hanya menyalin di tahap yang menulis (mis. overlay), lihat
+``pipeline.lindungi``.
+"""
+import functools
+import os
+
+import numpy as np
+
+from .profil import catat_salinan
+
+EKSTENSI_MENTAH = ('.npy', '.raw')
+
+# Pemisah path dump dan indeks frame pada daftar berkas batch: "dump.npy#12"
+PEMISAH_FRAME = '#'
+
+
+def buka_dump(path, bentuk=None):
+    """Memory map read-only berbentuk (N, tinggi, lebar[, channel]) atau satu frame"""
+    if path.lower().endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if bentuk is None:
+        raise ValueError(f"Berkas mentah {path} butuh bentuk frame (tinggi, lebar, channel)")
+    ukuran_frame = int(np.prod(bentuk))
+    jumlah, sisa = divmod(os.path.getsize(path), ukuran_frame)
+    if sisa:
+        raise ValueError(f"Ukuran {path} bukan kelipatan frame {tuple(bentuk)}")
+    return np.memmap(path, dtype=np.uint8, mode='r', shape=(jumlah,) + tuple(bentuk))
+
+
+@functools.lru_cache(maxsize=8)
+def _dump_tersimpan(path, bentuk):
+    # Satu memory map per dump per proses, dipakai ulang untuk semua frame-nya
+    return buka_dump(path, bentuk)
+
+
+def _sebagai_frame(dump):
+    # Dump satu citra (tinggi, lebar[, 3/4]) diperlakukan sebagai satu frame
+    if dump.ndim == 2 or (dump.ndim == 3 and dump.shape[2] in (3, 4)):
+        return dump[np.newaxis]
+    return dump
+
+
+def jumlah_frame(path, bentuk=None):
+    return len(_sebagai_frame(_dump_tersimpan(path, bentuk)))
+
+
+def daftar_frame(path, bentuk=None):
+    """Nama frame "path#i" untuk setiap frame dalam dump"""
+    return [f"{path}{PEMISAH_FRAME}{i}" for i in range(jumlah_frame(path, bentuk))]
+
+
+def adalah_frame_mentah(nama):
+    path, _, indeks = nama.rpartition(PEMISAH_FRAME)
+    return bool(path) and indeks.isdigit() and path.lower().endswith(EKSTENSI_MENTAH)
+
+
+def baca_frame_mentah(nama, bentuk=None):
+    """View read-only ke frame "path#i" dari dump, tanpa salinan"""
+    path, _, indeks = nama.rpartition(PEMISAH_FRAME)
+    frame = _sebagai_frame(_dump_tersimpan(path, bentuk))[int(indeks)]
+    if not frame.flags.c_contiguous:
+        # OpenCV butuh array contiguous; dump hasil np.save selalu C-order
+        catat_salinan('contiguous', frame.nbytes)
+        frame = np.ascontiguousarray(frame)
+    return frame
@@ -0,0 +1,241 @@
+"""Penyimpanan hasil analisis di disk (SQLite), dipakai bersama app dan batch.
+
+Kunci setiap entri adalah hash konten citra, parameter kalibrasi yang
+memengaruhi hasil (``warna_dasar``, ``sensitivitas``, ``resolusi_analisis``)
+dan ``VERSI_PIPELINE``, sehingga foto yang diupload ulang atau berkas batch
+yang tidak berubah tidak diproses lagi, sedangkan perubahan algoritme
+otomatis membuat entri lama tidak terpakai.
+
+Isi entri adalah metrik ``deteksi_bercak_penyakit`` (JSON) dan, opsional,
+``mask_green``/``mask_disease`` sebagai ``MaskRingkas`` run-length terkompresi
+(lossless, lebih kecil dan lebih cepat daripada PNG 1-bit; entri PNG lama
+tetap terbaca). Database memakai mode WAL sehingga banyak proses bisa membaca
+sekaligus sementara satu proses menulis. Jika total ukuran entri melewati
+``maks_byte``, entri yang paling lama tidak diakses dihapus.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .pipeline import VERSI_PIPELINE, skalakan_hasil
+from .ringkas import MaskRingkas
+
+_SKEMA = """
+CREATE TABLE IF NOT EXISTS hasil (
+    kunci TEXT PRIMARY KEY,
+    metrik TEXT NOT NULL,
+    mask_green BLOB,
+    mask_disease BLOB,
+    ukuran INTEGER NOT NULL,
+    diakses REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hasil_diakses ON hasil (diakses);
+
+-- Total kolom ukuran dijaga trigger, agar simpan tidak perlu SUM seluruh tabel
+CREATE TABLE IF NOT EXISTS total_ukuran (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    byte INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO total_ukuran
+    SELECT 1, COALESCE(SUM(ukuran), 0) FROM hasil
+    WHERE NOT EXISTS (SELECT 1 FROM total_ukuran);
+CREATE TRIGGER IF NOT EXISTS hasil_tambah AFTER INSERT ON hasil BEGIN
+    UPDATE total_ukuran SET byte = byte + NEW.ukuran WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS hasil_hapus AFTER DELETE ON hasil BEGIN
+    UPDATE total_ukuran SET byte = byte - OLD.ukuran WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS hasil_ubah AFTER UPDATE OF ukuran ON hasil BEGIN
+    UPDATE total_ukuran SET byte = byte + NEW.ukuran - OLD.ukuran WHERE id = 1;
+END;
+"""
+
+# Lokasi default, dipakai bersama oleh app Streamlit dan perintah batch
+PATH_PENYIMPANAN = os.environ.get(
+    'DETEKSI_DAUN_PENYIMPANAN',
+    os.path.join(os.path.expanduser('~'), '.cache', 'deteksi_daun', 'hasil.sqlite'))
+
+# Angka dari penyakit_info yang disimpan (mask disimpan terpisah)
+KOLOM_METRIK = ('tingkat', 'status_class', 'persentase_penyakit', 'keterangan',
+                'luas_daun', 'luas_bercak')
+
+# Entri yang baru saja diakses tidak ditulis ulang waktu aksesnya (kurangi penulisan)
+JEDA_PERBARUI_AKSES = 60.0
+
+
+def kunci_hasil(hash_citra, warna_dasar, sensitivitas, resolusi_analisis=None):
+    """Kunci entri: hash konten + parameter kalibrasi + versi pipeline"""
+    return json.dumps([hash_citra, warna_dasar, int(sensitivitas), resolusi_analisis,
+                       VERSI_PIPELINE])
+
+
+def metrik_dari_hasil(hasil, bentuk_asli):
+    """Metrik JSON-able dari hasil pipeline beresolusi analisis (sebelum skalakan_hasil)"""
+    info = hasil['penyakit_info']
+    metrik = {
+        'penyakit': {k: info[k] for k in KOLOM_METRIK},
+        'luas_daun': hasil['luas_daun'],
+        'bentuk': info['mask_disease'].shape[:2],
+        'bentuk_asli': bentuk_asli[:2],
+    }
+    if 'per_daun' in hasil:
+        metrik['per_daun'] = hasil['per_daun']
+    return metrik
+
+
+def hasil_dari_metrik(metrik):
+    """Susun ulang hasil (angka saja) dalam satuan piksel citra asli"""
+    info = dict(metrik['penyakit'])
+    info['mask_green'] = metrik.get('mask_green')
+    info['mask_disease'] = metrik.get('mask_disease')
+    hasil = {'penyakit_info': info, 'luas_daun': metrik['luas_daun']}
+    if 'per_daun' in metrik:
+        hasil['per_daun'] = metrik['per_daun']
+    if list(metrik['bentuk']) == list(metrik['bentuk_asli']):
+        return hasil
+    return skalakan_hasil(hasil, metrik['bentuk_asli'], bentuk_analisis=metrik['bentuk'])
+
+
+def _kompres_mask(mask):
+    # Mask 0/255 disimpan sebagai MaskRingkas (run-length + zlib): ~2x lebih
+    # kecil dan ~4x lebih cepat daripada PNG 1-bit; mask dengan nilai lain
+    # tetap PNG 8-bit agar lossless
+    if cv2.countNonZero(cv2.inRange(mask, 1, 254)) == 0:
+        return MaskRingkas.dari_array(mask).ke_bytes()
+    ok, png = cv2.imencode('.png', mask, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+    if not ok:
+        raise ValueError("Gagal mengompres mask")
+    return png.tobytes()
+
+
+def _dekompres_mask(data):
+    if MaskRingkas.adalah_bytes(data):
+        return MaskRingkas.dari_bytes(data).ke_array()
+    # Entri lama (PNG 1-bit) dan mask non-biner
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def _ke_json(nilai):
+    # Tipe NumPy (int64, float64) dari pipeline menjadi tipe Python
+    if isinstance(nilai, np.generic):
+        return nilai.item()
+    if isinstance(nilai, tuple):
+        return list(nilai)
+    raise TypeError(f"Tidak bisa diserialisasi: {type(nilai).__name__}")
+
+
+class BasisSqlite:
+    """Database SQLite mode WAL dengan satu koneksi per thread, aman untuk banyak proses"""
+
+    def __init__(self, path, skema, batas_waktu=30.0):
+        self.path = os.fspath(path)
+        self.batas_waktu = batas_waktu
+        self._lokal = threading.local()
+        direktori = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(direktori, exist_ok=True)
+        conn = self._koneksi()
+        # auto_vacuum harus diset sebelum tabel pertama dibuat agar ruang
+        # bekas entri yang dihapus bisa dikembalikan ke sistem berkas
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.executescript(skema)
+
+    def _koneksi(self):
+        # Satu koneksi per thread; sqlite3 melarang berbagi koneksi lintas thread
+        conn = getattr(self._lokal, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.batas_waktu,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._lokal.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaksi(self):
+        # BEGIN IMMEDIATE mengambil kunci tulis di awal, jadi penulis lain
+        # menunggu (busy timeout) alih-alih gagal di tengah transaksi
+        conn = self._koneksi()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def tutup(self):
+        conn = getattr(self._lokal, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._lokal.conn = None
+
+
+class PenyimpananHasil(BasisSqlite):
+    """Penyimpanan hasil analisis berbasis SQLite yang aman untuk banyak proses"""
+
+    def __init__(self, path, maks_byte=1024 * 1024 * 1024, batas_waktu=30.0):
+        super().__init__(path, _SKEMA, batas_waktu)
+        self.maks_byte = maks_byte
+
+    def ambil(self, kunci, dengan_mask=False):
+        """Metrik tersimpan untuk kunci (plus mask jika diminta), atau None"""
+        conn = self._koneksi()
+        kolom = "metrik, diakses, mask_green, mask_disease" if dengan_mask else "metrik, diakses"
+        baris = conn.execute(f"SELECT {kolom} FROM hasil WHERE kunci = ?", (kunci,)).fetchone()
+        if baris is None:
+            return None
+        if dengan_mask and (baris[2] is None or baris[3] is None):
+            return None
+        sekarang = time.time()
+        if sekarang - baris[1] > JEDA_PERBARUI_AKSES:
+            conn.execute("UPDATE hasil SET diakses = ? WHERE kunci = ?", (sekarang, kunci))
+        hasil = json.loads(baris[0])
+        if dengan_mask:
+            hasil['mask_green'] = _dekompres_mask(baris[2])
+            hasil['mask_disease'] = _dekompres_mask(baris[3])
+        return hasil
+
+    def simpan(self, kunci, metrik, mask_green=None, mask_disease=None):
+        """Simpan metrik (dictionary JSON-able) dan mask opsional, lalu evict jika penuh"""
+        teks = json.dumps(metrik, default=_ke_json)
+        blob_green = _kompres_mask(mask_green) if mask_green is not None else None
+        blob_disease = _kompres_mask(mask_disease) if mask_disease is not None else None
+        ukuran = len(teks) + len(blob_green or b'') + len(blob_disease or b'')
+
+        with self._transaksi() as conn:
+            # Upsert, bukan INSERT OR REPLACE: penghapusan oleh REPLACE tidak
+            # memicu trigger hasil_hapus sehingga total_ukuran akan meleset
+            conn.execute("INSERT INTO hasil VALUES (?, ?, ?, ?, ?, ?) "
+                         "ON CONFLICT (kunci) DO UPDATE SET metrik = excluded.metrik, "
+                         "mask_green = excluded.mask_green, "
+                         "mask_disease = excluded.mask_disease, "
+                         "ukuran = excluded.ukuran, diakses = excluded.diakses",
+                         (kunci, teks, blob_green, blob_disease, ukuran, time.time()))
+            dihapus = self._evict(conn)
+        if dihapus:
+            conn.execute("PRAGMA incremental_vacuum")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT byte FROM total_ukuran WHERE id = 1").fetchone()[0]
+        if total <= self.maks_byte:
+            return 0
+        # Hapus entri yang paling lama tidak diakses sampai total di bawah batas
+        dihapus = []
+        for kunci, ukuran in conn.execute("SELECT kunci, ukuran FROM hasil ORDER BY diakses"):
+            if total <= self.maks_byte:
+                break
+            dihapus.append((kunci,))
+            total -= ukuran
+        conn.executemany("DELETE FROM hasil WHERE kunci = ?", dihapus)
+        return len(dihapus)
+
+    def statistik(self):
+        baris = self._koneksi().execute(
+            "SELECT COUNT(*), COALESCE(SUM(ukuran), 0) FROM hasil").fetchone()
+        return {'jumlah_entri': baris[0], 'total_byte': baris[1], 'maks_byte': self.maks_byte}
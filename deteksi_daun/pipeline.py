@@ -0,0 +1,820 @@
+"""Pipeline pemrosesan citra daun: segmentasi daun dan deteksi bercak penyakit"""
+import time
+
+import cv2
+import numpy as np
+
+from .eksekusi import per_piksel
+from .profil import catat_salinan, tahap
+
+PILIHAN_WARNA_DASAR = ["Hijau (Default)", "Kuning/Keemasan", "Kemerahan/Ungu", "Custom",
+                       "Custom (Varians Lokal)", "Otomatis"]
+
+# Mode tekstur berbasis simpangan baku lokal dengan ambang adaptif
+MODE_VARIANS = "Custom (Varians Lokal)"
+JENDELA_VARIANS = 15        # Sisi jendela varians lokal pada SISI_ACUAN_VARIANS (ganjil)
+SISI_ACUAN_VARIANS = 2048   # Jendela diskalakan dengan sisi terpanjang citra terhadap ini
+FAKTOR_AMBANG_VARIANS = 2.0  # Ambang = faktor x median simpangan lokal di dalam daun
+AMBANG_MIN_VARIANS = 6      # Batas bawah ambang untuk daun yang sangat halus
+
+# Mode kalibrasi otomatis: ambang warna disesuaikan dari histogram hue piksel daun
+MODE_OTOMATIS = "Otomatis"
+SATURASI_MIN_OTOMATIS = 40  # Piksel pucat/gelap (hue tidak stabil) tidak ikut histogram
+KECERAHAN_MIN_OTOMATIS = 40
+FRAKSI_PUNCAK_OTOMATIS = 0.02  # Pita hue sehat melebar selama histogram >= fraksi x puncak
+LEBAR_MAKS_OTOMATIS = 30    # Lebar maksimum pita sehat di tiap sisi puncak (bin hue)
+MARGIN_OTOMATIS = 3         # Tambahan bin hue di kedua tepi pita sehat
+PIKSEL_MIN_OTOMATIS = 500   # Di bawah ini histogram tidak dipercaya -> preset default
+RESOLUSI_HISTOGRAM_OTOMATIS = 1024  # Histogram dihitung pada sisi terpanjang <= nilai ini
+
+# Citra yang bisa dipilih lewat parameter keluaran pada proses_citra
+KELUARAN_CITRA = ('original', 'gray', 'filtered', 'binary', 'morph', 'edges',
+                  'segmented', 'result')
+
+# Versi algoritme analisis, bagian dari kunci penyimpanan hasil di disk.
+# Naikkan setiap kali perubahan pipeline mengubah angka atau mask keluaran.
+VERSI_PIPELINE = 3
+
+
+def salin(arr, nama):
+    """Salinan arr yang dicatat ke profiler aktif (untuk laporan byte disalin)"""
+    catat_salinan(nama, arr.nbytes)
+    return arr.copy()
+
+
+def lindungi(arr, nama):
+    """arr apa adanya jika read-only, selain itu salinan agar hasil tidak ikut berubah
+
+    Input writeable (mis. hasil decode) disalin supaya hasil tidak beraliasing
+    dengan array milik pemanggil. View read-only (mis. memmap) tidak bisa
+    diubah lewat view itu, jadi diteruskan tanpa salinan.
+    """
+    if not arr.flags.writeable:
+        return arr
+    return salin(arr, nama)
+
+
+def filter_komponen(labels, stats, min_area, max_area):
+    """Buat mask komponen dengan luas di antara min_area dan max_area"""
+    areas = stats[:, cv2.CC_STAT_AREA]
+    keep = (areas > min_area) & (areas < max_area)
+    keep[0] = False  # Skip background (label 0)
+    tabel = np.where(keep, 255, 0).astype(np.uint8)
+    return tabel[labels]
+
+
+# Threshold HSV (OpenCV: H 0-180, S/V 0-255) per mode kalibrasi warna dasar.
+# 'sehat' dan 'bercak' adalah daftar rentang (lower, upper) yang digabung
+# dengan OR; 'gelap_lab' (opsional) menandai piksel dengan L* LAB <= nilai
+# tersebut sebagai bercak. Mode "Custom" dan MODE_VARIANS memakai analisis
+# tekstur.
+AMBANG_WARNA = {
+    "Hijau (Default)": {
+        # Deteksi area hijau sehat
+        'sehat': [((35, 40, 20), (85, 255, 255))],
+        # Bercak = coklat + kuning gelap
+        'bercak': [((10, 50, 20), (30, 255, 150)),
+                   ((20, 50, 50), (35, 255, 255))],
+    },
+    "Kuning/Keemasan": {
+        # Untuk daun kuning, fokus ke area yang LEBIH GELAP atau COKLAT
+        'sehat': [((20, 30, 80), (40, 255, 255))],  # Kuning cerah
+        # Hanya deteksi coklat gelap (lebih ketat) dan area gelap dari LAB
+        'bercak': [((10, 40, 20), (25, 255, 120))],
+        'gelap_lab': 80,
+    },
+    "Kemerahan/Ungu": {
+        # Untuk daun merah/ungu (hue merah melingkar di 0 dan 180)
+        'sehat': [((0, 30, 30), (10, 255, 255)),
+                  ((140, 30, 30), (180, 255, 255))],
+        # Deteksi coklat dan hitam
+        'bercak': [((10, 30, 20), (30, 255, 100))],
+    },
+}
+
+
+def gabung_rentang(hsv, rentang):
+    """OR dari cv2.inRange untuk setiap rentang (lower, upper)"""
+    mask = None
+    for lower, upper in rentang:
+        m = cv2.inRange(hsv, np.array(lower), np.array(upper))
+        mask = m if mask is None else cv2.bitwise_or(mask, m)
+    if mask is None:
+        # Daftar kosong: lower > upper menghasilkan mask nol (juga untuk UMat)
+        mask = cv2.inRange(hsv, np.array((1, 0, 0)), np.array((0, 0, 0)))
+    return mask
+
+
+def mask_warna(img_rgb, warna_dasar="Hijau (Default)", ambang=None,
+               metode="opencv", mask_daun=None):
+    """Threshold warna sesuai kalibrasi: hasilkan mask daun sehat dan mask bercak mentah.
+
+    ``ambang`` (format seperti entri AMBANG_WARNA) menimpa threshold bawaan
+    mode ``warna_dasar``. ``metode="lut"`` memakai lookup table RGB dari
+    modul lut dengan hasil identik; mode tekstur dan MODE_OTOMATIS (ambang
+    berbeda tiap citra) selalu lewat OpenCV.
+
+    ``mask_daun`` adalah mask segmentasi daun (``morph``) untuk
+    MODE_OTOMATIS; tanpa mask ini segmentasi dihitung di sini.
+    """
+    if ambang is None and warna_dasar == "Custom":
+        return _mask_tekstur(img_rgb)
+    if ambang is None and warna_dasar == MODE_VARIANS:
+        return mask_varians_lokal(img_rgb)
+    if ambang is None and warna_dasar == MODE_OTOMATIS:
+        if mask_daun is None:
+            with tahap('konversi_gray'):
+                gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
+            mask_daun = closing_daun(threshold_otsu(filter_median(gray)))
+        ambang = kalibrasi_warna(img_rgb, mask_daun)
+    if ambang is None:
+        ambang = AMBANG_WARNA[warna_dasar]
+    if metode == "lut" and warna_dasar != MODE_OTOMATIS:
+        from .lut import mask_warna_lut  # Impor lambat: modul lut mengimpor pipeline
+        with tahap('lookup_warna'):
+            return mask_warna_lut(img_rgb, ambang=ambang)
+    return per_piksel(lambda citra: _threshold_warna(citra, ambang), img_rgb)
+
+
+def _threshold_warna(img_rgb, ambang):
+    # Hanya fungsi OpenCV per piksel (tanpa indexing NumPy) agar bisa lewat
+    # per_piksel. LAB hanya dihitung jika mode memakai deteksi area gelap
+    with tahap('konversi_hsv'):
+        hsv = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2HSV)
+    
+    with tahap('threshold_warna'):
+        mask_healthy = gabung_rentang(hsv, ambang['sehat'])
+        mask_disease = gabung_rentang(hsv, ambang['bercak'])
+        
+        if ambang.get('gelap_lab') is not None:
+            # Tambahan: deteksi area gelap dengan LAB
+            del hsv  # Bebaskan buffer HSV sebelum alokasi LAB
+            with tahap('konversi_lab'):
+                lab = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2LAB)
+            l_channel = cv2.extractChannel(lab, 0)
+            _, dark_spots = cv2.threshold(l_channel, ambang['gelap_lab'], 255,
+                                          cv2.THRESH_BINARY_INV)
+            mask_disease = cv2.bitwise_or(mask_disease, dark_spots)
+    
+    return mask_healthy, mask_disease
+
+
+def _mask_tekstur(img_rgb):
+    # Custom - gunakan analisis tekstur
+    with tahap('threshold_warna'):
+        # Deteksi semua area non-background
+        with tahap('konversi_gray'):
+            gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
+        _, mask_healthy = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
+        
+        # Gunakan variance untuk deteksi bercak (area tidak seragam)
+        with tahap('tekstur'):
+            blur = cv2.GaussianBlur(gray, (21, 21), 0)
+            variance = cv2.absdiff(gray, blur)
+        _, mask_disease = cv2.threshold(variance, 20, 255, cv2.THRESH_BINARY)
+        
+        # Morfologi untuk hapus noise kecil
+        kernel = np.ones((5, 5), np.uint8)
+        with tahap('morfologi_custom'):
+            mask_disease = cv2.morphologyEx(mask_disease, cv2.MORPH_OPEN, kernel)
+    
+    return mask_healthy, mask_disease
+
+
+def jendela_varians(bentuk):
+    """Sisi jendela varians lokal (ganjil, >= 3) untuk citra berukuran ``bentuk``.
+
+    Jendela sebanding dengan ukuran citra sehingga mencakup area daun yang
+    sama pada resolusi penuh maupun resolusi analisis yang diperkecil.
+    """
+    sisi = max(bentuk[0], bentuk[1])
+    return max(3, round(JENDELA_VARIANS * sisi / SISI_ACUAN_VARIANS)) | 1
+
+
+def simpangan_lokal(img_rgb, jendela=None):
+    """Mask daun, mask bagian dalam daun, dan simpangan baku lokal (uint8) per piksel.
+
+    Varians jendela dihitung dari jumlah piksel dan jumlah kuadrat piksel
+    dalam jendela (E[x^2] - E[x]^2). boxFilter/sqrBoxFilter memakai jumlah
+    berjalan (prinsip yang sama dengan integral image), jadi biayanya tidak
+    bergantung pada ukuran jendela. Bagian dalam daun adalah mask daun yang
+    dierosi selebar jendela: jendela di tepi daun ikut memuat background
+    sehingga variansnya selalu tinggi. Tanpa ``jendela`` dipakai
+    ``jendela_varians`` dari ukuran citra.
+    """
+    if jendela is None:
+        jendela = jendela_varians(img_rgb.shape)
+    with tahap('konversi_gray'):
+        gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
+    _, mask_daun = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
+    
+    ukuran = (jendela, jendela)
+    with tahap('varians_lokal'):
+        rata = cv2.boxFilter(gray, cv2.CV_32F, ukuran)
+        varians = cv2.sqrBoxFilter(gray, cv2.CV_32F, ukuran)
+        cv2.multiply(rata, rata, dst=rata)
+        # absdiff, bukan subtract: pembulatan float bisa memberi varians
+        # sedikit negatif pada area rata (nilai mutlaknya tetap ~0)
+        cv2.absdiff(varians, rata, dst=varians)
+        simpangan = cv2.convertScaleAbs(cv2.sqrt(varians))
+    
+    with tahap('erosi_daun'):
+        dalam = cv2.erode(mask_daun, np.ones(ukuran, np.uint8))
+    return mask_daun, dalam, simpangan
+
+
+def histogram_simpangan(simpangan, dalam):
+    """Histogram 256 bin simpangan lokal di dalam daun (bisa dijumlah antar ubin)"""
+    return cv2.calcHist([simpangan], [0], dalam, [256], [0, 256]).ravel()
+
+
+def ambang_varians(histogram):
+    """Ambang simpangan lokal adaptif: kelipatan median simpangan di dalam daun"""
+    kumulatif = np.cumsum(histogram)
+    if kumulatif[-1] == 0:
+        return AMBANG_MIN_VARIANS
+    median = int(np.searchsorted(kumulatif, kumulatif[-1] / 2))
+    return max(AMBANG_MIN_VARIANS, FAKTOR_AMBANG_VARIANS * median)
+
+
+def mask_varians_lokal(img_rgb, ambang_std=None, jendela=None):
+    """Mask daun dan mask bercak dari simpangan baku lokal dengan ambang adaptif.
+
+    Bercak adalah piksel di dalam daun yang simpangan lokalnya melebihi
+    ``ambang_std``; tanpa ``ambang_std`` ambang dihitung dari citra itu
+    sendiri (lihat ``ambang_varians``), sehingga tekstur alami daun yang
+    kasar tidak langsung dianggap bercak.
+    """
+    with tahap('threshold_warna'):
+        mask_healthy, dalam, simpangan = simpangan_lokal(img_rgb, jendela)
+        if ambang_std is None:
+            ambang_std = ambang_varians(histogram_simpangan(simpangan, dalam))
+        _, mask_disease = cv2.threshold(simpangan, ambang_std, 255, cv2.THRESH_BINARY)
+        cv2.bitwise_and(mask_disease, dalam, dst=mask_disease)
+        
+        # Morfologi untuk hapus noise kecil, sama seperti mode Custom
+        kernel = np.ones((5, 5), np.uint8)
+        with tahap('morfologi_custom'):
+            mask_disease = cv2.morphologyEx(mask_disease, cv2.MORPH_OPEN, kernel)
+    
+    return mask_healthy, mask_disease
+
+
+def histogram_hue(img_rgb, mask_daun, resolusi=RESOLUSI_HISTOGRAM_OTOMATIS):
+    """Histogram 2D hue (180 bin) x kecerahan V (256 bin) piksel daun yang cukup jenuh.
+
+    Citra besar dicuplik (nearest neighbour) ke sisi terpanjang ``resolusi``
+    dulu: bentuk histogram tetap, biayanya tidak lagi naik dengan megapiksel.
+    """
+    with tahap('histogram_hue'):
+        h, w = mask_daun.shape
+        if max(h, w) > resolusi:
+            skala = resolusi / max(h, w)
+            ukuran = (max(1, round(w * skala)), max(1, round(h * skala)))
+            img_rgb = cv2.resize(img_rgb, ukuran, interpolation=cv2.INTER_NEAREST)
+            mask_daun = cv2.resize(mask_daun, ukuran, interpolation=cv2.INTER_NEAREST)
+        hsv = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2HSV)
+        lower = np.array((0, SATURASI_MIN_OTOMATIS, KECERAHAN_MIN_OTOMATIS))
+        berwarna = cv2.inRange(hsv, lower, np.array((180, 255, 255)))
+        cv2.bitwise_and(berwarna, mask_daun, dst=berwarna)
+        return cv2.calcHist([hsv], [0, 2], berwarna, [180, 256], [0, 180, 0, 256])
+
+
+def _hue_rentang(rentang):
+    # Himpunan hue (boolean 180) yang dicakup daftar rentang (lower, upper)
+    hue = np.zeros(180, dtype=bool)
+    for lower, upper in rentang:
+        hue[lower[0]:min(upper[0], 179) + 1] = True
+    return hue
+
+
+def _rentang_dari_hue(hue, lower, upper):
+    # Potong himpunan hue menjadi rentang berurutan dengan batas S/V yang sama
+    tepi = np.flatnonzero(np.diff(np.concatenate(([0], hue.astype(np.int8), [0]))))
+    rentang = []
+    for awal, akhir in zip(tepi[::2], tepi[1::2] - 1):
+        # Hue 179 ditulis 180 seperti pada AMBANG_WARNA
+        h_atas = 180 if akhir == 179 else int(akhir)
+        rentang.append(((int(awal),) + tuple(lower[1:]), (h_atas,) + tuple(upper[1:])))
+    return rentang
+
+
+def ambang_otomatis(histogram):
+    """Pilih dan sesuaikan ambang warna (format AMBANG_WARNA) dari histogram_hue daun.
+
+    Pita hue sehat adalah puncak histogram yang dilebarkan ke kedua sisi
+    selama frekuensinya terus turun dan masih >= ``FRAKSI_PUNCAK_OTOMATIS``
+    x puncak (melingkar, hue merah di 0 dan 180). Preset yang rentang
+    sehatnya memuat puncak dipilih sebagai dasar: batas S/V sehat, rentang
+    bercak, dan ``gelap_lab`` diambil dari preset itu. Jika tidak ada,
+    dipilih preset dengan rentang sehat yang mencakup piksel daun terbanyak,
+    lalu hue bercak di dalam pita sehat yang pada rentang kecerahannya masih
+    memuat banyak piksel daun dibuang, agar warna daun sendiri tidak
+    dihitung sebagai bercak. Kunci ``'preset'`` mencatat preset terpilih.
+    """
+    hue_v = np.asarray(histogram, dtype=np.float64)
+    histogram = hue_v.sum(axis=1)
+    if histogram.sum() < PIKSEL_MIN_OTOMATIS:
+        return dict(AMBANG_WARNA["Hijau (Default)"], preset="Hijau (Default)")
+    
+    # Penghalusan melingkar 5 bin agar puncak tidak jatuh pada derau
+    halus = np.convolve(np.concatenate((histogram[-2:], histogram, histogram[:2])),
+                        np.ones(5) / 5, mode='valid')
+    puncak = int(np.argmax(halus))
+    batas = FRAKSI_PUNCAK_OTOMATIS * halus[puncak]
+    lebar = []
+    for arah in (-1, 1):
+        # Berhenti di lembah agar puncak warna bercak di sebelahnya tidak ikut
+        n = 0
+        while n < LEBAR_MAKS_OTOMATIS:
+            berikut = halus[(puncak + arah * (n + 1)) % 180]
+            if berikut < batas or berikut > halus[(puncak + arah * n) % 180]:
+                break
+            n += 1
+        lebar.append(n)
+    kiri, kanan = lebar
+    pita = np.zeros(180, dtype=bool)
+    pita[np.arange(puncak - kiri - MARGIN_OTOMATIS,
+                   puncak + kanan + MARGIN_OTOMATIS + 1) % 180] = True
+    
+    # Preset yang rentang sehatnya memuat puncak; pada irisan rentang (hue
+    # 35-40 Hijau/Kuning) preset pertama di AMBANG_WARNA menang
+    memuat = [nama for nama in AMBANG_WARNA
+              if _hue_rentang(AMBANG_WARNA[nama]['sehat'])[puncak]]
+    if memuat:
+        preset = memuat[0]
+        # Rentang bercak preset memang dirancang terpisah dari warna daunnya;
+        # piksel daun yang tersebar di hue bercak dibersihkan morfologi
+        bercak = list(AMBANG_WARNA[preset]['bercak'])
+    else:
+        preset = max(AMBANG_WARNA, key=lambda nama: histogram[
+            _hue_rentang(AMBANG_WARNA[nama]['sehat'])].sum())
+        bercak = []
+        for lower, upper in AMBANG_WARNA[preset]['bercak']:
+            daun = pita & (hue_v[:, lower[2]:upper[2] + 1].sum(axis=1) >= batas)
+            bercak += _rentang_dari_hue(_hue_rentang([(lower, upper)]) & ~daun, lower, upper)
+    acuan = AMBANG_WARNA[preset]
+    lower_sehat = (0,) + tuple(min(l[i] for l, _ in acuan['sehat']) for i in (1, 2))
+    ambang = {
+        'sehat': _rentang_dari_hue(pita, lower_sehat, (180, 255, 255)),
+        'bercak': bercak,
+        'preset': preset,
+    }
+    if acuan.get('gelap_lab') is not None:
+        ambang['gelap_lab'] = acuan['gelap_lab']
+    return ambang
+
+
+def kalibrasi_warna(img_rgb, mask_daun, warna_dasar=MODE_OTOMATIS):
+    """Ambang hasil kalibrasi otomatis di dalam mask daun; None untuk mode lain"""
+    if warna_dasar != MODE_OTOMATIS:
+        return None
+    return ambang_otomatis(histogram_hue(img_rgb, mask_daun))
+
+
+def morfologi_sensitivitas(mask_disease, sensitivitas=5):
+    """Bersihkan mask bercak dengan morfologi sesuai tingkat sensitivitas"""
+    # Sesuaikan sensitivitas dengan morfologi
+    sens_factor = sensitivitas / 5.0  # Normalisasi ke 0.2 - 2.0
+    kernel_size = max(3, int(7 - sens_factor * 2))  # Kernel lebih kecil = lebih sensitif
+    kernel = np.ones((kernel_size, kernel_size), np.uint8)
+    # Jangkauan satu erosi/dilasi; opening 2 iterasi = 4 kali, closing = 2 kali
+    r = kernel_size // 2
+    
+    if sensitivitas > 5:
+        # Lebih sensitif: kurangi noise removal
+        with tahap('morfologi_close'):
+            mask_disease = per_piksel(lambda m: cv2.morphologyEx(m, cv2.MORPH_CLOSE, kernel,
+                                                                 iterations=1),
+                                      mask_disease, halo=2 * r)
+    else:
+        # Kurang sensitif: lebih banyak noise removal
+        with tahap('morfologi_open'):
+            mask_disease = per_piksel(lambda m: cv2.morphologyEx(m, cv2.MORPH_OPEN, kernel,
+                                                                 iterations=2),
+                                      mask_disease, halo=4 * r)
+        with tahap('morfologi_close'):
+            mask_disease = per_piksel(lambda m: cv2.morphologyEx(m, cv2.MORPH_CLOSE, kernel,
+                                                                 iterations=1),
+                                      mask_disease, halo=2 * r)
+    
+    return mask_disease
+
+
+def batas_luas_bercak(total_area):
+    """Rentang luas (min_area, max_area) komponen yang dianggap bercak"""
+    # Filter komponen yang terlalu kecil (noise) atau terlalu besar (false positive)
+    min_area = total_area * 0.0005  # 0.05% dari total
+    max_area = total_area * 0.3     # 30% dari total
+    return min_area, max_area
+
+
+def filter_bercak(mask_disease, total_area):
+    """Buang komponen bercak yang terlalu kecil (noise) atau terlalu besar"""
+    # Deteksi pola: bercak penyakit = spot tidak merata
+    # Hitung connected components untuk analisis pola
+    with tahap('connected_components'):
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask_disease, connectivity=8)
+    
+    min_area, max_area = batas_luas_bercak(total_area)
+    
+    # Tabel keep per label, lalu satu kali lookup untuk seluruh citra
+    # (bukan scan labels == i berulang untuk setiap komponen)
+    with tahap('filter_komponen'):
+        return filter_komponen(labels, stats, min_area, max_area)
+
+
+def klasifikasi_kesehatan(mask_green, mask_disease):
+    """Hitung persentase bercak terhadap area daun dan tentukan tingkat kesehatan"""
+    # Hitung persentase
+    with tahap('hitung_piksel'):
+        total_leaf_pixels = np.sum(mask_green > 0)
+        disease_pixels = np.sum(mask_disease > 0)
+    
+    if total_leaf_pixels > 0:
+        persentase_penyakit = (disease_pixels / total_leaf_pixels) * 100
+    else:
+        persentase_penyakit = 0
+    
+    tingkat, status_class, keterangan = tentukan_tingkat(persentase_penyakit)
+    
+    return {
+        'tingkat': tingkat,
+        'status_class': status_class,
+        'persentase_penyakit': persentase_penyakit,
+        'keterangan': keterangan,
+        'mask_green': mask_green,
+        'mask_disease': mask_disease,
+        'luas_daun': total_leaf_pixels,
+        'luas_bercak': disease_pixels
+    }
+
+
+def tentukan_tingkat(persentase_penyakit):
+    """Tingkat kesehatan, kelas CSS, dan keterangan untuk persentase bercak"""
+    if persentase_penyakit < 5:
+        return "SEHAT", "status-sehat", "Daun dalam kondisi baik"
+    elif persentase_penyakit < 15:
+        return "TERINFEKSI RINGAN", "status-ringan", "Bercak penyakit mulai muncul"
+    elif persentase_penyakit < 30:
+        return "TERINFEKSI SEDANG", "status-sedang", "Perlu penanganan segera"
+    return "TERINFEKSI PARAH", "status-parah", "Kondisi kritis, butuh treatment intensif"
+
+
+def deteksi_bercak_penyakit(img_rgb, warna_dasar="Hijau (Default)", sensitivitas=5,
+                            metode_warna="opencv", mask_daun=None):
+    """Deteksi bercak penyakit pada daun berdasarkan analisis warna dan tekstur"""
+    mask_healthy, mask_disease = mask_warna(img_rgb, warna_dasar, metode=metode_warna,
+                                            mask_daun=mask_daun)
+    mask_disease = morfologi_sensitivitas(mask_disease, sensitivitas)
+    total_area = img_rgb.shape[0] * img_rgb.shape[1]
+    mask_disease = filter_bercak(mask_disease, total_area)
+    return klasifikasi_kesehatan(mask_healthy, mask_disease)
+
+
+def siapkan_citra(img_array, salin_rgb=True):
+    """Siapkan pasangan citra RGB dan grayscale dari array input.
+
+    Dengan ``salin_rgb=False`` citra RGB input dipakai langsung (hanya dibaca,
+    tidak ikut dikembalikan ke pemanggil).
+    """
+    with tahap('konversi_gray'):
+        if len(img_array.shape) == 3:
+            img_rgb = lindungi(img_array, 'original') if salin_rgb else img_array
+            gray_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        else:
+            gray_img = img_array
+            img_rgb = cv2.cvtColor(gray_img, cv2.COLOR_GRAY2RGB)
+    return img_rgb, gray_img
+
+
+def filter_median(gray_img):
+    """Enhancement: median filtering untuk reduksi noise"""
+    with tahap('median_blur'):
+        return per_piksel(lambda gray: cv2.medianBlur(gray, 5), gray_img, halo=2)
+
+
+def threshold_otsu(median_filtered):
+    """Segmentasi: Otsu's thresholding"""
+    with tahap('otsu'):
+        _, binary_img = cv2.threshold(median_filtered, 0, 255, 
+                                       cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary_img
+
+
+def closing_daun(binary_img):
+    """Morfologi: closing untuk mengisi lubang"""
+    kernel = np.ones((7, 7), np.uint8)
+    with tahap('closing'):
+        return per_piksel(lambda biner: cv2.morphologyEx(biner, cv2.MORPH_CLOSE, kernel),
+                          binary_img, halo=6)
+
+
+def deteksi_tepi(morph_img):
+    """Edge detection dengan Canny"""
+    with tahap('canny'):
+        return cv2.Canny(morph_img, 50, 150)
+
+
+def ekstraksi_kontur(img_rgb, morph_img, dengan_segmentasi=True):
+    """Ambil kontur daun terbesar beserta luas dan citra tersegmentasi"""
+    with tahap('find_contours'):
+        contours, _ = cv2.findContours(morph_img, cv2.RETR_EXTERNAL, 
+                                         cv2.CHAIN_APPROX_SIMPLE)
+    
+    cnt = None
+    luas_daun = 0
+    if len(contours) > 0:
+        # Ambil kontur terbesar (daun)
+        cnt = max(contours, key=cv2.contourArea)
+        luas_daun = cv2.contourArea(cnt)
+    if not dengan_segmentasi:
+        return cnt, luas_daun, None
+    if cnt is None:
+        return cnt, luas_daun, lindungi(img_rgb, 'segmented')
+    
+    with tahap('segmentasi_mask'):
+        # Buat mask untuk segmentasi daun
+        mask = np.zeros(morph_img.shape, dtype=np.uint8)
+        cv2.drawContours(mask, [cnt], -1, 255, -1)
+        
+        # Terapkan mask ke gambar original
+        segmented_img = cv2.bitwise_and(img_rgb, img_rgb, mask=mask)
+    
+    return cnt, luas_daun, segmented_img
+
+
+# Kontur dengan luas di bawah fraksi frame ini dianggap noise, bukan daun
+LUAS_MIN_DAUN = 0.001
+
+
+def label_daun(morph_img, luas_min=None):
+    """Citra label int32 (0 = background, i = daun ke-i) dari semua kontur daun.
+
+    Daun diurutkan dari yang terluas. Kontur diisi penuh sehingga lubang
+    di dalam daun (mis. bercak gelap yang lolos Otsu) tetap milik daunnya.
+    """
+    if luas_min is None:
+        luas_min = morph_img.shape[0] * morph_img.shape[1] * LUAS_MIN_DAUN
+    with tahap('find_contours'):
+        contours, _ = cv2.findContours(morph_img, cv2.RETR_EXTERNAL,
+                                       cv2.CHAIN_APPROX_SIMPLE)
+    luas = [cv2.contourArea(c) for c in contours]
+    urutan = sorted((i for i in range(len(contours)) if luas[i] >= luas_min),
+                    key=lambda i: -luas[i])
+    kontur = [contours[i] for i in urutan]
+    
+    with tahap('label_daun'):
+        # Mengisi kontur hanya menyentuh piksel di dalam bounding box-nya
+        labels = np.zeros(morph_img.shape, dtype=np.int32)
+        for nomor, cnt in enumerate(kontur, start=1):
+            cv2.drawContours(labels, [cnt], -1, nomor, -1)
+    return labels, kontur
+
+
+def statistik_per_daun(labels, kontur, mask_green, mask_disease):
+    """Persentase bercak dan tingkat kesehatan setiap daun dari citra label"""
+    n = len(kontur)
+    with tahap('hitung_per_daun'):
+        # Satu lintasan per mask: jumlah piksel per label, bukan mask penuh per daun
+        luas_sehat = np.bincount(labels[mask_green > 0], minlength=n + 1)
+        luas_bercak = np.bincount(labels[mask_disease > 0], minlength=n + 1)
+    
+    daun = []
+    for nomor, cnt in enumerate(kontur, start=1):
+        x, y, w, h = cv2.boundingRect(cnt)
+        momen = cv2.moments(cnt)
+        if momen['m00'] > 0:
+            pusat = (momen['m10'] / momen['m00'], momen['m01'] / momen['m00'])
+        else:
+            pusat = (x + w / 2, y + h / 2)
+        sehat, bercak = int(luas_sehat[nomor]), int(luas_bercak[nomor])
+        persentase_penyakit = bercak / sehat * 100 if sehat > 0 else 0
+        tingkat, status_class, _ = tentukan_tingkat(persentase_penyakit)
+        daun.append({
+            'daun': nomor,
+            'bbox': (x, y, w, h),
+            'pusat': pusat,
+            'luas_kontur': cv2.contourArea(cnt),
+            'luas_sehat': sehat,
+            'luas_bercak': bercak,
+            'persentase_penyakit': persentase_penyakit,
+            'tingkat': tingkat,
+            'status_class': status_class,
+        })
+    return daun
+
+
+def analisis_per_daun(morph_img, mask_green, mask_disease, luas_min=None):
+    """Statistik bercak untuk setiap kontur daun pada citra (mis. satu nampan daun)"""
+    labels, kontur = label_daun(morph_img, luas_min)
+    return statistik_per_daun(labels, kontur, mask_green, mask_disease)
+
+
+def segmentasi_daun(img_rgb, gray_img):
+    """Segmentasi daun dari background (tidak bergantung parameter kalibrasi)"""
+    median_filtered = filter_median(gray_img)
+    binary_img = threshold_otsu(median_filtered)
+    morph_img = closing_daun(binary_img)
+    edges = deteksi_tepi(morph_img)
+    cnt, luas_daun, segmented_img = ekstraksi_kontur(img_rgb, morph_img)
+    
+    return {
+        'filtered': median_filtered,
+        'binary': binary_img,
+        'morph': morph_img,
+        'edges': edges,
+        'kontur': cnt,
+        'segmented': segmented_img,
+        'luas_daun': luas_daun
+    }
+
+
+def buat_overlay(img_rgb, kontur, mask_disease):
+    """Gambar kontur daun (hijau) dan area bercak (merah) di atas citra"""
+    with tahap('overlay'):
+        if kontur is None:
+            return lindungi(img_rgb, 'overlay')
+        output_img = salin(img_rgb, 'overlay')
+        cv2.drawContours(output_img, [kontur], -1, (0, 255, 0), 3)
+        
+        # Overlay bercak penyakit dengan warna merah. Hanya channel merah yang
+        # berubah, jadi addWeighted cukup pada satu channel (tanpa citra merah penuh)
+        merah = cv2.addWeighted(cv2.extractChannel(output_img, 0), 1, mask_disease, 0.5, 0)
+        output_img[:, :, 0] = merah
+    return output_img
+
+
+def gabung_hasil(img_rgb, gray_img, segmentasi, hasil_penyakit, output_img):
+    """Susun dictionary hasil akhir seperti yang dipakai UI"""
+    return {
+        'original': img_rgb,
+        'gray': gray_img,
+        'filtered': segmentasi['filtered'],
+        'binary': segmentasi['binary'],
+        'morph': segmentasi['morph'],
+        'edges': segmentasi['edges'],
+        'segmented': segmentasi['segmented'],
+        'result': output_img,
+        'luas_daun': segmentasi['luas_daun'],
+        'penyakit_info': hasil_penyakit
+    }
+
+
+def perkecil_citra(img_array, resolusi_analisis=None):
+    """Perkecil citra agar sisi terpanjang <= resolusi_analisis; kembalikan (citra, skala)"""
+    if resolusi_analisis is not None and resolusi_analisis <= 0:
+        raise ValueError(f"resolusi_analisis harus > 0, bukan {resolusi_analisis}")
+    h, w = img_array.shape[:2]
+    if resolusi_analisis is None or max(h, w) <= resolusi_analisis:
+        return img_array, 1.0
+    skala = resolusi_analisis / max(h, w)
+    ukuran = (max(1, round(w * skala)), max(1, round(h * skala)))
+    with tahap('resize'):
+        return cv2.resize(img_array, ukuran, interpolation=cv2.INTER_AREA), skala
+
+
+def skalakan_hasil(hasil, bentuk_asli, upsample_mask=False, bentuk_analisis=None):
+    """Konversi luas hasil analisis resolusi rendah ke satuan piksel resolusi asli.
+
+    Persentase bercak adalah rasio sehingga tidak berubah. Dictionary hasil
+    tidak dimodifikasi (aman untuk hasil yang berasal dari cache).
+    ``bentuk_analisis`` dipakai jika hasil tidak membawa mask (mis. hasil
+    dari penyimpanan tanpa mask).
+    """
+    h, w = bentuk_asli[:2]
+    info = dict(hasil['penyakit_info'])
+    if bentuk_analisis is None:
+        bentuk_analisis = info['mask_disease'].shape
+    hs, ws = bentuk_analisis[:2]
+    faktor = (h * w) / (hs * ws)
+
+    info['luas_daun'] = int(round(info['luas_daun'] * faktor))
+    info['luas_bercak'] = int(round(info['luas_bercak'] * faktor))
+    if upsample_mask and (hs, ws) != (h, w):
+        # Nearest neighbour menjaga mask tetap biner
+        info['mask_disease'] = cv2.resize(info['mask_disease'], (w, h),
+                                          interpolation=cv2.INTER_NEAREST)
+        info['mask_green'] = cv2.resize(info['mask_green'], (w, h),
+                                        interpolation=cv2.INTER_NEAREST)
+
+    hasil = dict(hasil)
+    hasil['luas_daun'] = hasil['luas_daun'] * faktor
+    if 'per_daun' in hasil:
+        fx, fy = w / ws, h / hs
+        hasil['per_daun'] = [
+            dict(d,
+                 bbox=tuple(int(round(v * f)) for v, f in zip(d['bbox'], (fx, fy, fx, fy))),
+                 pusat=(d['pusat'][0] * fx, d['pusat'][1] * fy),
+                 luas_kontur=d['luas_kontur'] * faktor,
+                 luas_sehat=int(round(d['luas_sehat'] * faktor)),
+                 luas_bercak=int(round(d['luas_bercak'] * faktor)))
+            for d in hasil['per_daun']
+        ]
+    hasil['penyakit_info'] = info
+    hasil['skala_analisis'] = (hs * ws / (h * w)) ** 0.5
+    return hasil
+
+
+def proses_citra(img_array, warna_dasar="Hijau (Default)", sensitivitas=5,
+                 keluaran=None, resolusi_analisis=None, upsample_mask=False,
+                 metode_warna="opencv", per_daun=False):
+    """Fungsi utama untuk memproses citra daun.
+
+    ``keluaran`` memilih citra mana dari KELUARAN_CITRA yang dikembalikan;
+    tahap yang hanya menghasilkan citra yang tidak diminta (Canny, citra
+    tersegmentasi, overlay) dilewati. ``None`` berarti semua citra, ``()``
+    berarti hanya angka (``luas_daun`` dan ``penyakit_info``).
+
+    ``resolusi_analisis`` membatasi sisi terpanjang citra yang dianalisis.
+    Luas dikembalikan dalam satuan piksel citra asli, citra keluaran tetap
+    beresolusi analisis, dan ``upsample_mask`` mengembalikan ``mask_disease``
+    serta ``mask_green`` ke ukuran asli untuk ditampilkan.
+
+    ``metode_warna`` memilih klasifikasi warna: ``"opencv"`` (HSV/LAB +
+    inRange) atau ``"lut"`` (lookup table RGB, hasil identik).
+
+    ``per_daun=True`` menambahkan ``'per_daun'``: daftar statistik bercak
+    untuk setiap kontur daun (lihat ``analisis_per_daun``), urut dari daun
+    terluas.
+    """
+    citra, skala = perkecil_citra(img_array, resolusi_analisis)
+    if skala == 1.0:
+        return _proses_citra_penuh(img_array, warna_dasar, sensitivitas, keluaran,
+                                   metode_warna, per_daun)
+    hasil = _proses_citra_penuh(citra, warna_dasar, sensitivitas, keluaran, metode_warna,
+                                per_daun)
+    return skalakan_hasil(hasil, img_array.shape, upsample_mask)
+
+
+def laporan_drift(img_array, warna_dasar="Hijau (Default)", sensitivitas=5,
+                  resolusi_analisis=1024):
+    """Bandingkan hasil analisis resolusi rendah dengan resolusi penuh"""
+    mulai = time.perf_counter()
+    penuh = proses_citra(img_array, warna_dasar, sensitivitas, keluaran=())
+    waktu_penuh = time.perf_counter() - mulai
+
+    mulai = time.perf_counter()
+    rendah = proses_citra(img_array, warna_dasar, sensitivitas, keluaran=(),
+                          resolusi_analisis=resolusi_analisis)
+    waktu_rendah = time.perf_counter() - mulai
+
+    p_penuh = float(penuh['penyakit_info']['persentase_penyakit'])
+    p_rendah = float(rendah['penyakit_info']['persentase_penyakit'])
+    return {
+        'resolusi_analisis': resolusi_analisis,
+        'skala_analisis': rendah.get('skala_analisis', 1.0),
+        'persentase_penuh': p_penuh,
+        'persentase_analisis': p_rendah,
+        'drift_persentase': p_rendah - p_penuh,
+        'tingkat_penuh': penuh['penyakit_info']['tingkat'],
+        'tingkat_analisis': rendah['penyakit_info']['tingkat'],
+        'tingkat_sama': penuh['penyakit_info']['tingkat'] == rendah['penyakit_info']['tingkat'],
+        'waktu_penuh': waktu_penuh,
+        'waktu_analisis': waktu_rendah,
+        'percepatan': waktu_penuh / max(waktu_rendah, 1e-9),
+    }
+
+
+def _proses_citra_penuh(img_array, warna_dasar, sensitivitas, keluaran,
+                        metode_warna="opencv", per_daun=False):
+    keluaran = set(KELUARAN_CITRA if keluaran is None else keluaran)
+    tidak_dikenal = keluaran - set(KELUARAN_CITRA)
+    if tidak_dikenal:
+        raise ValueError(f"Keluaran tidak dikenal: {sorted(tidak_dikenal)}")
+    
+    # Citra input hanya dibaca, jadi salinan RGB hanya dibuat jika diminta
+    img_rgb, gray_img = siapkan_citra(img_array, salin_rgb='original' in keluaran)
+    
+    # Segmentasi daun dulu: mask daun dipakai kalibrasi MODE_OTOMATIS
+    median_filtered = filter_median(gray_img)
+    binary_img = threshold_otsu(median_filtered)
+    morph_img = closing_daun(binary_img)
+    
+    hasil_penyakit = deteksi_bercak_penyakit(img_rgb, warna_dasar, sensitivitas,
+                                             metode_warna, morph_img)
+    hasil = {'penyakit_info': hasil_penyakit}
+    
+    cnt, luas_daun, segmented_img = ekstraksi_kontur(
+        img_rgb, morph_img, dengan_segmentasi='segmented' in keluaran)
+    hasil['luas_daun'] = luas_daun
+    
+    tersedia = {
+        'original': img_rgb,
+        'gray': gray_img,
+        'filtered': median_filtered,
+        'binary': binary_img,
+        'morph': morph_img,
+        'segmented': segmented_img,
+    }
+    for nama, nilai in tersedia.items():
+        if nama in keluaran:
+            hasil[nama] = nilai
+    if 'edges' in keluaran:
+        hasil['edges'] = deteksi_tepi(morph_img)
+    if 'result' in keluaran:
+        hasil['result'] = buat_overlay(img_rgb, cnt, hasil_penyakit['mask_disease'])
+    if per_daun:
+        hasil['per_daun'] = analisis_per_daun(morph_img, hasil_penyakit['mask_green'],
+                                              hasil_penyakit['mask_disease'])
+    return hasil
@@ -0,0 +1,145 @@
+"""Instrumentasi waktu dan memori per tahap pipeline.
+
+Fungsi pipeline membungkus setiap operasi penting dengan ``tahap(nama)``.
+Tanpa profiler aktif, ``tahap`` tidak melakukan apa-apa. Di dalam
+``with rekam_profil() as profil:`` setiap tahap dicatat ke ``profil.catatan``
+berisi waktu wall-clock serta memori yang dialokasikan (via tracemalloc,
+yang juga melacak buffer array NumPy/OpenCV).
+
+Salinan data citra yang disengaja (``.copy()`` sebelum tahap yang menulis,
+decode ke array) dicatat lewat ``catat_salinan`` ke ``profil.salinan``,
+sehingga setiap pemanggilan bisa melaporkan berapa byte yang disalin.
+
+Catatan: tracemalloc bersifat global per proses, jadi angka memori hanya
+akurat jika satu profil direkam pada satu waktu di proses tersebut. Profil
+yang mengukur memori karena itu dijalankan bergiliran (lock tingkat modul);
+alokasi thread lain yang tidak diprofil tetap ikut terhitung.
+"""
+import contextlib
+import contextvars
+import json
+import platform
+import threading
+import time
+import tracemalloc
+
+_profil_aktif = contextvars.ContextVar('profil_aktif', default=None)
+_TANPA_PROFIL = contextlib.nullcontext()
+# Dipegang selama satu profil mengukur memori (tracemalloc global per proses)
+_lock_memori = threading.Lock()
+
+KOLOM_PROFIL = ['tahap', 'kedalaman', 'detik', 'memori_byte', 'memori_puncak_byte']
+
+
+class Profil:
+    """Rekaman profil satu pemanggilan pipeline"""
+
+    def __init__(self, ukur_memori=True, keterangan=None):
+        self.ukur_memori = ukur_memori
+        self.keterangan = dict(keterangan or {})
+        self.catatan = []
+        self.salinan = []
+        self.total_detik = 0.0
+        self._tumpukan = []
+
+    @contextlib.contextmanager
+    def tahap(self, nama):
+        # Entri dicatat saat tahap dimulai agar urutan induk mendahului anaknya
+        entri = {'tahap': nama, 'kedalaman': len(self._tumpukan), 'detik': None,
+                 'memori_byte': None, 'memori_puncak_byte': None}
+        self.catatan.append(entri)
+        bingkai = {'tahap': nama, 'puncak': 0}
+        if self.ukur_memori:
+            awal, _ = tracemalloc.get_traced_memory()
+            bingkai['awal'] = awal
+            tracemalloc.reset_peak()
+        self._tumpukan.append(bingkai)
+        mulai = time.perf_counter()
+        try:
+            yield
+        finally:
+            entri['detik'] = time.perf_counter() - mulai
+            self._tumpukan.pop()
+            if self.ukur_memori:
+                sekarang, puncak = tracemalloc.get_traced_memory()
+                # Teruskan puncak ke tahap induk sebelum reset_peak menghapusnya
+                for luar in self._tumpukan:
+                    luar['puncak'] = max(luar['puncak'], puncak)
+                puncak = max(bingkai['puncak'], puncak)
+                entri['memori_byte'] = sekarang - bingkai['awal']
+                entri['memori_puncak_byte'] = puncak - bingkai['awal']
+                tracemalloc.reset_peak()
+
+    def catat_salinan(self, nama, jumlah_byte):
+        tahap_aktif = self._tumpukan[-1]['tahap'] if self._tumpukan else None
+        self.salinan.append({'salinan': nama, 'tahap': tahap_aktif,
+                             'byte': int(jumlah_byte)})
+
+    @property
+    def total_salinan_byte(self):
+        return sum(entri['byte'] for entri in self.salinan)
+
+    def ringkasan(self):
+        """Total waktu per nama tahap"""
+        hasil = {}
+        for entri in self.catatan:
+            hasil[entri['tahap']] = hasil.get(entri['tahap'], 0.0) + entri['detik']
+        return hasil
+
+    def ke_dict(self):
+        return {
+            'waktu': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'keterangan': self.keterangan,
+            'total_detik': self.total_detik,
+            'total_salinan_byte': self.total_salinan_byte,
+            'tahap': list(self.catatan),
+            'salinan': list(self.salinan),
+        }
+
+    def ke_json(self, **kwargs):
+        return json.dumps(self.ke_dict(), default=str, **kwargs)
+
+    def simpan_jsonl(self, path):
+        """Tambahkan rekaman ini sebagai satu baris ke berkas JSON Lines"""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(self.ke_json() + '\n')
+
+
+@contextlib.contextmanager
+def rekam_profil(ukur_memori=True, **keterangan):
+    """Aktifkan profiler untuk semua pemanggilan pipeline di dalam blok with.
+
+    Dengan ``ukur_memori``, blok menunggu sampai tidak ada profil lain yang
+    sedang mengukur memori.
+    """
+    with _lock_memori if ukur_memori else _TANPA_PROFIL:
+        profil = Profil(ukur_memori, keterangan)
+        mulai_tracing = ukur_memori and not tracemalloc.is_tracing()
+        if mulai_tracing:
+            tracemalloc.start()
+        token = _profil_aktif.set(profil)
+        mulai = time.perf_counter()
+        try:
+            yield profil
+        finally:
+            profil.total_detik = time.perf_counter() - mulai
+            _profil_aktif.reset(token)
+            if mulai_tracing:
+                tracemalloc.stop()
+
+
+def tahap(nama):
+    """Context manager pencatat satu tahap; no-op jika tidak ada profiler aktif"""
+    profil = _profil_aktif.get()
+    if profil is None:
+        return _TANPA_PROFIL
+    return profil.tahap(nama)
+
+
+def catat_salinan(nama, jumlah_byte):
+    """Catat salinan data citra sebesar jumlah_byte; no-op jika tidak ada profiler aktif"""
+    profil = _profil_aktif.get()
+    if profil is not None:
+        profil.catat_salinan(nama, jumlah_byte)
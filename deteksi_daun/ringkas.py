@@ -0,0 +1,183 @@
+"""Representasi ringkas mask biner dan ekspor area bercak sebagai tabel komponen.
+
+Mask hasil pipeline (``binary``, ``morph``, ``edges``, ``mask_green``,
+``mask_disease``) adalah array uint8 0/255 seukuran citra, padahal isinya
+hanya satu bit per piksel dan biasanya berupa area besar yang rata.
+``MaskRingkas`` menyimpannya sebagai run-length (panjang run bergantian
+0/255, uint32) atau, untuk mask yang sangat berderau, bit-packed (8 piksel
+per byte); dipilih yang lebih kecil. Rekonstruksi selalu identik dengan
+mask asal.
+
+``tabel_bercak`` mengekspor setiap area bercak sebagai satu baris (bbox,
+luas, pusat, poligon) dari ``connectedComponentsWithStats``, dengan
+konektivitas yang sama seperti ``filter_bercak``.
+"""
+import struct
+import zlib
+
+import cv2
+import numpy as np
+
+# Mask 0/255 di hasil proses_citra dan di penyakit_info
+MASK_HASIL = ('binary', 'morph', 'edges')
+MASK_PENYAKIT = ('mask_green', 'mask_disease')
+
+# Header bytes: penanda, metode (0 = run-length, 1 = bit-packed), tinggi, lebar
+_HEADER = struct.Struct('<4sBII')
+_PENANDA = b'MRK1'
+_METODE = ('rle', 'bit')
+
+
+def _run_length(rata):
+    # Panjang run bergantian 0/255, selalu dimulai dari run 0 (boleh panjang 0)
+    batas = np.flatnonzero(rata[1:] != rata[:-1]) + 1
+    panjang = np.diff(np.concatenate(([0], batas, [rata.size])))
+    if rata.size and rata[0]:
+        panjang = np.concatenate(([0], panjang))
+    return panjang.astype(np.uint32)
+
+
+class MaskRingkas:
+    """Mask biner 0/255 dalam bentuk run-length atau bit-packed, rekonstruksi exact"""
+
+    __slots__ = ('bentuk', 'metode', 'data')
+
+    def __init__(self, bentuk, metode, data):
+        self.bentuk = tuple(bentuk)
+        self.metode = metode
+        self.data = data
+
+    @classmethod
+    def dari_array(cls, mask, metode=None):
+        """Ringkas mask 2D uint8 0/255; ``metode`` None memilih yang terkecil"""
+        if mask.ndim != 2 or mask.dtype != np.uint8:
+            raise ValueError("Mask harus array 2D uint8")
+        if cv2.countNonZero(cv2.inRange(mask, 1, 254)) > 0:
+            raise ValueError("Mask bukan biner 0/255, tidak bisa diringkas")
+        rata = mask.reshape(-1)
+        if metode is None or metode == 'rle':
+            run = _run_length(rata)
+            # 4 byte per run vs 1 byte per 8 piksel
+            if metode == 'rle' or run.nbytes <= (rata.size + 7) // 8:
+                return cls(mask.shape, 'rle', run)
+        elif metode != 'bit':
+            raise ValueError(f"Metode tidak dikenal: {metode!r} (pilihan: {', '.join(_METODE)})")
+        return cls(mask.shape, 'bit', np.packbits(rata))
+
+    def ke_array(self):
+        """Mask uint8 0/255 asli"""
+        if self.metode == 'rle':
+            nilai = np.zeros(len(self.data), dtype=np.uint8)
+            nilai[1::2] = 255
+            return np.repeat(nilai, self.data).reshape(self.bentuk)
+        mask = np.unpackbits(self.data, count=self.bentuk[0] * self.bentuk[1])
+        mask *= 255
+        return mask.reshape(self.bentuk)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def ke_bytes(self):
+        """Serialisasi untuk disk: header + data terkompresi zlib"""
+        header = _HEADER.pack(_PENANDA, _METODE.index(self.metode), *self.bentuk)
+        return header + zlib.compress(self.data.tobytes(), 1)
+
+    @classmethod
+    def dari_bytes(cls, data):
+        penanda, metode, h, w = _HEADER.unpack_from(data)
+        if penanda != _PENANDA:
+            raise ValueError("Bukan data MaskRingkas")
+        dtype = np.uint32 if _METODE[metode] == 'rle' else np.uint8
+        isi = np.frombuffer(zlib.decompress(data[_HEADER.size:]), dtype=dtype)
+        return cls((h, w), _METODE[metode], isi)
+
+    @staticmethod
+    def adalah_bytes(data):
+        return bytes(data[:len(_PENANDA)]) == _PENANDA
+
+    def __eq__(self, lain):
+        if not isinstance(lain, MaskRingkas):
+            return NotImplemented
+        return np.array_equal(self.ke_array(), lain.ke_array())
+
+    def __repr__(self):
+        return f"MaskRingkas(bentuk={self.bentuk}, metode={self.metode!r}, nbytes={self.nbytes})"
+
+
+def _ganti_mask(hasil, fungsi, tipe):
+    # Salinan dangkal hasil dengan mask (di level atas dan penyakit_info) diganti
+    hasil = dict(hasil)
+    for kunci in MASK_HASIL:
+        if isinstance(hasil.get(kunci), tipe):
+            hasil[kunci] = fungsi(hasil[kunci])
+    if 'penyakit_info' in hasil:
+        info = dict(hasil['penyakit_info'])
+        for kunci in MASK_PENYAKIT:
+            if isinstance(info.get(kunci), tipe):
+                info[kunci] = fungsi(info[kunci])
+        hasil['penyakit_info'] = info
+    return hasil
+
+
+def _ringkas_jika_biner(mask):
+    # Mask bernilai lain (mis. entri PNG 8-bit lama dari disk) tetap array
+    try:
+        return MaskRingkas.dari_array(mask)
+    except ValueError:
+        return mask
+
+
+def ringkas_hasil(hasil):
+    """Salinan hasil proses_citra dengan semua mask biner sebagai MaskRingkas"""
+    return _ganti_mask(hasil, _ringkas_jika_biner, np.ndarray)
+
+
+def pulihkan_hasil(hasil):
+    """Kebalikan ringkas_hasil: mask kembali menjadi array uint8 identik"""
+    return _ganti_mask(hasil, MaskRingkas.ke_array, MaskRingkas)
+
+
+def _poligon_komponen(mask, labels):
+    # Satu findContours untuk seluruh mask; cincin luar dipetakan ke labelnya
+    # lewat titik pertamanya, lubang mengikuti cincin luar induknya
+    contours, hierarki = cv2.findContours(mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    poligon = {}
+    if hierarki is None:
+        return poligon
+    induk = hierarki[0][:, 3]
+    label_luar = {}
+    for i in np.flatnonzero(induk < 0):
+        x, y = contours[i][0][0]
+        label_luar[i] = int(labels[y, x])
+        poligon[label_luar[i]] = [contours[i].reshape(-1, 2).tolist()]
+    for i in np.flatnonzero(induk >= 0):
+        poligon[label_luar[induk[i]]].append(contours[i].reshape(-1, 2).tolist())
+    return poligon
+
+
+def tabel_bercak(mask_disease, poligon=True, skala=1.0):
+    """Satu baris per area bercak: bbox, luas, pusat, dan poligon (cincin luar + lubang).
+
+    Statistik diambil dari ``connectedComponentsWithStats`` (konektivitas 8,
+    sama dengan ``filter_bercak``) sehingga setiap baris adalah satu
+    komponen yang lolos filter. ``skala`` adalah ``hasil['skala_analisis']``
+    untuk mask beresolusi analisis; koordinat dan luas dikonversi ke piksel
+    citra asli.
+    """
+    jumlah, labels, stats, pusat = cv2.connectedComponentsWithStats(mask_disease, connectivity=8)
+    cincin = _poligon_komponen(mask_disease, labels) if poligon else {}
+    bercak = []
+    for nomor in range(1, jumlah):
+        x, y, w, h, luas = (int(v) for v in stats[nomor])
+        baris = {
+            'bercak': nomor,
+            'bbox': tuple(int(round(v / skala)) for v in (x, y, w, h)),
+            'luas': int(round(luas / skala ** 2)),
+            'pusat': (float(pusat[nomor][0] / skala), float(pusat[nomor][1] / skala)),
+        }
+        if poligon:
+            baris['poligon'] = [[[round(px / skala), round(py / skala)] for px, py in c]
+                                for c in cincin.get(nomor, [])]
+        bercak.append(baris)
+    return bercak
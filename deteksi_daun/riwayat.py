@@ -0,0 +1,139 @@
+"""Riwayat per tanaman: ringkasan analisis foto harian untuk memantau perkembangan infeksi.
+
+Setiap foto disimpan sebagai satu ringkasan kecil (angka ``penyakit_info``,
+waktu foto, parameter kalibrasi, dan thumbnail overlay JPEG) per pasangan
+(tanaman, hash konten). Tampilan riwayat dan grafik tren hanya membaca
+ringkasan ini, sehingga foto lama tidak pernah diproses ulang. Berbeda
+dengan ``PenyimpananHasil``, riwayat tidak pernah di-evict otomatis.
+"""
+import io
+import os
+import time
+from datetime import datetime
+
+import cv2
+
+from .penyimpanan import PATH_PENYIMPANAN, BasisSqlite
+
+PATH_RIWAYAT = os.environ.get(
+    'DETEKSI_DAUN_RIWAYAT', os.path.join(os.path.dirname(PATH_PENYIMPANAN), 'riwayat.sqlite'))
+
+# Urutan tingkat kesehatan untuk grafik tren (0 = sehat, 3 = parah)
+URUTAN_TINGKAT = {
+    "SEHAT": 0,
+    "TERINFEKSI RINGAN": 1,
+    "TERINFEKSI SEDANG": 2,
+    "TERINFEKSI PARAH": 3,
+}
+
+UKURAN_THUMBNAIL = 256
+
+_SKEMA = """
+CREATE TABLE IF NOT EXISTS riwayat (
+    tanaman TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    nama TEXT,
+    waktu REAL NOT NULL,
+    warna_dasar TEXT NOT NULL,
+    sensitivitas INTEGER NOT NULL,
+    resolusi_analisis INTEGER,
+    tingkat TEXT NOT NULL,
+    status_class TEXT NOT NULL,
+    persentase_penyakit REAL NOT NULL,
+    luas_daun REAL NOT NULL,
+    luas_bercak INTEGER NOT NULL,
+    thumbnail BLOB,
+    PRIMARY KEY (tanaman, hash)
+);
+CREATE INDEX IF NOT EXISTS riwayat_waktu ON riwayat (tanaman, waktu);
+"""
+
+_KOLOM = ('tanaman', 'hash', 'nama', 'waktu', 'warna_dasar', 'sensitivitas',
+          'resolusi_analisis', 'tingkat', 'status_class', 'persentase_penyakit',
+          'luas_daun', 'luas_bercak', 'thumbnail')
+
+
+def waktu_foto(data):
+    """Waktu pengambilan foto dari EXIF (DateTimeOriginal/DateTime) sebagai timestamp, atau None"""
+    from PIL import Image
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            exif = image.getexif()
+            teks = exif.get_ifd(0x8769).get(36867) or exif.get(306)
+        return datetime.strptime(str(teks).strip('\x00 '), "%Y:%m:%d %H:%M:%S").timestamp()
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def thumbnail_jpeg(img_rgb, ukuran=UKURAN_THUMBNAIL):
+    """Thumbnail JPEG (bytes) dari citra RGB, sisi terpanjang ``ukuran`` piksel"""
+    h, w = img_rgb.shape[:2]
+    skala = min(1.0, ukuran / max(h, w))
+    kecil = cv2.resize(img_rgb, (max(1, round(w * skala)), max(1, round(h * skala))),
+                       interpolation=cv2.INTER_AREA)
+    ok, jpeg = cv2.imencode('.jpg', cv2.cvtColor(kecil, cv2.COLOR_RGB2BGR),
+                            [cv2.IMWRITE_JPEG_QUALITY, 80])
+    if not ok:
+        raise ValueError("Gagal membuat thumbnail")
+    return jpeg.tobytes()
+
+
+def ringkasan_hasil(hasil):
+    """Ringkasan angka hasil proses_citra/AnalisisCache.proses plus thumbnail overlay"""
+    info = hasil['penyakit_info']
+    ringkasan = {
+        'tingkat': info['tingkat'],
+        'status_class': info['status_class'],
+        'persentase_penyakit': float(info['persentase_penyakit']),
+        'luas_daun': float(hasil['luas_daun']),
+        'luas_bercak': int(info['luas_bercak']),
+        'thumbnail': None,
+    }
+    if 'result' in hasil:
+        ringkasan['thumbnail'] = thumbnail_jpeg(hasil['result'])
+    return ringkasan
+
+
+class RiwayatTanaman(BasisSqlite):
+    """Riwayat ringkasan analisis per tanaman (SQLite, aman untuk banyak proses)"""
+
+    def __init__(self, path=PATH_RIWAYAT, batas_waktu=30.0):
+        super().__init__(path, _SKEMA, batas_waktu)
+
+    def simpan(self, tanaman, hash_citra, ringkasan, nama=None, waktu=None,
+               warna_dasar="Hijau (Default)", sensitivitas=5, resolusi_analisis=None):
+        """Simpan/ganti ringkasan satu foto; ``waktu`` default saat ini"""
+        baris = dict(ringkasan, tanaman=tanaman, hash=hash_citra, nama=nama,
+                     waktu=time.time() if waktu is None else waktu,
+                     warna_dasar=warna_dasar, sensitivitas=int(sensitivitas),
+                     resolusi_analisis=resolusi_analisis)
+        with self._transaksi() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO riwayat ({', '.join(_KOLOM)}) "
+                         f"VALUES ({', '.join('?' * len(_KOLOM))})",
+                         tuple(baris[k] for k in _KOLOM))
+
+    def parameter_tersimpan(self, tanaman):
+        """{hash: (warna_dasar, sensitivitas, resolusi_analisis)} semua foto tanaman"""
+        return {h: (w, s, r) for h, w, s, r in self._koneksi().execute(
+            "SELECT hash, warna_dasar, sensitivitas, resolusi_analisis FROM riwayat "
+            "WHERE tanaman = ?", (tanaman,))}
+
+    def daftar_tanaman(self):
+        return [t for (t,) in self._koneksi().execute(
+            "SELECT DISTINCT tanaman FROM riwayat ORDER BY tanaman")]
+
+    def ringkasan(self, tanaman, dengan_thumbnail=False):
+        """Ringkasan semua foto tanaman, urut waktu foto"""
+        kolom = _KOLOM if dengan_thumbnail else _KOLOM[:-1]
+        return [dict(zip(kolom, baris)) for baris in self._koneksi().execute(
+            f"SELECT {', '.join(kolom)} FROM riwayat WHERE tanaman = ? ORDER BY waktu",
+            (tanaman,))]
+
+    def hapus(self, tanaman, hash_citra=None):
+        """Hapus riwayat satu tanaman, atau satu fotonya saja"""
+        with self._transaksi() as conn:
+            if hash_citra is None:
+                conn.execute("DELETE FROM riwayat WHERE tanaman = ?", (tanaman,))
+            else:
+                conn.execute("DELETE FROM riwayat WHERE tanaman = ? AND hash = ?",
+                             (tanaman, hash_citra))
@@ -0,0 +1,335 @@
+"""Layanan HTTP lokal untuk analisis daun (tanpa Streamlit).
+
+Endpoint:
+
+- ``POST /analisis?warna_dasar=...&sensitivitas=5&mask=1`` dengan body
+  bytes citra (PNG/JPEG). Balasan JSON berisi metrik
+  ``deteksi_bercak_penyakit``; dengan ``mask=1`` juga ``mask_disease``
+  sebagai PNG base64.
+- ``GET /metrics``: kedalaman antrian, jumlah batch yang sedang diproses,
+  dan penghitung request.
+- ``GET /sehat``: health check.
+
+Request masuk ke antrian berbatas. Jika antrian penuh, server langsung
+membalas 503 (backpressure) alih-alih menumpuk pekerjaan. Citra yang tidak
+bisa dibaca/dianalisis dibalas 422; kegagalan process pool atau worker
+(bukan salah citranya) dibalas 503 dengan ``Retry-After`` agar klien
+mencoba lagi, dan galat internal lain 500. Sebuah thread
+dispatcher menggabungkan request yang datang berdekatan menjadi satu batch
+dan mengirimnya ke process pool yang dibuat sekali saat startup, sehingga
+modul pipeline tidak pernah dimuat ulang per request.
+"""
+import base64
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+
+from .cache import decode_citra
+from .eksekusi import atur_backend, backend_aktif
+from .pipeline import PILIHAN_WARNA_DASAR, proses_citra
+
+UKURAN_BODY_MAKS = 50 * 1024 * 1024
+
+# Galat yang berarti citranya sendiri rusak/tidak valid (PIL: OSError)
+GALAT_CITRA = (ValueError, OSError, cv2.error)
+
+
+class GalatLayanan(RuntimeError):
+    """Kegagalan process pool/worker, bukan kesalahan citra; klien sebaiknya mencoba lagi"""
+
+
+def _init_worker(backend=("numpy", None)):
+    # Satu thread OpenCV per proses agar worker tidak saling berebut core
+    cv2.setNumThreads(1)
+    atur_backend(*backend)
+
+
+def _pemanasan():
+    return True
+
+
+def analisis_bytes(data, warna_dasar="Hijau (Default)", sensitivitas=5,
+                   resolusi_analisis=None, dengan_mask=False):
+    """Analisis bytes citra dan kembalikan dictionary yang bisa di-serialize JSON"""
+    hasil = proses_citra(decode_citra(data), warna_dasar, sensitivitas, keluaran=(),
+                         resolusi_analisis=resolusi_analisis)
+    info = hasil['penyakit_info']
+    keluaran = {
+        'tingkat': info['tingkat'],
+        'status_class': info['status_class'],
+        'keterangan': info['keterangan'],
+        'persentase_penyakit': float(info['persentase_penyakit']),
+        'luas_daun': float(hasil['luas_daun']),
+        'luas_piksel_sehat': int(info['luas_daun']),
+        'luas_bercak': int(info['luas_bercak']),
+    }
+    if dengan_mask:
+        ok, png = cv2.imencode('.png', info['mask_disease'])
+        if ok:
+            keluaran['mask_disease_png'] = base64.b64encode(png.tobytes()).decode('ascii')
+    return keluaran
+
+
+def _analisis_batch(permintaan):
+    # Dijalankan di worker: satu pesan IPC untuk beberapa citra sekaligus.
+    # Status 'citra' untuk citra yang tidak valid, 'internal' untuk galat lain
+    hasil = []
+    for kwargs in permintaan:
+        try:
+            hasil.append(('ok', analisis_bytes(**kwargs)))
+        except GALAT_CITRA as e:
+            hasil.append(('citra', f"{type(e).__name__}: {e}"))
+        except Exception as e:
+            hasil.append(('internal', f"{type(e).__name__}: {e}"))
+    return hasil
+
+
+class LayananAnalisis:
+    """Antrian berbatas + dispatcher batch di atas process pool"""
+
+    def __init__(self, jumlah_worker=2, antrian_maks=32, batch_maks=4,
+                 batch_tunggu=0.005):
+        self.jumlah_worker = jumlah_worker
+        self.batch_maks = batch_maks
+        self.batch_tunggu = batch_tunggu
+        self.antrian = queue.Queue(maxsize=antrian_maks)
+        self.pool = self._buat_pool()
+        # Slot batch yang sedang berjalan dibatasi jumlah worker, sisanya menunggu
+        # di antrian sehingga kedalaman antrian mencerminkan beban sebenarnya
+        self._slot = threading.BoundedSemaphore(jumlah_worker)
+        self._lock = threading.Lock()
+        self.statistik = {'diterima': 0, 'ditolak': 0, 'selesai': 0, 'gagal': 0,
+                          'gagal_layanan': 0, 'pool_dibuat_ulang': 0, 'batch': 0,
+                          'batch_berjalan': 0}
+        self._berhenti = threading.Event()
+
+        # Paksa semua worker start dan import modul sekarang, bukan saat request pertama
+        for f in [self.pool.submit(_pemanasan) for _ in range(jumlah_worker)]:
+            f.result()
+        self._dispatcher = threading.Thread(target=self._jalankan_dispatcher,
+                                            name="dispatcher-analisis", daemon=True)
+        self._dispatcher.start()
+
+    def _buat_pool(self):
+        return ProcessPoolExecutor(max_workers=self.jumlah_worker,
+                                   initializer=_init_worker,
+                                   initargs=(backend_aktif(),))
+
+    def _pulihkan_pool(self, pool_rusak):
+        # Pool yang rusak (worker mati) tidak bisa dipakai lagi; ganti sekali
+        # saja walaupun beberapa batch gagal bersamaan
+        with self._lock:
+            if self.pool is not pool_rusak:
+                return
+            self.pool = self._buat_pool()
+            self.statistik['pool_dibuat_ulang'] += 1
+        pool_rusak.shutdown(wait=False, cancel_futures=True)
+
+    def _tambah(self, kunci, n=1):
+        with self._lock:
+            self.statistik[kunci] += n
+
+    def ajukan(self, **kwargs):
+        """Masukkan request ke antrian; kembalikan Future atau None jika antrian penuh"""
+        future = Future()
+        try:
+            self.antrian.put_nowait((kwargs, future))
+        except queue.Full:
+            self._tambah('ditolak')
+            return None
+        self._tambah('diterima')
+        return future
+
+    def _jalankan_dispatcher(self):
+        while not self._berhenti.is_set():
+            try:
+                pertama = self.antrian.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._slot.acquire()
+            batch = [pertama]
+            batas_waktu = time.monotonic() + self.batch_tunggu
+            while len(batch) < self.batch_maks:
+                sisa = batas_waktu - time.monotonic()
+                try:
+                    batch.append(self.antrian.get(timeout=max(sisa, 0)) if sisa > 0
+                                 else self.antrian.get_nowait())
+                except queue.Empty:
+                    break
+            self._kirim(batch)
+
+    def _gagalkan(self, batch, pool, e):
+        # Kegagalan infrastruktur: semua request di batch dibalas GalatLayanan
+        if isinstance(e, BrokenProcessPool):
+            self._pulihkan_pool(pool)
+        self._tambah('gagal_layanan', len(batch))
+        for _, future in batch:
+            future.set_exception(GalatLayanan(f"{type(e).__name__}: {e}"))
+
+    def _kirim(self, batch):
+        self._tambah('batch')
+        self._tambah('batch_berjalan')
+        pool = self.pool
+        try:
+            future_pool = pool.submit(_analisis_batch, [kwargs for kwargs, _ in batch])
+        except RuntimeError as e:  # BrokenProcessPool atau pool sudah ditutup
+            self._slot.release()
+            self._tambah('batch_berjalan', -1)
+            self._gagalkan(batch, pool, e)
+            return
+
+        def selesai(f):
+            self._slot.release()
+            self._tambah('batch_berjalan', -1)
+            try:
+                hasil = f.result()
+            except Exception as e:  # Worker mati, pool rusak, dsb.
+                self._gagalkan(batch, pool, e)
+                return
+            for (_, future), (status, nilai) in zip(batch, hasil):
+                if status == 'ok':
+                    self._tambah('selesai')
+                    future.set_result(nilai)
+                else:
+                    self._tambah('gagal')
+                    future.set_exception(ValueError(nilai) if status == 'citra'
+                                         else RuntimeError(nilai))
+
+        future_pool.add_done_callback(selesai)
+
+    def metrik(self):
+        with self._lock:
+            statistik = dict(self.statistik)
+        statistik.update({
+            'kedalaman_antrian': self.antrian.qsize(),
+            'antrian_maks': self.antrian.maxsize,
+            'jumlah_worker': self.jumlah_worker,
+            'batch_maks': self.batch_maks,
+        })
+        return statistik
+
+    def tutup(self):
+        self._berhenti.set()
+        self._dispatcher.join(timeout=1)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    layanan = None
+    batas_waktu = 60.0
+    server_version = "DeteksiDaun/1.0"
+
+    def _balas_json(self, status, isi, header=None):
+        data = json.dumps(isi).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for nama, nilai in (header or {}).items():
+            self.send_header(nama, nilai)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        jalur = urlparse(self.path).path
+        if jalur == '/metrics':
+            self._balas_json(200, self.layanan.metrik())
+        elif jalur == '/sehat':
+            self._balas_json(200, {'status': 'ok'})
+        else:
+            self._balas_json(404, {'galat': 'Endpoint tidak ditemukan'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/analisis':
+            self._balas_json(404, {'galat': 'Endpoint tidak ditemukan'})
+            return
+
+        panjang = int(self.headers.get('Content-Length') or 0)
+        if panjang <= 0:
+            self._balas_json(400, {'galat': 'Body citra kosong'})
+            return
+        if panjang > UKURAN_BODY_MAKS:
+            self._balas_json(413, {'galat': 'Citra terlalu besar'})
+            return
+
+        param = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        warna_dasar = param.get('warna_dasar', PILIHAN_WARNA_DASAR[0])
+        if warna_dasar not in PILIHAN_WARNA_DASAR:
+            self._balas_json(400, {'galat': f"warna_dasar harus salah satu dari "
+                                            f"{PILIHAN_WARNA_DASAR}"})
+            return
+        try:
+            sensitivitas = int(param.get('sensitivitas', 5))
+            resolusi = param.get('resolusi_analisis')
+            resolusi_analisis = int(resolusi) if resolusi else None
+        except ValueError:
+            self._balas_json(400, {'galat': 'sensitivitas/resolusi_analisis harus bilangan bulat'})
+            return
+        if not 1 <= sensitivitas <= 10:
+            self._balas_json(400, {'galat': 'sensitivitas harus 1-10'})
+            return
+        if resolusi_analisis is not None and resolusi_analisis <= 0:
+            self._balas_json(400, {'galat': 'resolusi_analisis harus > 0'})
+            return
+        dengan_mask = param.get('mask', '0').lower() in ('1', 'true', 'ya')
+
+        data = self.rfile.read(panjang)
+        future = self.layanan.ajukan(data=data, warna_dasar=warna_dasar,
+                                     sensitivitas=sensitivitas,
+                                     resolusi_analisis=resolusi_analisis,
+                                     dengan_mask=dengan_mask)
+        if future is None:
+            self._balas_json(503, {'galat': 'Antrian penuh, coba lagi'},
+                             header={'Retry-After': '1'})
+            return
+        try:
+            hasil = future.result(timeout=self.batas_waktu)
+        except TimeoutError:
+            self._balas_json(504, {'galat': 'Analisis melebihi batas waktu'})
+            return
+        except ValueError as e:
+            self._balas_json(422, {'galat': str(e)})
+            return
+        except GalatLayanan as e:
+            self._balas_json(503, {'galat': f"Worker analisis gagal, coba lagi ({e})"},
+                             header={'Retry-After': '1'})
+            return
+        except RuntimeError as e:
+            self._balas_json(500, {'galat': str(e)})
+            return
+        self._balas_json(200, hasil)
+
+    def log_message(self, format, *args):
+        sys.stderr.write("%s - %s\n" % (self.address_string(), format % args))
+
+
+def buat_server(host="127.0.0.1", port=8080, jumlah_worker=2, antrian_maks=32,
+                batch_maks=4, batch_tunggu=0.005, batas_waktu=60.0):
+    """Buat ThreadingHTTPServer beserta LayananAnalisis-nya (belum dijalankan)"""
+    layanan = LayananAnalisis(jumlah_worker, antrian_maks, batch_maks, batch_tunggu)
+    handler = type('Handler', (_Handler,), {'layanan': layanan,
+                                            'batas_waktu': batas_waktu})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, layanan
+
+
+def jalankan_server(host="127.0.0.1", port=8080, **kwargs):
+    server, layanan = buat_server(host, port, **kwargs)
+    print(f"Layanan analisis daun berjalan di http://{host}:{server.server_port} "
+          f"({layanan.jumlah_worker} worker)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        layanan.tutup()
@@ -0,0 +1,262 @@
+"""Mode stream: analisis frame dari berkas video, kamera, atau urutan citra.
+
+Frame dibaca ke buffer yang sama terus-menerus (dekode video, konversi
+BGR->RGB, resize ke resolusi analisis, dan grayscale tidak mengalokasikan
+array baru per frame). Dengan ``waktu_nyata=True`` pembacaan mengikuti jam
+sumber: jika analisis tertinggal, frame yang sudah lewat dilewati (untuk
+video cukup ``grab()`` tanpa konversi warna) alih-alih menumpuk antrian.
+
+Segmentasi daun (median, Otsu, closing, kontur) hanya bergantung pada
+bentuk daun. Jika thumbnail grayscale frame nyaris sama dengan frame
+terakhir yang disegmentasi, kontur daun frame itu dipakai ulang; analisis
+warna bercak tetap dijalankan setiap frame.
+"""
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from .batch import EKSTENSI_CITRA, kumpulkan_berkas, tulis_hasil
+from .pipeline import (closing_daun, deteksi_bercak_penyakit, ekstraksi_kontur,
+                       filter_median, skalakan_hasil, threshold_otsu)
+from .profil import tahap
+
+KOLOM_STREAM = ['frame', 'detik_sumber', 'tingkat', 'persentase_penyakit',
+                'luas_daun', 'luas_bercak', 'kontur_ulang']
+
+# Sisi terpanjang thumbnail untuk mendeteksi perubahan adegan
+UKURAN_THUMBNAIL = 64
+
+
+def _buka_video(sumber):
+    # Angka dianggap indeks kamera, selain itu path berkas video
+    if isinstance(sumber, int) or str(sumber).isdigit():
+        return cv2.VideoCapture(int(sumber)), True
+    return cv2.VideoCapture(str(sumber)), False
+
+
+def baca_frame(sumber, fps=None, waktu_nyata=True, statistik=None):
+    """Generator ``(indeks, detik_sumber, frame_rgb)`` dari video, kamera, atau citra.
+
+    ``sumber`` adalah path video, indeks kamera, atau daftar direktori/glob/
+    berkas citra (urutan citra). ``fps`` menimpa laju sumber; urutan citra
+    tanpa ``fps`` tidak pernah dilewati. Frame yang di-yield memakai buffer
+    yang sama, salin jika perlu disimpan. ``statistik`` (dict) diisi jumlah
+    frame dibaca dan dilewati.
+    """
+    if statistik is None:
+        statistik = {}
+    statistik.update({'frame_dibaca': 0, 'frame_dilewati': 0, 'fps_sumber': fps})
+
+    if isinstance(sumber, (list, tuple)) or (
+            isinstance(sumber, str) and (os.path.isdir(sumber) or glob.has_magic(sumber)
+                                         or sumber.lower().endswith(EKSTENSI_CITRA))):
+        berkas = kumpulkan_berkas([sumber] if isinstance(sumber, str) else sumber)
+        yield from _baca_urutan_citra(berkas, fps, waktu_nyata, statistik)
+        return
+
+    cap, kamera = _buka_video(sumber)
+    if not cap.isOpened():
+        raise ValueError(f"Sumber video tidak bisa dibuka: {sumber}")
+    if fps is None and not kamera:
+        fps = cap.get(cv2.CAP_PROP_FPS) or None
+        statistik['fps_sumber'] = fps
+    # Kamera memblok sampai frame berikutnya tersedia, jadi tidak perlu dijadwalkan
+    jadwal = waktu_nyata and fps and not kamera
+    bgr = rgb = None
+    indeks = 0
+    mulai = time.perf_counter()
+    try:
+        while True:
+            ok, bgr = cap.read(bgr)
+            if not ok:
+                break
+            statistik['frame_dibaca'] += 1
+            with tahap('konversi_frame'):
+                rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+            detik = (cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 if kamera
+                     else indeks / fps if fps else 0.0)
+            yield indeks, detik, rgb
+            indeks += 1
+
+            if jadwal:
+                # Lewati frame yang waktu tampilnya sudah lewat menurut jam dinding
+                target = int((time.perf_counter() - mulai) * fps)
+                while indeks < target and cap.grab():
+                    statistik['frame_dilewati'] += 1
+                    indeks += 1
+    finally:
+        cap.release()
+
+
+def _baca_urutan_citra(berkas, fps, waktu_nyata, statistik):
+    rgb = None
+    indeks = 0
+    mulai = time.perf_counter()
+    while indeks < len(berkas):
+        bgr = cv2.imread(berkas[indeks], cv2.IMREAD_COLOR)
+        if bgr is None:
+            statistik['frame_dilewati'] += 1
+            indeks += 1
+            continue
+        statistik['frame_dibaca'] += 1
+        if rgb is not None and rgb.shape != bgr.shape:
+            rgb = None
+        with tahap('konversi_frame'):
+            rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+        yield indeks, indeks / fps if fps else 0.0, rgb
+        indeks += 1
+
+        if waktu_nyata and fps:
+            target = min(int((time.perf_counter() - mulai) * fps), len(berkas))
+            if target > indeks:
+                statistik['frame_dilewati'] += target - indeks
+                indeks = target
+
+
+class AnalisisStream:
+    """Analisis frame berurutan dengan buffer tetap dan pemakaian ulang kontur daun.
+
+    ``ambang_perubahan`` adalah rata-rata selisih absolut thumbnail grayscale
+    (skala 0-255) terhadap frame terakhir yang disegmentasi; di bawah nilai
+    ini kontur lama dipakai ulang. ``0`` menonaktifkan pemakaian ulang.
+    ``maks_pakai_ulang`` membatasi berapa frame berturut-turut kontur yang
+    sama boleh dipakai sebelum segmentasi dihitung ulang.
+    """
+
+    def __init__(self, warna_dasar="Hijau (Default)", sensitivitas=5,
+                 resolusi_analisis=None, metode_warna="opencv",
+                 ambang_perubahan=0.5, maks_pakai_ulang=30):
+        self.warna_dasar = warna_dasar
+        self.sensitivitas = sensitivitas
+        self.resolusi_analisis = resolusi_analisis
+        self.metode_warna = metode_warna
+        self.ambang_perubahan = ambang_perubahan
+        self.maks_pakai_ulang = maks_pakai_ulang
+        self.kontur_dipakai_ulang = 0
+        self._buffer = {}
+        self._acuan = None  # (thumbnail, kontur, luas_daun, morph) frame tersegmentasi terakhir
+        self._pakai_ulang_beruntun = 0
+
+    def _ambil_buffer(self, nama, bentuk):
+        buffer = self._buffer.get(nama)
+        if buffer is None or buffer.shape != bentuk:
+            buffer = self._buffer[nama] = np.empty(bentuk, dtype=np.uint8)
+        return buffer
+
+    def _perkecil(self, frame):
+        h, w = frame.shape[:2]
+        if self.resolusi_analisis is None or max(h, w) <= self.resolusi_analisis:
+            return frame
+        skala = self.resolusi_analisis / max(h, w)
+        ukuran = (max(1, round(w * skala)), max(1, round(h * skala)))
+        tujuan = self._ambil_buffer('analisis', (ukuran[1], ukuran[0], 3))
+        with tahap('resize'):
+            return cv2.resize(frame, ukuran, dst=tujuan, interpolation=cv2.INTER_AREA)
+
+    def _thumbnail(self, gray):
+        h, w = gray.shape
+        skala = UKURAN_THUMBNAIL / max(h, w)
+        ukuran = (max(1, round(w * skala)), max(1, round(h * skala)))
+        tujuan = self._ambil_buffer('thumbnail', (ukuran[1], ukuran[0]))
+        return cv2.resize(gray, ukuran, dst=tujuan, interpolation=cv2.INTER_AREA)
+
+    def _kontur(self, img_rgb, gray):
+        """Kontur daun, luasnya, dan mask daun; dipakai ulang jika adegan tidak berubah"""
+        pakai_ulang = False
+        thumbnail = None
+        if self.ambang_perubahan > 0:
+            with tahap('cek_perubahan'):
+                thumbnail = self._thumbnail(gray)
+                if (self._acuan is not None
+                        and self._acuan[0].shape == thumbnail.shape
+                        and self._pakai_ulang_beruntun < self.maks_pakai_ulang):
+                    selisih = cv2.norm(thumbnail, self._acuan[0], cv2.NORM_L1) / thumbnail.size
+                    pakai_ulang = selisih < self.ambang_perubahan
+        if pakai_ulang:
+            self._pakai_ulang_beruntun += 1
+            self.kontur_dipakai_ulang += 1
+            return self._acuan[1], self._acuan[2], self._acuan[3], True
+
+        morph_img = closing_daun(threshold_otsu(filter_median(gray)))
+        cnt, luas_daun, _ = ekstraksi_kontur(img_rgb, morph_img, dengan_segmentasi=False)
+        if thumbnail is not None:
+            self._acuan = (thumbnail.copy(), cnt, luas_daun, morph_img)
+        self._pakai_ulang_beruntun = 0
+        return cnt, luas_daun, morph_img, False
+
+    def proses(self, frame_rgb):
+        """Analisis satu frame RGB; hasil setara ``proses_citra(..., keluaran=())``"""
+        img_rgb = self._perkecil(frame_rgb)
+        gray = self._ambil_buffer('gray', img_rgb.shape[:2])
+        with tahap('konversi_gray'):
+            cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY, dst=gray)
+
+        cnt, luas_daun, morph_img, kontur_ulang = self._kontur(img_rgb, gray)
+        hasil_penyakit = deteksi_bercak_penyakit(img_rgb, self.warna_dasar,
+                                                 self.sensitivitas, self.metode_warna,
+                                                 morph_img)
+        hasil = {'penyakit_info': hasil_penyakit, 'luas_daun': luas_daun,
+                 'kontur': cnt, 'kontur_ulang': kontur_ulang}
+        if img_rgb is not frame_rgb:
+            hasil = skalakan_hasil(hasil, frame_rgb.shape)
+        return hasil
+
+
+def jalankan_stream(sumber, path_keluaran=None, warna_dasar="Hijau (Default)",
+                    sensitivitas=5, resolusi_analisis=None, metode_warna="opencv",
+                    fps=None, waktu_nyata=True, ambang_perubahan=0.5,
+                    maks_frame=None):
+    """Analisis seluruh stream; kembalikan (daftar baris per frame, statistik).
+
+    Statistik berisi jumlah frame dibaca/diproses/dilewati, jumlah kontur
+    yang dipakai ulang, dan ``fps_berkelanjutan`` (frame diproses per detik
+    wall-clock, termasuk dekode).
+    """
+    analisis = AnalisisStream(warna_dasar, sensitivitas, resolusi_analisis,
+                              metode_warna, ambang_perubahan)
+    statistik = {}
+    baris = []
+    waktu_frame = []
+    frame_frame = baca_frame(sumber, fps, waktu_nyata, statistik)
+    mulai = time.perf_counter()
+    for indeks, detik, frame in frame_frame:
+        mulai_frame = time.perf_counter()
+        hasil = analisis.proses(frame)
+        waktu_frame.append(time.perf_counter() - mulai_frame)
+        info = hasil['penyakit_info']
+        baris.append({
+            'frame': indeks,
+            'detik_sumber': round(detik, 3),
+            'tingkat': info['tingkat'],
+            'persentase_penyakit': float(info['persentase_penyakit']),
+            'luas_daun': float(hasil['luas_daun']),
+            'luas_bercak': int(info['luas_bercak']),
+            'kontur_ulang': hasil['kontur_ulang'],
+        })
+        if maks_frame is not None and len(baris) >= maks_frame:
+            break
+    frame_frame.close()  # Lepaskan VideoCapture meski berhenti di tengah
+    durasi = time.perf_counter() - mulai
+
+    statistik.update({
+        'frame_diproses': len(baris),
+        'kontur_dipakai_ulang': analisis.kontur_dipakai_ulang,
+        'durasi_detik': durasi,
+        'fps_berkelanjutan': len(baris) / max(durasi, 1e-9),
+        'ms_per_frame_p50': float(np.median(waktu_frame)) * 1000 if waktu_frame else 0.0,
+    })
+    if path_keluaran is not None:
+        tulis_hasil(baris, path_keluaran, KOLOM_STREAM)
+
+    fps_sumber = statistik['fps_sumber']
+    print(f"{len(baris)} frame diproses dalam {durasi:.1f} detik "
+          f"({statistik['fps_berkelanjutan']:.1f} fps berkelanjutan"
+          f"{f', sumber {fps_sumber:.1f} fps' if fps_sumber else ''}, "
+          f"{statistik['frame_dilewati']} dilewati, "
+          f"{statistik['kontur_dipakai_ulang']} kontur dipakai ulang)"
+          f"{f' -> {path_keluaran}' if path_keluaran else ''}", file=sys.stderr)
+    return baris, statistik
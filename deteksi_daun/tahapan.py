@@ -0,0 +1,159 @@
+"""Pipeline sebagai DAG tahapan dengan komputasi ulang inkremental.
+
+Setiap tahap mendeklarasikan nama masukan dan keluarannya. Cabang segmentasi
+daun (median -> Otsu -> closing -> Canny/kontur) hanya bergantung pada citra,
+sedangkan cabang bercak bergantung pada ``warna_dasar`` mulai dari kalibrasi
+warna (MODE_OTOMATIS memakai mask daun ``morph``) dan pada ``sensitivitas``
+mulai dari morfologi bercak. Saat satu
+parameter berubah, hanya tahap di hilirnya yang dihitung ulang.
+
+Tahap opsional (mis. statistik per daun) hanya dijalankan jika keluarannya
+diminta secara eksplisit lewat ``keluaran``.
+"""
+import threading
+import time
+
+import numpy as np
+
+from .pipeline import (analisis_per_daun, buat_overlay, closing_daun,
+                       deteksi_tepi, ekstraksi_kontur, filter_bercak,
+                       filter_median, gabung_hasil, kalibrasi_warna,
+                       klasifikasi_kesehatan, mask_warna,
+                       morfologi_sensitivitas, siapkan_citra, threshold_otsu)
+
+
+class Tahap:
+    """Satu tahap pipeline: fungsi dengan masukan dan keluaran bernama"""
+
+    def __init__(self, nama, fungsi, masukan, keluaran, opsional=False):
+        self.nama = nama
+        self.fungsi = fungsi
+        self.masukan = tuple(masukan)
+        self.keluaran = tuple(keluaran)
+        self.opsional = opsional
+
+    def __repr__(self):
+        return f"Tahap({self.nama!r}, {self.masukan} -> {self.keluaran})"
+
+
+def _filter_bercak_citra(mask_disease):
+    # Batas luas relatif terhadap seluruh frame, sama seperti deteksi_bercak_penyakit
+    return filter_bercak(mask_disease, mask_disease.shape[0] * mask_disease.shape[1])
+
+
+# Urutan daftar ini sudah topologis
+TAHAPAN_PIPELINE = [
+    Tahap('citra', siapkan_citra, ['img_array'], ['original', 'gray']),
+    Tahap('median', filter_median, ['gray'], ['filtered']),
+    Tahap('otsu', threshold_otsu, ['filtered'], ['binary']),
+    Tahap('closing', closing_daun, ['binary'], ['morph']),
+    Tahap('canny', deteksi_tepi, ['morph'], ['edges']),
+    Tahap('kontur', ekstraksi_kontur, ['original', 'morph'],
+          ['kontur', 'luas_daun', 'segmented']),
+    Tahap('kalibrasi', kalibrasi_warna, ['original', 'morph', 'warna_dasar'],
+          ['ambang_warna']),
+    Tahap('warna', mask_warna, ['original', 'warna_dasar', 'ambang_warna'],
+          ['mask_green', 'mask_bercak_warna']),
+    Tahap('morfologi_bercak', morfologi_sensitivitas,
+          ['mask_bercak_warna', 'sensitivitas'], ['mask_bercak_morfologi']),
+    Tahap('komponen', _filter_bercak_citra, ['mask_bercak_morfologi'],
+          ['mask_disease']),
+    Tahap('klasifikasi', klasifikasi_kesehatan, ['mask_green', 'mask_disease'],
+          ['penyakit_info']),
+    Tahap('overlay', buat_overlay, ['original', 'kontur', 'mask_disease'],
+          ['result']),
+    Tahap('per_daun', analisis_per_daun, ['morph', 'mask_green', 'mask_disease'],
+          ['per_daun'], opsional=True),
+]
+
+# Keluaran cabang segmentasi daun (tidak bergantung kalibrasi)
+KELUARAN_SEGMENTASI = ('original', 'gray', 'filtered', 'binary', 'morph',
+                       'edges', 'kontur', 'luas_daun', 'segmented')
+
+
+def _sama(lama, baru):
+    # Array dibandingkan berdasarkan identitas agar tidak perlu scan piksel
+    if isinstance(lama, np.ndarray) or isinstance(baru, np.ndarray):
+        return lama is baru
+    return lama == baru
+
+
+class PipelineBertahap:
+    """Eksekusi TAHAPAN_PIPELINE yang hanya menghitung ulang tahap yang usang"""
+
+    def __init__(self, tahapan=None):
+        self.tahapan = list(TAHAPAN_PIPELINE if tahapan is None else tahapan)
+        self.nilai = {}
+        self.versi = {}
+        self.waktu_tahap = {}
+        self._versi_masukan = {}
+        self._produsen = {}
+        for tahap in self.tahapan:
+            for nama in tahap.keluaran:
+                self._produsen[nama] = tahap
+        self._lock = threading.Lock()
+
+    def set(self, **masukan):
+        """Ganti nilai masukan; tahap hilir menjadi usang jika nilainya berubah"""
+        for nama, nilai in masukan.items():
+            if nama in self.nilai and _sama(self.nilai[nama], nilai):
+                continue
+            self.nilai[nama] = nilai
+            self.versi[nama] = self.versi.get(nama, 0) + 1
+
+    def _tahap_diperlukan(self, keluaran):
+        if keluaran is None:
+            return {tahap.nama for tahap in self.tahapan if not tahap.opsional}
+        perlu = set()
+        antrian = list(keluaran)
+        while antrian:
+            tahap = self._produsen.get(antrian.pop())
+            if tahap is None or tahap.nama in perlu:
+                continue
+            perlu.add(tahap.nama)
+            antrian.extend(tahap.masukan)
+        return perlu
+
+    def jalankan(self, keluaran=None, **masukan):
+        """Jalankan tahap yang usang lalu kembalikan hasil.
+
+        Tanpa ``keluaran`` hasilnya sama dengan ``proses_citra`` ditambah
+        ``waktu_tahap``; dengan ``keluaran`` hanya nilai yang diminta beserta
+        tahap yang dibutuhkan untuk menghitungnya.
+        """
+        with self._lock:
+            self.set(**masukan)
+            perlu = self._tahap_diperlukan(keluaran)
+            self.waktu_tahap = {}
+            for tahap in self.tahapan:
+                if tahap.nama not in perlu:
+                    continue
+                for nama in tahap.masukan:
+                    if nama not in self.versi:
+                        raise ValueError(f"Masukan '{nama}' untuk tahap "
+                                         f"'{tahap.nama}' belum diberikan")
+                versi_masukan = tuple(self.versi[nama] for nama in tahap.masukan)
+                if self._versi_masukan.get(tahap.nama) == versi_masukan:
+                    self.waktu_tahap[tahap.nama] = {'detik': 0.0, 'dihitung': False}
+                    continue
+
+                mulai = time.perf_counter()
+                hasil = tahap.fungsi(*(self.nilai[nama] for nama in tahap.masukan))
+                detik = time.perf_counter() - mulai
+
+                if len(tahap.keluaran) == 1:
+                    hasil = (hasil,)
+                for nama, nilai in zip(tahap.keluaran, hasil):
+                    self.nilai[nama] = nilai
+                    self.versi[nama] = self.versi.get(nama, 0) + 1
+                self._versi_masukan[tahap.nama] = versi_masukan
+                self.waktu_tahap[tahap.nama] = {'detik': detik, 'dihitung': True}
+
+            if keluaran is not None:
+                hasil = {nama: self.nilai[nama] for nama in keluaran}
+            else:
+                hasil = gabung_hasil(self.nilai['original'], self.nilai['gray'],
+                                     self.nilai, self.nilai['penyakit_info'],
+                                     self.nilai['result'])
+            hasil['waktu_tahap'] = dict(self.waktu_tahap)
+            return hasil
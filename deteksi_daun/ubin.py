@@ -0,0 +1,335 @@
+"""Analisis bercak per ubin (tile) untuk citra sangat besar, mis. ortomosaik drone.
+
+Citra tidak pernah dimuat utuh. Setiap ubin dibaca beserta halo (tepi
+tambahan) selebar jangkauan tahap warna dan morfologi, sehingga mask bercak
+pada bagian inti ubin identik dengan hasil ``deteksi_bercak_penyakit`` pada
+citra penuh. Connected components dihitung per inti ubin; komponen yang
+terpotong sambungan ubin digabung dengan union-find dari label di baris/
+kolom tepi, lalu filter ``min_area``/``max_area`` diterapkan pada luas
+gabungan dengan batas dari luas citra penuh, sama seperti ``filter_bercak``.
+
+Ubin diproses paralel di thread pool (OpenCV melepas GIL) dengan jumlah ubin
+yang sedang berjalan dibatasi. Selain piksel ubin yang sedang diproses,
+yang disimpan hanya luas tiap komponen dan label tepi satu baris ubin,
+jadi memori tidak bergantung pada tinggi citra.
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .pipeline import (MODE_OTOMATIS, MODE_VARIANS, ambang_varians, batas_luas_bercak,
+                       histogram_simpangan, jendela_varians, mask_varians_lokal,
+                       mask_warna, morfologi_sensitivitas, simpangan_lokal,
+                       tentukan_tingkat)
+
+UKURAN_UBIN = 2048
+
+# Jangkauan piksel terjauh yang memengaruhi mask bercak: GaussianBlur 21x21
+# mode Custom (10) + JANGKAUAN_MORFOLOGI: opening 5x5 dua kali (4) +
+# morfologi sensitivitas dengan kernel hingga 6x6, empat iterasi opening dan
+# dua closing (6 x 3). MODE_VARIANS memakai halo sendiri (lihat _halo_varians)
+JANGKAUAN_MORFOLOGI = 22
+HALO = 10 + JANGKAUAN_MORFOLOGI
+
+
+class SumberCitra:
+    """Pembaca jendela citra besar tanpa memuat seluruh citra.
+
+    ``sumber`` boleh berupa array (termasuk ``np.memmap``), path ``.npy``
+    (dibuka dengan mmap), atau path raster lain. Raster dibaca per jendela
+    lewat rasterio (GeoTIFF/ortomosaik) jika terpasang; tanpa rasterio
+    citra dimuat sekali dengan Pillow sehingga memori tidak lagi terbatas.
+    """
+
+    def __init__(self, sumber):
+        self._lokal = threading.local()
+        self._path = None
+        self._array = None
+        if isinstance(sumber, np.ndarray):
+            self._array = sumber
+        elif str(sumber).lower().endswith('.npy'):
+            self._array = np.load(sumber, mmap_mode='r')
+        else:
+            self._path = os.fspath(sumber)
+            try:
+                import rasterio
+            except ImportError:
+                from .batch import baca_citra
+                self._array = baca_citra(self._path)
+            else:
+                with rasterio.open(self._path) as ds:
+                    self.bentuk = (ds.height, ds.width)
+                return
+        self.bentuk = self._array.shape[:2]
+
+    def _dataset(self):
+        # Handle rasterio tidak aman dipakai lintas thread, jadi satu per thread
+        ds = getattr(self._lokal, 'ds', None)
+        if ds is None:
+            import rasterio
+            ds = self._lokal.ds = rasterio.open(self._path)
+        return ds
+
+    def baca(self, y0, y1, x0, x1):
+        """Jendela [y0:y1, x0:x1] sebagai array RGB uint8 yang contiguous"""
+        if self._array is None:
+            from rasterio.windows import Window
+            ds = self._dataset()
+            pita = (1, 2, 3) if ds.count >= 3 else (1,)
+            jendela = ds.read(pita, window=Window(x0, y0, x1 - x0, y1 - y0))
+            jendela = np.moveaxis(jendela, 0, -1)
+        else:
+            jendela = self._array[y0:y1, x0:x1]
+        if jendela.ndim == 2 or jendela.shape[2] == 1:
+            return cv2.cvtColor(np.ascontiguousarray(jendela), cv2.COLOR_GRAY2RGB)
+        return np.ascontiguousarray(jendela[:, :, :3], dtype=np.uint8)
+
+
+def _halo_varians(jendela):
+    # Box filter dan erosi selebar jendela varians (jendela // 2) + morfologi
+    return max(HALO, jendela // 2 + JANGKAUAN_MORFOLOGI)
+
+
+def _baca_dengan_halo(sumber, kotak, halo=HALO):
+    # Ubin beserta halo, dan slice inti ubin di dalam potongan itu
+    y0, y1, x0, x1 = kotak
+    h, w = sumber.bentuk
+    hy0, hy1 = max(y0 - halo, 0), min(y1 + halo, h)
+    hx0, hx1 = max(x0 - halo, 0), min(x1 + halo, w)
+    inti = (slice(y0 - hy0, y1 - hy0), slice(x0 - hx0, x1 - hx0))
+    return sumber.baca(hy0, hy1, hx0, hx1), inti
+
+
+def _histogram_ubin(sumber, kotak, jendela):
+    # Lintasan statistik MODE_VARIANS: histogram simpangan lokal inti ubin
+    img, inti = _baca_dengan_halo(sumber, kotak, _halo_varians(jendela))
+    _, dalam, simpangan = simpangan_lokal(img, jendela)
+    return histogram_simpangan(np.ascontiguousarray(simpangan[inti]),
+                               np.ascontiguousarray(dalam[inti]))
+
+
+def _mask_bercak_ubin(sumber, kotak, warna_dasar, sensitivitas, metode_warna,
+                      tekstur=None):
+    # Mask sehat/bercak (setelah morfologi) hanya untuk inti ubin. ``tekstur``
+    # adalah (ambang, jendela) MODE_VARIANS dari statistik seluruh citra
+    if tekstur is not None:
+        ambang_tekstur, jendela = tekstur
+        img, inti = _baca_dengan_halo(sumber, kotak, _halo_varians(jendela))
+        mask_healthy, mask_disease = mask_varians_lokal(img, ambang_tekstur, jendela)
+    else:
+        img, inti = _baca_dengan_halo(sumber, kotak)
+        mask_healthy, mask_disease = mask_warna(img, warna_dasar, metode=metode_warna)
+    mask_disease = morfologi_sensitivitas(mask_disease, sensitivitas)
+    return mask_healthy[inti], np.ascontiguousarray(mask_disease[inti])
+
+
+def _analisis_ubin(sumber, kotak, warna_dasar, sensitivitas, metode_warna,
+                   tekstur):
+    mask_healthy, mask_disease = _mask_bercak_ubin(sumber, kotak, warna_dasar,
+                                                   sensitivitas, metode_warna,
+                                                   tekstur)
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(mask_disease, connectivity=8)
+    return {
+        'luas_sehat': int(cv2.countNonZero(mask_healthy)),
+        'luas_komponen': stats[1:, cv2.CC_STAT_AREA].astype(np.int64),
+        'atas': labels[0].copy(),
+        'bawah': labels[-1].copy(),
+        'kiri': labels[:, 0].copy(),
+        'kanan': labels[:, -1].copy(),
+    }
+
+
+def _pratinjau_ubin(sumber, kotak, warna_dasar, sensitivitas, metode_warna,
+                    tekstur, tabel_simpan, ukuran):
+    _, mask_disease = _mask_bercak_ubin(sumber, kotak, warna_dasar,
+                                        sensitivitas, metode_warna, tekstur)
+    # Algoritme pelabelan sama dengan lintasan pertama, jadi label lokalnya identik
+    _, labels, _, _ = cv2.connectedComponentsWithStats(mask_disease, connectivity=8)
+    mask = tabel_simpan[labels]
+    if mask.shape[::-1] != ukuran:
+        mask = cv2.resize(mask, ukuran, interpolation=cv2.INTER_AREA)
+    return mask
+
+
+def daftar_ubin(bentuk, ukuran_ubin=UKURAN_UBIN):
+    """Kotak inti (y0, y1, x0, x1) semua ubin, urut baris demi baris"""
+    h, w = bentuk
+    return [[(y0, min(y0 + ukuran_ubin, h), x0, min(x0 + ukuran_ubin, w))
+             for x0 in range(0, w, ukuran_ubin)]
+            for y0 in range(0, h, ukuran_ubin)]
+
+
+def _petakan_terurut(executor, fungsi, argumen, maks_berjalan):
+    # Seperti executor.map, tetapi hanya maks_berjalan ubin yang diajukan sekaligus
+    antrean = deque()
+    for args in argumen:
+        antrean.append(executor.submit(fungsi, *args))
+        if len(antrean) >= maks_berjalan:
+            yield antrean.popleft().result()
+    while antrean:
+        yield antrean.popleft().result()
+
+
+class _UnionFind:
+    """Union-find jarang: hanya komponen yang menyentuh sambungan ubin"""
+
+    def __init__(self):
+        self.induk = {}
+
+    def cari(self, a):
+        akar = a
+        while self.induk.get(akar, akar) != akar:
+            akar = self.induk[akar]
+        while a != akar:  # Kompresi jalur
+            self.induk[a], a = akar, self.induk.get(a, a)
+        return akar
+
+    def gabung(self, a, b):
+        ra, rb = self.cari(a), self.cari(b)
+        if ra != rb:
+            self.induk[max(ra, rb)] = min(ra, rb)
+
+
+def _pasangan_sambungan(a, b, offset_a, offset_b, uf):
+    """Gabungkan label dua deret piksel bertetangga (konektivitas 8)"""
+    n = len(a)
+    for d in (-1, 0, 1):
+        aa = a[max(0, -d):n - max(0, d)]
+        bb = b[max(0, d):n - max(0, -d)]
+        sentuh = (aa > 0) & (bb > 0)
+        if not sentuh.any():
+            continue
+        pasangan = np.unique(np.stack([aa[sentuh], bb[sentuh]], axis=1), axis=0)
+        for la, lb in pasangan:
+            uf.gabung(offset_a + int(la), offset_b + int(lb))
+
+
+def analisis_ubin(sumber, warna_dasar="Hijau (Default)", sensitivitas=5,
+                  ukuran_ubin=UKURAN_UBIN, jumlah_worker=None,
+                  metode_warna="opencv", resolusi_pratinjau=None):
+    """Analisis bercak citra besar per ubin; hasil setara ``deteksi_bercak_penyakit``.
+
+    Mengembalikan dictionary dengan kunci yang sama seperti
+    ``klasifikasi_kesehatan`` tanpa mask penuh, ditambah ``jumlah_bercak``,
+    ``bentuk``, dan ``jumlah_ubin``. Dengan ``resolusi_pratinjau`` (sisi
+    terpanjang, piksel) ubin dihitung ulang sekali lagi untuk membuat
+    ``mask_disease`` yang diperkecil.
+
+    Untuk ``MODE_VARIANS`` ada satu lintasan tambahan di awal yang
+    menjumlahkan histogram simpangan lokal semua ubin, agar ambang adaptifnya
+    sama dengan ambang pada citra penuh. ``MODE_OTOMATIS`` tidak didukung:
+    kalibrasinya memerlukan mask segmentasi daun (Otsu) seluruh citra.
+    """
+    if warna_dasar == MODE_OTOMATIS:
+        raise ValueError(f"Mode {MODE_OTOMATIS} tidak didukung analisis per ubin")
+    if not isinstance(sumber, SumberCitra):
+        sumber = SumberCitra(sumber)
+    h, w = sumber.bentuk
+    grid = daftar_ubin((h, w), ukuran_ubin)
+    jumlah_worker = jumlah_worker or os.cpu_count() or 1
+    uf = _UnionFind()
+    luas_komponen = []  # Per ubin: luas tiap komponen lokal
+    offset_ubin = []    # Per ubin: id global komponen lokal pertama
+    luas_sehat = 0
+    offset = 0
+    baris_atas = None  # (offset, label tepi bawah) ubin pada baris sebelumnya
+    with ThreadPoolExecutor(max_workers=jumlah_worker) as executor:
+        tekstur = None
+        if warna_dasar == MODE_VARIANS:
+            # Jendela dari ukuran seluruh citra, sama seperti pada citra penuh
+            jendela = jendela_varians((h, w))
+            argumen = ((sumber, kotak, jendela) for baris in grid for kotak in baris)
+            tekstur = (ambang_varians(sum(_petakan_terurut(
+                executor, _histogram_ubin, argumen, jumlah_worker * 2))), jendela)
+        parameter = (warna_dasar, sensitivitas, metode_warna, tekstur)
+
+        argumen = ((sumber, kotak) + parameter for baris in grid for kotak in baris)
+        hasil_ubin = _petakan_terurut(executor, _analisis_ubin, argumen, jumlah_worker * 2)
+        for baris in grid:
+            baris_ini = []
+            kiri = None
+            for c, _ in enumerate(baris):
+                hasil = next(hasil_ubin)
+                luas_sehat += hasil['luas_sehat']
+                luas_komponen.append(hasil['luas_komponen'])
+                offset_ubin.append(offset)
+
+                # Label lokal l (> 0) menjadi id global o + l, dengan o = offset - 1
+                o = offset - 1
+                if kiri is not None:
+                    _pasangan_sambungan(kiri[1], hasil['kiri'], kiri[0], o, uf)
+                if baris_atas is not None:
+                    o_atas, bawah_atas = baris_atas[c]
+                    _pasangan_sambungan(bawah_atas, hasil['atas'], o_atas, o, uf)
+                    # Tetangga diagonal di sudut ubin
+                    if c > 0:
+                        o_kiri_atas, bawah_kiri_atas = baris_atas[c - 1]
+                        if bawah_kiri_atas[-1] > 0 and hasil['atas'][0] > 0:
+                            uf.gabung(o_kiri_atas + int(bawah_kiri_atas[-1]),
+                                      o + int(hasil['atas'][0]))
+                    if c + 1 < len(baris):
+                        o_kanan_atas, bawah_kanan_atas = baris_atas[c + 1]
+                        if bawah_kanan_atas[0] > 0 and hasil['atas'][-1] > 0:
+                            uf.gabung(o_kanan_atas + int(bawah_kanan_atas[0]),
+                                      o + int(hasil['atas'][-1]))
+
+                kiri = (o, hasil['kanan'])
+                baris_ini.append((o, hasil['bawah']))
+                offset += len(hasil['luas_komponen'])
+            baris_atas = baris_ini
+
+        # Jumlahkan luas komponen yang tersambung ke akarnya
+        luas = np.concatenate(luas_komponen) if luas_komponen else np.zeros(0, np.int64)
+        luas_total = luas.copy()
+        akar = np.arange(len(luas))
+        for anggota in list(uf.induk):
+            r = uf.cari(anggota)
+            if r != anggota:
+                akar[anggota] = r
+                luas_total[r] += luas[anggota]
+                luas_total[anggota] = 0
+        min_area, max_area = batas_luas_bercak(h * w)
+        simpan_akar = (luas_total > min_area) & (luas_total < max_area)
+        luas_bercak = int(luas_total[simpan_akar].sum())
+
+        pratinjau = None
+        if resolusi_pratinjau is not None:
+            skala = min(1.0, resolusi_pratinjau / max(h, w))
+            pratinjau = np.zeros((max(1, round(h * skala)), max(1, round(w * skala))),
+                                 dtype=np.uint8)
+            simpan = np.where(simpan_akar[akar], 255, 0).astype(np.uint8)
+            argumen, tujuan = [], []
+            for kotak, o, n in zip((k for baris in grid for k in baris), offset_ubin,
+                                   map(len, luas_komponen)):
+                y0, y1, x0, x1 = kotak
+                py0, py1 = round(y0 * skala), round(y1 * skala)
+                px0, px1 = round(x0 * skala), round(x1 * skala)
+                if py1 <= py0 or px1 <= px0:
+                    continue
+                tabel = np.concatenate([[0], simpan[o:o + n]]).astype(np.uint8)
+                argumen.append((sumber, kotak) + parameter + (tabel, (px1 - px0, py1 - py0)))
+                tujuan.append((py0, py1, px0, px1))
+            for (py0, py1, px0, px1), mask in zip(
+                    tujuan, _petakan_terurut(executor, _pratinjau_ubin, argumen,
+                                             jumlah_worker * 2)):
+                pratinjau[py0:py1, px0:px1] = mask
+
+    luas_daun = luas_sehat
+    persentase_penyakit = luas_bercak / luas_daun * 100 if luas_daun > 0 else 0
+    tingkat, status_class, keterangan = tentukan_tingkat(persentase_penyakit)
+    return {
+        'tingkat': tingkat,
+        'status_class': status_class,
+        'persentase_penyakit': persentase_penyakit,
+        'keterangan': keterangan,
+        'mask_disease': pratinjau,
+        'luas_daun': luas_daun,
+        'luas_bercak': luas_bercak,
+        'jumlah_bercak': int(simpan_akar.sum()),
+        'bentuk': (h, w),
+        'jumlah_ubin': len(offset_ubin),
+    }
@@ -0,0 +1,40 @@
+"""AnalisisCache menyimpan mask secara ringkas dan mengembalikan hasil identik"""
+import io
+
+import numpy as np
+from PIL import Image
+
+from deteksi_daun import (AnalisisCache, MaskRingkas, buat_citra_dummy, hash_konten,
+                          proses_citra)
+
+
+def ke_png(citra):
+    buffer = io.BytesIO()
+    Image.fromarray(citra).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_hit_identik_dan_ringkas():
+    citra = buat_citra_dummy("parah", seed=1, ukuran=(240, 320))
+    data = ke_png(citra)
+    cache = AnalisisCache()
+    pertama = cache.proses(data, "Hijau (Default)", 5)
+    cache.proses(data, "Hijau (Default)", 8)  # Pipeline dijalankan ulang dengan parameter lain
+    kedua = cache.proses(data, "Hijau (Default)", 5)
+    acuan = proses_citra(citra, "Hijau (Default)", 5)
+
+    for hasil in (pertama, kedua):
+        for kunci in ('mask_green', 'mask_disease'):
+            assert isinstance(hasil['penyakit_info'][kunci], np.ndarray)
+            np.testing.assert_array_equal(hasil['penyakit_info'][kunci],
+                                          acuan['penyakit_info'][kunci])
+        np.testing.assert_array_equal(hasil['result'], acuan['result'])
+        assert hasil['penyakit_info']['persentase_penyakit'] == \
+            acuan['penyakit_info']['persentase_penyakit']
+
+    # Batas byte cache menghitung ukuran mask ringkas, bukan array uint8
+    kunci = ('penyakit', hash_konten(data), None, "Hijau (Default)", 5)
+    tersimpan, ukuran = cache.cache._data[kunci]
+    assert isinstance(tersimpan['penyakit_info']['mask_green'], MaskRingkas)
+    assert isinstance(tersimpan['penyakit_info']['mask_disease'], MaskRingkas)
+    assert ukuran < tersimpan['result'].nbytes + acuan['penyakit_info']['mask_green'].nbytes
@@ -0,0 +1,38 @@
+"""Mode Otomatis harus memilih preset yang benar dan menilai bercak seperti pada daun hijau"""
+import cv2
+import pytest
+
+from deteksi_daun import buat_citra_dummy, proses_citra
+from deteksi_daun.dummy import VARIAN_DAUN, warnai_daun
+from deteksi_daun.pipeline import (MODE_OTOMATIS, closing_daun, filter_median,
+                                   kalibrasi_warna, threshold_otsu)
+
+UKURAN = (480, 640)
+
+
+def citra_varian(kondisi, nama):
+    citra = buat_citra_dummy(kondisi, seed=3, ukuran=UKURAN)
+    warna = VARIAN_DAUN[nama][0]
+    return citra if warna is None else warnai_daun(citra, warna)
+
+
+def penyakit_otomatis(citra):
+    return proses_citra(citra, MODE_OTOMATIS, 5, keluaran=())['penyakit_info']
+
+
+@pytest.mark.parametrize("nama", list(VARIAN_DAUN))
+def test_preset_terpilih(nama):
+    citra = citra_varian('parah', nama)
+    gray = cv2.cvtColor(citra, cv2.COLOR_RGB2GRAY)
+    ambang = kalibrasi_warna(citra, closing_daun(threshold_otsu(filter_median(gray))))
+    assert ambang['preset'] == VARIAN_DAUN[nama][1]
+
+
+@pytest.mark.parametrize("kondisi", ['ringan', 'parah'])
+def test_hijau_kekuningan_seperti_daun_hijau(kondisi):
+    # Bercak sama persis, hanya warna daun yang digeser ke hue irisan Hijau/Kuning
+    acuan = penyakit_otomatis(citra_varian(kondisi, 'hijau'))
+    hasil = penyakit_otomatis(citra_varian(kondisi, 'hijau kekuningan'))
+    assert hasil['persentase_penyakit'] > 0
+    assert hasil['persentase_penyakit'] == pytest.approx(acuan['persentase_penyakit'], abs=2)
+    assert hasil['tingkat'] == acuan['tingkat']
@@ -0,0 +1,70 @@
+"""Jalur lookup table (metode="lut") harus identik dengan jalur OpenCV mask_warna"""
+import numpy as np
+import pytest
+
+from deteksi_daun import PILIHAN_WARNA_DASAR, buat_citra_dummy
+from deteksi_daun.lut import mask_warna_lut
+from deteksi_daun.pipeline import AMBANG_WARNA, mask_warna
+
+
+def citra_acak(h=96, w=128, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+def sama_dengan_opencv(citra, warna_dasar):
+    sehat_cv, bercak_cv = mask_warna(citra, warna_dasar)
+    sehat_lut, bercak_lut = mask_warna(citra, warna_dasar, metode="lut")
+    np.testing.assert_array_equal(sehat_lut, sehat_cv)
+    np.testing.assert_array_equal(bercak_lut, bercak_cv)
+
+
+@pytest.mark.parametrize("warna_dasar", list(AMBANG_WARNA))
+def test_citra_acak(warna_dasar):
+    sama_dengan_opencv(citra_acak(), warna_dasar)
+
+
+@pytest.mark.parametrize("warna_dasar", list(AMBANG_WARNA))
+def test_citra_daun(warna_dasar):
+    sama_dengan_opencv(buat_citra_dummy("parah", seed=1, ukuran=(240, 320)), warna_dasar)
+
+
+@pytest.mark.parametrize("warna_dasar", list(AMBANG_WARNA))
+@pytest.mark.parametrize("potong", [
+    lambda c: c[::2, ::3],          # Langkah baris & kolom
+    lambda c: c[:, :, ::-1],        # Urutan kanal terbalik (view BGR)
+    lambda c: c[7:-5, 11:-13],      # Sub-citra dengan stride baris lebih lebar
+    lambda c: np.asfortranarray(c),
+], ids=["langkah", "kanal_terbalik", "sub_citra", "fortran"])
+def test_citra_tidak_kontigu(warna_dasar, potong):
+    citra = potong(citra_acak(seed=2))
+    assert not citra.flags['C_CONTIGUOUS']
+    sama_dengan_opencv(citra, warna_dasar)
+
+
+@pytest.mark.parametrize("warna_dasar", list(AMBANG_WARNA))
+def test_seluruh_ruang_rgb(warna_dasar):
+    # Palet semua 2**24 warna: setiap entri LUT dibandingkan dengan OpenCV
+    idx = np.arange(1 << 24, dtype=np.uint32)
+    palet = np.stack([idx >> 16, (idx >> 8) & 255, idx & 255], axis=-1)
+    palet = palet.astype(np.uint8).reshape(4096, 4096, 3)
+    sehat_cv, bercak_cv = mask_warna(palet, warna_dasar)
+    sehat_lut, bercak_lut = mask_warna_lut(palet, warna_dasar)
+    assert np.array_equal(sehat_lut, sehat_cv)
+    assert np.array_equal(bercak_lut, bercak_cv)
+
+
+def test_ambang_kustom():
+    ambang = {'sehat': [((30, 20, 20), (90, 255, 255))],
+              'bercak': [((5, 40, 10), (28, 255, 140))], 'gelap_lab': 60}
+    citra = citra_acak(seed=3)
+    cv = mask_warna(citra, ambang=ambang)
+    lut = mask_warna(citra, ambang=ambang, metode="lut")
+    for a, b in zip(lut, cv):
+        np.testing.assert_array_equal(a, b)
+
+
+@pytest.mark.parametrize("warna_dasar", [w for w in PILIHAN_WARNA_DASAR if w not in AMBANG_WARNA])
+def test_mode_non_warna_tetap_opencv(warna_dasar):
+    # Mode tekstur dan Otomatis mengabaikan metode="lut"
+    sama_dengan_opencv(buat_citra_dummy("ringan", seed=4, ukuran=(240, 320)), warna_dasar)
+
@@ -0,0 +1,38 @@
+"""Total ukuran PenyimpananHasil yang dijaga trigger harus sama dengan SUM(ukuran)"""
+import numpy as np
+
+from deteksi_daun import PenyimpananHasil
+
+
+def total_tersimpan(penyimpanan):
+    conn = penyimpanan._koneksi()
+    return (conn.execute("SELECT byte FROM total_ukuran").fetchone()[0],
+            conn.execute("SELECT COALESCE(SUM(ukuran), 0) FROM hasil").fetchone()[0])
+
+
+def test_total_ukuran_konsisten(tmp_path):
+    batas = 16 * 1024
+    penyimpanan = PenyimpananHasil(tmp_path / "hasil.sqlite", maks_byte=batas)
+    rng = np.random.default_rng(0)
+    for i in range(200):
+        mask = np.where(rng.random((64, 64)) < 0.3, 255, 0).astype(np.uint8)
+        # Sebagian kunci ditulis ulang (upsert) dengan ukuran berbeda
+        kunci = f"k{rng.integers(0, 60)}"
+        penyimpanan.simpan(kunci, {'i': i}, mask if i % 3 else None, mask)
+        dijaga, jumlah = total_tersimpan(penyimpanan)
+        assert dijaga == jumlah <= batas
+    assert penyimpanan.statistik()['jumlah_entri'] > 0
+
+
+def test_database_lama_tanpa_total(tmp_path):
+    path = tmp_path / "lama.sqlite"
+    penyimpanan = PenyimpananHasil(path)
+    for i in range(5):
+        penyimpanan.simpan(f"k{i}", {'i': i})
+    # Database dari versi sebelum total_ukuran ada
+    conn = penyimpanan._koneksi()
+    conn.executescript("DROP TRIGGER hasil_tambah; DROP TRIGGER hasil_hapus; "
+                       "DROP TRIGGER hasil_ubah; DROP TABLE total_ukuran;")
+    penyimpanan.tutup()
+    dijaga, jumlah = total_tersimpan(PenyimpananHasil(path))
+    assert dijaga == jumlah > 0
@@ -0,0 +1,30 @@
+"""Validasi parameter dan konsistensi keluaran proses_citra"""
+import numpy as np
+import pytest
+
+from deteksi_daun import KELUARAN_CITRA, buat_citra_dummy, proses_citra
+from deteksi_daun.__main__ import main
+
+
+@pytest.mark.parametrize("resolusi", [0, -3])
+def test_resolusi_analisis_tidak_positif(resolusi):
+    citra = buat_citra_dummy("ringan", seed=0, ukuran=(120, 160))
+    with pytest.raises(ValueError):
+        proses_citra(citra, resolusi_analisis=resolusi)
+
+
+def test_resolusi_analisis_cli_tidak_positif(capsys):
+    with pytest.raises(SystemExit):
+        main(["batch", "--resolusi-analisis", "0", "tidak-ada.png"])
+    assert "--resolusi-analisis" in capsys.readouterr().err
+
+
+def test_keluaran_none_sama_dengan_semua_keluaran():
+    citra = buat_citra_dummy("parah", seed=0, ukuran=(120, 160))
+    semua = proses_citra(citra, keluaran=None)
+    dipilih = proses_citra(citra, keluaran=KELUARAN_CITRA)
+    assert set(semua) == set(dipilih) == set(KELUARAN_CITRA) | {'luas_daun', 'penyakit_info'}
+    for nama in KELUARAN_CITRA:
+        np.testing.assert_array_equal(semua[nama], dipilih[nama])
+    # Citra asli di hasil adalah salinan, bukan array milik pemanggil
+    assert not np.shares_memory(semua['original'], citra)
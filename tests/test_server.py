@@ -0,0 +1,49 @@
+"""Validasi parameter query endpoint POST /analisis"""
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from PIL import Image
+
+from deteksi_daun import buat_citra_dummy
+from deteksi_daun.server import buat_server
+
+
+@pytest.fixture(scope="module")
+def alamat():
+    server, layanan = buat_server(port=0, jumlah_worker=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    layanan.tutup()
+
+
+def kirim(alamat, query):
+    buffer = io.BytesIO()
+    Image.fromarray(buat_citra_dummy("ringan", seed=0, ukuran=(120, 160))).save(buffer, "PNG")
+    request = urllib.request.Request(f"{alamat}/analisis?{query}", data=buffer.getvalue(),
+                                     method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=60) as balasan:
+            return balasan.status, json.load(balasan)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+@pytest.mark.parametrize("query", ["resolusi_analisis=0", "resolusi_analisis=-3",
+                                   "resolusi_analisis=abc", "sensitivitas=11"])
+def test_parameter_tidak_valid(alamat, query):
+    status, isi = kirim(alamat, query)
+    assert status == 400
+    assert 'galat' in isi
+
+
+def test_resolusi_analisis_valid(alamat):
+    status, isi = kirim(alamat, "resolusi_analisis=64")
+    assert status == 200
+    assert 'persentase_penyakit' in isi